@@ -1,33 +1,172 @@
 #backend/ai_processor.py
 import os
-import base64
+import re
+import json
+import time
+import asyncio
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_classic.schema import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
+from analysis_cache import AnalysisCache
+from image_preprocessor import ImagePreprocessor, InvalidImageError, image_tokens
+from blueprint_structure import BlueprintStructure, StructureStore
+from upload_stream import base64_file, hash_file
+from model_clients import ModelClients
+from model_providers import ModelProvider, create_provider
+from conversation_store import estimate_tokens
+from rate_limiter import CallScheduler, is_rate_limit_error
 
 load_dotenv()
 
 
+# Sections of the automatic analysis; run as one prompt or as parallel sub-requests
+COMPREHENSIVE_SECTIONS = [
+    ("overview", """**1. PROPERTY OVERVIEW**
+   - Property type (residential, commercial, office, etc.)
+   - Total floor area in square feet
+   - Number of floors/levels shown
+   - Building shape and orientation"""),
+    ("rooms", """**2. COMPLETE ROOM INVENTORY** (Count and list EVERY room with individual dimensions)
+   - Bedrooms: Count each bedroom and provide dimensions (length × width in feet)
+   - Bathrooms: Specify full bath, half bath, etc. with dimensions
+   - Kitchen(s): Dimensions and layout type (L-shaped, galley, etc.)
+   - Living Areas: Living room, family room, etc. with dimensions
+   - Dining Areas: Formal dining, breakfast nook, etc. with dimensions
+   - Utility Rooms: Laundry, mechanical room, storage with dimensions
+   - Other Spaces: Home office, den, closets, hallways, foyer, etc. with dimensions
+   - Outdoor Spaces: Patios, balconies, terraces if visible"""),
+    ("dimensions", """**3. DETAILED DIMENSIONS**
+   - Overall building dimensions (total length × width)
+   - Individual room dimensions for EACH space identified above
+   - Ceiling heights (if marked on blueprint)
+   - Wall thickness measurements
+   - Door widths and types (single, double, sliding, etc.)
+   - Window dimensions and quantities"""),
+    ("features", """**4. ARCHITECTURAL FEATURES & ELEMENTS**
+   - Main entry and all secondary entrances
+   - Total number of doors (interior and exterior)
+   - Total number of windows with placement
+   - Stairs: Location, type, number of steps if visible
+   - Elevators or lifts (if present)
+   - Built-in features: Closets, cabinets, shelving
+   - Fireplaces or special features
+   - Structural elements: Columns, beams, load-bearing walls"""),
+    ("systems", """**5. BUILDING SYSTEMS** (if visible on blueprint)
+   - HVAC: Furnace location, AC units, vents, ductwork
+   - Electrical: Panel locations, outlet placements, light fixtures
+   - Plumbing: Fixtures in all bathrooms and kitchen, water heater location
+   - Fire Safety: Smoke detectors, fire extinguishers, sprinkler systems
+   - Special systems: Security, smart home features"""),
+    ("accessibility", """**6. ACCESSIBILITY & CODE COMPLIANCE**
+   - ADA accessibility features (ramps, wide doorways, etc.)
+   - Emergency exits and egress routes
+   - Handrails and grab bars
+   - Code compliance observations
+   - Safety features noted"""),
+    ("circulation", """**7. LAYOUT & CIRCULATION ASSESSMENT**
+   - Traffic flow patterns and efficiency
+   - Room adjacencies and relationships
+   - Privacy zones (public vs private spaces)
+   - Natural light and ventilation opportunities
+   - Space utilization efficiency
+   - Potential bottlenecks or circulation issues"""),
+    ("observations", """**8. PROFESSIONAL OBSERVATIONS**
+   - Strengths of the design
+   - Potential concerns or limitations
+   - Suggestions for optimization
+   - Unique or notable design elements
+   - Market appeal considerations""")
+]
+
+COMPREHENSIVE_RULES = """IMPORTANT: 
+- Provide EXACT counts for all rooms
+- Give SPECIFIC dimensions in feet and inches where visible
+- Calculate total square footage
+- Be thorough and leave nothing out
+- Use clear formatting with bullet points
+- If any measurement is not visible, state "Not marked on blueprint"
+"""
+
+# Fixed prompt for the automatic analysis run on first upload
+COMPREHENSIVE_ANALYSIS_QUESTION = "Please provide a COMPLETE and DETAILED analysis of this blueprint including:\n\n" + "\n\n".join(section for _, section in COMPREHENSIVE_SECTIONS) + "\n\n" + COMPREHENSIVE_RULES
+
+# Questions behind the single-aspect helpers (get_room_count, get_dimensions, get_features)
+ROOM_COUNT_QUESTION = "How many rooms are there in this blueprint? List each room type and count them separately (bedrooms, bathrooms, kitchen, living areas, etc.)"
+DIMENSIONS_QUESTION = "What are the dimensions of this blueprint? Provide width, length, and total square footage. Also provide dimensions for individual rooms if visible."
+FEATURES_QUESTION = "What are all the notable features in this blueprint? Include doors, windows, stairs, elevators, HVAC systems, electrical outlets, plumbing fixtures, and any special architectural elements."
+HELPER_QUESTIONS = {"rooms": ROOM_COUNT_QUESTION, "dimensions": DIMENSIONS_QUESTION, "features": FEATURES_QUESTION}
+
+
+def section_question(key: str, section: str) -> str:
+    """Prompt for one section of the comprehensive analysis when run as a parallel sub-request"""
+    lead = f"{HELPER_QUESTIONS[key]}\n\n" if key in HELPER_QUESTIONS else ""
+    return f"""{lead}Analyze ONLY the following part of this blueprint (the other sections of the report are produced separately):
+
+{section}
+
+{COMPREHENSIVE_RULES}"""
+
+
+# Reply the text-only path must give when the prior analysis cannot answer the question
+NEED_IMAGE_SENTINEL = "NEED_IMAGE"
+
+# Phrases that signal the user wants the drawing itself re-examined
+VISION_CUES = (
+    "look again", "re-examine", "reexamine", "zoom", "closer look", "double check", "double-check",
+    "verify", "recount", "count again", "exact location", "where exactly", "where is", "locate",
+    "legend", "symbol", "label", "annotation", "scale bar", "north arrow", "title block",
+    "handwrit", "note on", "in the corner", "top left", "top right", "bottom left", "bottom right"
+)
+
+ROUTER_STOPWORDS = {
+    "tell", "more", "about", "what", "which", "there", "their", "these", "those", "this", "that",
+    "details", "detail", "does", "have", "with", "from", "into", "please", "give", "show", "many",
+    "much", "some", "they", "them", "where", "when", "would", "could", "should", "information"
+}
+
+
 class BlueprintAnalyzer:
     """
     AI-powered blueprint analyzer using LangChain and OpenAI Vision
     """
     
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
+    def __init__(self, clients: ModelClients, provider: Optional[ModelProvider] = None):
         self.model_name = os.getenv("OPENAI_MODEL", "gpt-4o")  # Updated to gpt-4o
         self.temperature = float(os.getenv("OPENAI_TEMPERATURE", 0.3))
         self.max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", 2000))
+        self.max_concurrency = int(os.getenv("OPENAI_MAX_CONCURRENCY", 32))
+        
+        # Bounds in-flight calls per worker, paces them under the RPM/TPM quota and retries failures
+        self.scheduler = CallScheduler(self.max_concurrency)
+        
+        # Content-addressed result cache (image hash + question + model settings)
+        self.cache = AnalysisCache()
+        
+        # Downsizes/re-encodes images before they are sent to the model
+        self.preprocessor = ImagePreprocessor()
+        
+        # Follow-ups answerable from prior analysis skip the vision call
+        self.text_routing = os.getenv("TEXT_ROUTING_ENABLED", "true").lower() == "true"
+        self.text_routing_threshold = float(os.getenv("TEXT_ROUTING_THRESHOLD", 0.5))
         
-        # Initialize LangChain ChatOpenAI
-        self.llm = ChatOpenAI(
+        # Comprehensive analysis as eight concurrent section requests instead of one long answer
+        self.parallel_sections = os.getenv("ANALYSIS_PARALLEL_SECTIONS", "false").lower() == "true"
+        
+        # Structured (JSON) extraction, stored once per image content hash
+        self.structures = StructureStore()
+        self._extraction_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Chat model from the configured provider: OpenAI on the shared connection pool,
+        # or the local fake (MODEL_PROVIDER=fake) for offline load testing
+        self.clients = clients
+        self.provider = provider or create_provider(os.getenv("MODEL_PROVIDER", "openai"), clients)
+        self.llm = self.provider.chat_model(
             model=self.model_name,
             temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            openai_api_key=self.api_key
+            max_tokens=self.max_tokens
         )
+        self.model_name = self.provider.model_id(self.model_name)
         
         # Enhanced system prompt for superior analysis
         self.system_prompt = """You are CBRE's elite AI architectural analyst with decades of expertise in blueprint interpretation, 
@@ -72,25 +211,87 @@ real estate development, and construction management. You provide institutional-
 Your analysis must meet institutional investment-grade quality - detailed enough for acquisition decisions,
 accurate enough for due diligence, and clear enough for C-suite presentations."""
 
-    def encode_image(self, image_path: str) -> str:
-        """Encode image to base64"""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+    async def encode_image(self, image_path: str) -> str:
+        """Encode image to base64 in chunks, off the event loop"""
+        return await asyncio.to_thread(base64_file, image_path)
     
-    async def analyze_blueprint(self, image_path: str, question: str) -> Dict[str, Any]:
+    async def build_image_content(self, image_path: str, image_hash: str):
         """
-        Analyze blueprint image and answer questions with full context awareness
+        Preprocess the image and build the image_url message parts
+        Images are read and encoded from disk in chunks rather than held as whole-file bytes
+        Returns (content parts, preprocessing stats)
         """
-        try:
-            # Encode the image
-            base64_image = self.encode_image(image_path)
-            
-            # Determine image format
+        processed = await self.preprocessor.process(image_path, image_hash)
+        # Reads image headers only, so an unreadable file fails here before it is encoded
+        tokens = await asyncio.to_thread(image_tokens, processed["paths"])
+        
+        # Fall back to the file extension when the image was passed through untouched
+        mime_type = processed["mime_type"]
+        if mime_type is None:
             image_format = image_path.split('.')[-1].lower()
             mime_type = f"image/{image_format}" if image_format != "jpg" else "image/jpeg"
-            
-            # Enhanced prompt that maintains conversation context
-            analysis_instruction = f"""🎯 ANALYSIS REQUEST:
+        
+        parts = []
+        for path in processed["paths"]:
+            parts.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{mime_type};base64,{await self.encode_image(path)}",
+                    "detail": "high"  # Image is already sized to the high-detail resolution
+                }
+            })
+        
+        stats = {
+            "original_bytes": processed["original_bytes"],
+            "processed_bytes": processed["processed_bytes"],
+            "tiles": processed["tiles"],
+            "preprocessed": processed["preprocessed"],
+            "passthrough": processed.get("passthrough"),
+            "image_tokens": tokens
+        }
+        return parts, stats
+    
+    def estimate_request_tokens(self, messages: list, image_tokens: int = 0) -> int:
+        """
+        Tokens a request counts against the TPM quota: prompt text, image tiles and
+        the completion budget (the API reserves max_tokens up front)
+        """
+        text = []
+        for message in messages:
+            if isinstance(message.content, str):
+                text.append(message.content)
+            else:
+                text.extend(part["text"] for part in message.content if part.get("type") == "text")
+        return estimate_tokens("\n".join(text)) + image_tokens + self.max_tokens
+    
+    def error_result(self, error: Exception) -> Dict[str, Any]:
+        """
+        Failed analysis; rate-limit exhaustion is flagged so callers can ask clients to retry later,
+        and unreadable uploads so they are reported as the client's error rather than the model's
+        """
+        result = {
+            "answer": f"Error analyzing blueprint: {str(error)}",
+            "confidence": "error",
+            "model": self.model_name
+        }
+        if is_rate_limit_error(error):
+            result["rate_limited"] = True
+        elif isinstance(error, InvalidImageError):
+            result["invalid_input"] = True
+        return result
+    
+    def build_messages(self, question: str, image_parts: list, context: Optional[str] = None) -> list:
+        """
+        Build the system + user messages for a vision request
+        """
+        # Server-side conversation memory (prior analysis, summary, recent turns)
+        context_block = f"""📚 CONVERSATION CONTEXT:
+{context}
+
+""" if context else ""
+        
+        # Enhanced prompt that maintains conversation context
+        analysis_instruction = f"""{context_block}🎯 ANALYSIS REQUEST:
 {question}
 
 📋 INSTRUCTION:
@@ -113,164 +314,471 @@ For follow-up questions:
 - Include actionable insights when needed
 
 Analyze this blueprint with the precision expected by CBRE's Fortune 500 clients."""
+        
+        # Create enhanced message with detailed instructions
+        messages = [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(
+                content=[
+                    {
+                        "type": "text",
+                        "text": analysis_instruction
+                    },
+                    *image_parts
+                ]
+            )
+        ]
+        
+        return messages
+    
+    async def prepare_request(
+        self,
+        image_path: str,
+        question: str,
+        image_hash: Optional[str] = None,
+        context: Optional[str] = None,
+        image_content: Optional[tuple] = None
+    ) -> Dict[str, Any]:
+        """
+        Hash the image, check the result cache and build the model request
+        Callers that already know the content hash (stored blueprints) skip reading the file;
+        image_content (from build_image_content) lets several requests share one encoded image
+        Returns the cache key plus either a cached result or the messages to send
+        """
+        if image_hash is None:
+            image_hash = await asyncio.to_thread(hash_file, image_path)
+        cache_key = self.cache.make_key(
+            image_hash, f"{context}\n{question}" if context else question, self.model_name, self.temperature
+        )
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return {"cache_key": cache_key, "cached": cached}
+        
+        # Preprocess and encode the image
+        if image_content is None:
+            image_content = await self.build_image_content(image_path, image_hash)
+        image_parts, preprocessing = image_content
+        return {
+            "cache_key": cache_key,
+            "cached": None,
+            "messages": self.build_messages(question, image_parts, context),
+            "preprocessing": preprocessing
+        }
+    
+    def route_question(self, question: str, context: Optional[str]) -> str:
+        """
+        Decide whether a question needs the image ("vision") or can be answered
+        from the stored analysis and conversation context ("text")
+        """
+        if not self.text_routing or not context:
+            return "vision"
+        
+        lowered = question.lower()
+        if any(cue in lowered for cue in VISION_CUES):
+            return "vision"
+        
+        # Most of the question's topic words must already appear in the context
+        terms = [word for word in re.findall(r"[a-z]{4,}", lowered) if word not in ROUTER_STOPWORDS]
+        if not terms:
+            return "vision"
+        
+        context_lower = context.lower()
+        hits = sum(1 for term in terms if term.rstrip("s") in context_lower)
+        return "text" if hits / len(terms) >= self.text_routing_threshold else "vision"
+    
+    def build_text_messages(self, question: str, context: str) -> list:
+        """
+        Build a text-only request that answers from prior analysis (no image attached)
+        """
+        instruction = f"""📚 PRIOR ANALYSIS AND CONVERSATION:
+{context}
+
+🎯 FOLLOW-UP QUESTION:
+{question}
+
+📋 INSTRUCTION:
+Answer ONLY from the prior analysis and conversation above. Be concise but complete, keep exact
+numbers and dimensions, and reference the earlier findings.
+If the information needed is not present above, reply with exactly {NEED_IMAGE_SENTINEL} and nothing else."""
+        
+        return [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=instruction)
+        ]
+    
+    def text_cache_key(self, question: str, context: str, image_hash: Optional[str]) -> str:
+        return self.cache.make_key(
+            image_hash or "", f"text-only\n{context}\n{question}", self.model_name, self.temperature
+        )
+    
+    async def answer_from_context(
+        self,
+        question: str,
+        context: str,
+        image_hash: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Text-only fast path; returns None when the model needs the image after all
+        """
+        cache_key = self.text_cache_key(question, context, image_hash)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+        
+        messages = self.build_text_messages(question, context)
+        response = await self.scheduler.invoke(self.llm, messages, self.estimate_request_tokens(messages))
+        
+        if response.content.strip().startswith(NEED_IMAGE_SENTINEL):
+            return None
+        
+        result = {
+            "answer": response.content,
+            "confidence": "high",
+            "model": self.model_name,
+            "route": "text"
+        }
+        await self.cache.set(cache_key, result)
+        return {**result, "cached": False}
+    
+    async def analyze_blueprint(
+        self,
+        image_path: str,
+        question: str,
+        image_hash: Optional[str] = None,
+        context: Optional[str] = None,
+        image_content: Optional[tuple] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze blueprint image and answer questions with full context awareness
+        """
+        try:
+            # Cheap text-only path when the prior analysis already covers the question
+            if self.route_question(question, context) == "text":
+                result = await self.answer_from_context(question, context, image_hash)
+                if result is not None:
+                    return result
             
-            # Create enhanced message with detailed instructions
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(
-                    content=[
-                        {
-                            "type": "text",
-                            "text": analysis_instruction
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{base64_image}",
-                                "detail": "high"  # Request high-detail analysis
-                            }
-                        }
-                    ]
-                )
-            ]
+            # Serve repeated (image, question) pairs from the cache
+            request = await self.prepare_request(image_path, question, image_hash, context, image_content)
+            if request["cached"] is not None:
+                return {**request["cached"], "cached": True}
             
-            # Get response from OpenAI
-            response = self.llm.invoke(messages)
+            # Get response from OpenAI (async, paced and retried by the scheduler)
+            response = await self.scheduler.invoke(
+                self.llm, request["messages"], self.estimate_request_tokens(request["messages"], request["preprocessing"]["image_tokens"])
+            )
             
-            return {
+            result = {
                 "answer": response.content,
                 "confidence": "high",
-                "model": self.model_name
+                "model": self.model_name,
+                "preprocessing": request["preprocessing"],
+                "route": "vision"
             }
+            await self.cache.set(request["cache_key"], result)
+            
+            return {**result, "cached": False}
         
         except Exception as e:
-            return {
-                "answer": f"Error analyzing blueprint: {str(e)}",
-                "confidence": "error",
-                "model": self.model_name
+            return self.error_result(e)
+    
+    async def stream_blueprint(
+        self,
+        image_path: str,
+        question: str,
+        image_hash: Optional[str] = None,
+        context: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of analyze_blueprint
+        Yields {"type": "token"} events as text arrives, then a final {"type": "done"} event
+        """
+        try:
+            if self.route_question(question, context) == "text":
+                text_stream = self.stream_from_context(question, context, image_hash)
+                escalate = False
+                async for event in text_stream:
+                    if event is None:
+                        escalate = True  # Model asked for the image; fall through to the vision path
+                        break
+                    yield event
+                await text_stream.aclose()
+                if not escalate:
+                    return
+            
+            request = await self.prepare_request(image_path, question, image_hash, context)
+            if request["cached"] is not None:
+                yield {"type": "token", "text": request["cached"]["answer"]}
+                yield {"type": "done", **request["cached"], "cached": True}
+                return
+            
+            chunks = []
+            tokens = self.estimate_request_tokens(request["messages"], request["preprocessing"]["image_tokens"])
+            model_stream = self.scheduler.stream(self.llm, request["messages"], tokens)
+            try:
+                async for chunk in model_stream:
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        yield {"type": "token", "text": chunk.content}
+            finally:
+                await model_stream.aclose()
+            
+            result = {
+                "answer": "".join(chunks),
+                "confidence": "high",
+                "model": self.model_name,
+                "preprocessing": request["preprocessing"],
+                "route": "vision"
             }
+            await self.cache.set(request["cache_key"], result)
+            
+            yield {"type": "done", **result, "cached": False}
+        
+        except Exception as e:
+            yield {"type": "error", **self.error_result(e)}
+    
+    async def stream_from_context(
+        self,
+        question: str,
+        context: str,
+        image_hash: Optional[str] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Streaming text-only fast path
+        Output is held back until it cannot be the NEED_IMAGE sentinel; yields None to request escalation
+        """
+        cache_key = self.text_cache_key(question, context, image_hash)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            yield {"type": "token", "text": cached["answer"]}
+            yield {"type": "done", **cached, "cached": True}
+            return
+        
+        chunks = []
+        released = False
+        messages = self.build_text_messages(question, context)
+        # Closed explicitly so an early return releases the scheduler slot right away
+        model_stream = self.scheduler.stream(self.llm, messages, self.estimate_request_tokens(messages))
+        try:
+            async for chunk in model_stream:
+                if not chunk.content:
+                    continue
+                chunks.append(chunk.content)
+                if released:
+                    yield {"type": "token", "text": chunk.content}
+                    continue
+                
+                buffered = "".join(chunks).lstrip()
+                if len(buffered) < len(NEED_IMAGE_SENTINEL) and NEED_IMAGE_SENTINEL.startswith(buffered):
+                    continue
+                if buffered.startswith(NEED_IMAGE_SENTINEL):
+                    yield None
+                    return
+                released = True
+                yield {"type": "token", "text": "".join(chunks)}
+        finally:
+            await model_stream.aclose()
+        
+        answer = "".join(chunks)
+        if answer.strip().startswith(NEED_IMAGE_SENTINEL) or not answer.strip():
+            yield None
+            return
+        if not released:
+            yield {"type": "token", "text": answer}
+        
+        result = {
+            "answer": answer,
+            "confidence": "high",
+            "model": self.model_name,
+            "route": "text"
+        }
+        await self.cache.set(cache_key, result)
+        yield {"type": "done", **result, "cached": False}
     
-    async def get_comprehensive_analysis(self, image_path: str) -> Dict[str, Any]:
+    async def summarize_conversation(self, transcript: str) -> str:
+        """
+        Condense older conversation turns into a short text summary (no image)
+        """
+        messages = [
+            SystemMessage(content="You summarize conversations about an architectural blueprint. Keep every number, room name, dimension and conclusion; drop pleasantries."),
+            HumanMessage(content=f"Summarize this conversation in at most 200 words:\n\n{transcript}")
+        ]
+        response = await self.scheduler.invoke(self.llm, messages, self.estimate_request_tokens(messages))
+        return response.content
+    
+    async def get_comprehensive_analysis(
+        self,
+        image_path: str,
+        image_hash: Optional[str] = None,
+        parallel: Optional[bool] = None
+    ) -> Dict[str, Any]:
         """
         Automatic comprehensive analysis when blueprint is first uploaded
         Provides complete details of all rooms, dimensions, and features
+        With parallel sections enabled the report is assembled from concurrent sub-requests
         """
-        question = """Please provide a COMPLETE and DETAILED analysis of this blueprint including:
-
-**1. PROPERTY OVERVIEW**
-   - Property type (residential, commercial, office, etc.)
-   - Total floor area in square feet
-   - Number of floors/levels shown
-   - Building shape and orientation
-
-**2. COMPLETE ROOM INVENTORY** (Count and list EVERY room with individual dimensions)
-   - Bedrooms: Count each bedroom and provide dimensions (length × width in feet)
-   - Bathrooms: Specify full bath, half bath, etc. with dimensions
-   - Kitchen(s): Dimensions and layout type (L-shaped, galley, etc.)
-   - Living Areas: Living room, family room, etc. with dimensions
-   - Dining Areas: Formal dining, breakfast nook, etc. with dimensions
-   - Utility Rooms: Laundry, mechanical room, storage with dimensions
-   - Other Spaces: Home office, den, closets, hallways, foyer, etc. with dimensions
-   - Outdoor Spaces: Patios, balconies, terraces if visible
-
-**3. DETAILED DIMENSIONS**
-   - Overall building dimensions (total length × width)
-   - Individual room dimensions for EACH space identified above
-   - Ceiling heights (if marked on blueprint)
-   - Wall thickness measurements
-   - Door widths and types (single, double, sliding, etc.)
-   - Window dimensions and quantities
-
-**4. ARCHITECTURAL FEATURES & ELEMENTS**
-   - Main entry and all secondary entrances
-   - Total number of doors (interior and exterior)
-   - Total number of windows with placement
-   - Stairs: Location, type, number of steps if visible
-   - Elevators or lifts (if present)
-   - Built-in features: Closets, cabinets, shelving
-   - Fireplaces or special features
-   - Structural elements: Columns, beams, load-bearing walls
-
-**5. BUILDING SYSTEMS** (if visible on blueprint)
-   - HVAC: Furnace location, AC units, vents, ductwork
-   - Electrical: Panel locations, outlet placements, light fixtures
-   - Plumbing: Fixtures in all bathrooms and kitchen, water heater location
-   - Fire Safety: Smoke detectors, fire extinguishers, sprinkler systems
-   - Special systems: Security, smart home features
-
-**6. ACCESSIBILITY & CODE COMPLIANCE**
-   - ADA accessibility features (ramps, wide doorways, etc.)
-   - Emergency exits and egress routes
-   - Handrails and grab bars
-   - Code compliance observations
-   - Safety features noted
-
-**7. LAYOUT & CIRCULATION ASSESSMENT**
-   - Traffic flow patterns and efficiency
-   - Room adjacencies and relationships
-   - Privacy zones (public vs private spaces)
-   - Natural light and ventilation opportunities
-   - Space utilization efficiency
-   - Potential bottlenecks or circulation issues
-
-**8. PROFESSIONAL OBSERVATIONS**
-   - Strengths of the design
-   - Potential concerns or limitations
-   - Suggestions for optimization
-   - Unique or notable design elements
-   - Market appeal considerations
-
-IMPORTANT: 
-- Provide EXACT counts for all rooms
-- Give SPECIFIC dimensions in feet and inches where visible
-- Calculate total square footage
-- Be thorough and leave nothing out
-- Use clear formatting with bullet points
-- If any measurement is not visible, state "Not marked on blueprint"
-"""
+        if not (self.parallel_sections if parallel is None else parallel):
+            return await self.analyze_blueprint(image_path, COMPREHENSIVE_ANALYSIS_QUESTION, image_hash)
         
-        return await self.analyze_blueprint(image_path, question)
+        result = None
+        async for event in self.stream_sections(image_path, image_hash):
+            if event["type"] in ("done", "error"):
+                result = {key: value for key, value in event.items() if key != "type"}
+        return result
     
-    def extract_measurements(self, text: str) -> Dict[str, Any]:
+    async def stream_comprehensive_analysis(
+        self,
+        image_path: str,
+        image_hash: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming variant of get_comprehensive_analysis (same events as stream_blueprint)"""
+        if self.parallel_sections:
+            events = self.stream_sections(image_path, image_hash)
+        else:
+            events = self.stream_blueprint(image_path, COMPREHENSIVE_ANALYSIS_QUESTION, image_hash)
+        async for event in events:
+            yield event
+    
+    async def stream_sections(
+        self,
+        image_path: str,
+        image_hash: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Extract measurements and numerical data from analysis
+        Run every comprehensive-analysis section as a concurrent sub-request against one
+        preprocessed image; sections are emitted in report order as soon as they (and
+        the ones before them) finish, so wall-clock time is roughly the slowest section
         """
-        measurements = {
-            "rooms": [],
-            "dimensions": {},
-            "total_area": None,
-            "features": []
-        }
+        tasks = []
+        try:
+            if image_hash is None:
+                image_hash = await asyncio.to_thread(hash_file, image_path)
+            report_key = self.cache.make_key(
+                image_hash, f"sections\n{COMPREHENSIVE_ANALYSIS_QUESTION}", self.model_name, self.temperature
+            )
+            cached = await self.cache.get(report_key)
+            if cached is not None:
+                yield {"type": "token", "text": cached["answer"]}
+                yield {"type": "done", **cached, "cached": True}
+                return
+            
+            image_content = await self.build_image_content(image_path, image_hash)
+            
+            async def run_section(key: str, section: str) -> Dict[str, Any]:
+                started = time.monotonic()
+                analysis = await self.analyze_blueprint(
+                    image_path, section_question(key, section), image_hash, image_content=image_content
+                )
+                return {**analysis, "latency_s": round(time.monotonic() - started, 3)}
+            
+            tasks = [asyncio.create_task(run_section(key, section)) for key, section in COMPREHENSIVE_SECTIONS]
+            
+            parts, sections = [], {}
+            for (key, section), task in zip(COMPREHENSIVE_SECTIONS, tasks):
+                analysis = await task
+                succeeded = analysis.get("confidence") != "error"
+                title = section.split("**")[1]
+                body = analysis["answer"] if succeeded else f"_Section unavailable: {analysis['answer']}_"
+                text = f"### {title}\n\n{body}"
+                parts.append(text)
+                sections[key] = {
+                    "success": succeeded,
+                    "cached": analysis.get("cached", False),
+                    "rate_limited": analysis.get("rate_limited", False),
+                    "latency_s": analysis["latency_s"]
+                }
+                yield {"type": "token", "text": text + "\n\n"}
+            
+            succeeded = sum(1 for section in sections.values() if section["success"])
+            result = {
+                "answer": "\n\n".join(parts),
+                "confidence": "high" if succeeded == len(sections) else ("partial" if succeeded else "error"),
+                "model": self.model_name,
+                "preprocessing": image_content[1],
+                "route": "vision",
+                "sections": sections
+            }
+            if not succeeded and any(section["rate_limited"] for section in sections.values()):
+                result["rate_limited"] = True
+            if result["confidence"] == "high":
+                await self.cache.set(report_key, result)
+            
+            yield {"type": "done" if succeeded else "error", **result, "cached": False}
+        
+        except Exception as e:
+            yield {"type": "error", **self.error_result(e)}
+        
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def extract_structure(self, image_path: str, image_hash: Optional[str] = None) -> BlueprintStructure:
+        """
+        Extract rooms, dimensions, areas, doors and windows as validated JSON
+        Runs the model once per blueprint; later calls are served from the structure store
+        """
+        if image_hash is None:
+            image_hash = await asyncio.to_thread(hash_file, image_path)
+        
+        # One extraction per image at a time; the lock is dropped once done so the map stays small
+        lock = self._extraction_locks.setdefault(image_hash, asyncio.Lock())
+        try:
+            async with lock:
+                return await self._extract_structure(image_path, image_hash)
+        finally:
+            self._extraction_locks.pop(image_hash, None)
+    
+    async def _extract_structure(self, image_path: str, image_hash: str) -> BlueprintStructure:
+        structure = await self.structures.get(image_hash, self.model_name)
+        if structure is not None:
+            return structure
+        
+        image_parts, preprocessing = await self.build_image_content(image_path, image_hash)
+        schema = json.dumps(BlueprintStructure.model_json_schema())
+        messages = [
+            SystemMessage(content="You are an architectural plan reader. You output only JSON that matches the given schema."),
+            HumanMessage(
+                content=[
+                    {
+                        "type": "text",
+                        "text": f"""Extract every room, door and window from this blueprint as a JSON object matching this JSON schema:
+{schema}
+
+Rules:
+- List EVERY room individually; use the label written on the plan as "name"
+- Dimensions in decimal feet (12'6" = 12.5); omit values that are not marked
+- Group identical doors/windows in the same room into one entry with "count"
+- Do not invent measurements"""
+                    },
+                    *image_parts
+                ]
+            )
+        ]
+        
+        response = await self.scheduler.invoke(
+            self.llm.bind(response_format={"type": "json_object"}),
+            messages,
+            self.estimate_request_tokens(messages, preprocessing["image_tokens"])
+        )
         
-        # This is a simple parser - can be enhanced with regex
-        lines = text.split('\n')
-        for line in lines:
-            if 'room' in line.lower() or 'bedroom' in line.lower() or 'bathroom' in line.lower():
-                measurements["rooms"].append(line.strip())
-            elif 'sq ft' in line.lower() or 'square feet' in line.lower():
-                measurements["total_area"] = line.strip()
-            elif any(word in line.lower() for word in ['width', 'length', 'dimension']):
-                measurements["dimensions"][line.split(':')[0].strip()] = line.split(':')[1].strip() if ':' in line else line
-        
-        return measurements
+        structure = BlueprintStructure.model_validate_json(response.content)
+        await self.structures.set(image_hash, self.model_name, structure)
+        return structure
     
-    async def get_room_count(self, image_path: str) -> Dict[str, Any]:
+    async def get_room_count(self, image_path: str, image_hash: Optional[str] = None) -> Dict[str, Any]:
         """
         Specialized method to count rooms
         """
-        question = "How many rooms are there in this blueprint? List each room type and count them separately (bedrooms, bathrooms, kitchen, living areas, etc.)"
-        return await self.analyze_blueprint(image_path, question)
+        return await self.analyze_blueprint(image_path, ROOM_COUNT_QUESTION, image_hash)
     
-    async def get_dimensions(self, image_path: str) -> Dict[str, Any]:
+    async def get_dimensions(self, image_path: str, image_hash: Optional[str] = None) -> Dict[str, Any]:
         """
         Specialized method to get dimensions
         """
-        question = "What are the dimensions of this blueprint? Provide width, length, and total square footage. Also provide dimensions for individual rooms if visible."
-        return await self.analyze_blueprint(image_path, question)
+        return await self.analyze_blueprint(image_path, DIMENSIONS_QUESTION, image_hash)
     
-    async def get_features(self, image_path: str) -> Dict[str, Any]:
+    async def get_features(self, image_path: str, image_hash: Optional[str] = None) -> Dict[str, Any]:
         """
         Specialized method to identify features
         """
-        question = "What are all the notable features in this blueprint? Include doors, windows, stairs, elevators, HVAC systems, electrical outlets, plumbing fixtures, and any special architectural elements."
-        return await self.analyze_blueprint(image_path, question)
\ No newline at end of file
+        return await self.analyze_blueprint(image_path, FEATURES_QUESTION, image_hash)
@@ -0,0 +1,132 @@
+#backend/analysis_cache.py
+import os
+import json
+import time
+import hashlib
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from sqlite_store import open_sqlite
+
+
+class AnalysisCache:
+    """
+    Two-tier (memory LRU + SQLite) cache for blueprint analysis results
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("ANALYSIS_CACHE_PATH", os.path.join("cache", "analysis_cache.db"))
+        self.memory_size = int(os.getenv("ANALYSIS_CACHE_MEMORY_SIZE", 256))
+        self.disk_size = int(os.getenv("ANALYSIS_CACHE_DISK_SIZE", 10000))
+        self.ttl = int(os.getenv("ANALYSIS_CACHE_TTL", 7 * 24 * 3600))
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+
+        self._conn, self._lock = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON analysis_cache(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Collapse case and whitespace so trivially different prompts share an entry"""
+        return " ".join(question.lower().split())
+
+    def make_key(self, image_hash: str, question: str, model: str, temperature: float) -> str:
+        """Build the cache key from image hash, normalized question, model and temperature"""
+        raw = "\x1f".join([image_hash, self.normalize_question(question), model, f"{temperature:.3f}"])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self.stats["evictions"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            self.stats["disk_hits"] += 1
+            return value
+
+    def _set(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+
+            # Drop expired rows, then trim least-recently-used rows over the size budget
+            expired = self._conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl,)
+            ).rowcount
+            overflow = self._conn.execute(
+                """DELETE FROM analysis_cache WHERE key IN (
+                    SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.disk_size,)
+            ).rowcount
+            self._conn.commit()
+            self.stats["writes"] += 1
+            self.stats["evictions"] += max(expired, 0) + max(overflow, 0)
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached result, checking memory before disk"""
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        """Store a result in both tiers"""
+        await asyncio.to_thread(self._set, key, value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and tier sizes"""
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries
+            }
@@ -0,0 +1,220 @@
+#backend/batch_processor.py
+import os
+import time
+import uuid
+import asyncio
+import zipfile
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+from upload_stream import CHUNK_SIZE, UploadTooLargeError, limit_chunks, save_upload
+
+SHEET_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "bmp", "tiff", "tif", "webp", "pdf"}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class BatchProcessor:
+    """
+    Fan a plan set out to the analyzer with bounded concurrency
+    Per-sheet results are yielded as they complete, followed by a job summary
+    Rate limits and retries are left to the analyzer's call scheduler, which
+    paces every model call in the process against the same quota
+    """
+
+    def __init__(self, analyzer, blob_store, page_renderer):
+        self.analyzer = analyzer
+        self.blob_store = blob_store
+        self.page_renderer = page_renderer
+        self.max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", 8))
+        self.max_sheets = int(os.getenv("BATCH_MAX_SHEETS", 500))
+        # Decompressed bytes allowed across all archives of one batch (zip-bomb guard)
+        self.max_unpacked_bytes = int(os.getenv("BATCH_MAX_UNPACKED_MB", 1024)) * 1024 * 1024
+
+    @staticmethod
+    def _zip_members(archive_path: str) -> List[zipfile.ZipInfo]:
+        with zipfile.ZipFile(archive_path) as archive:
+            members = []
+            for info in sorted(archive.infolist(), key=lambda item: item.filename):
+                name = os.path.basename(info.filename)
+                if info.is_dir() or name.startswith(".") or "." not in name:
+                    continue
+                if name.rsplit(".", 1)[-1].lower() in SHEET_EXTENSIONS:
+                    members.append(info)
+            return members
+
+    async def _limit_unpacked(self, chunks: AsyncIterator[bytes], budget: Dict[str, int]) -> AsyncIterator[bytes]:
+        """
+        Enforce the per-file upload limit on a decompressed member and the per-batch
+        total; sizes declared in the archive are not trusted, bytes are counted as they arrive
+        """
+        async for chunk in limit_chunks(chunks, self.blob_store.max_upload_bytes):
+            budget["unpacked"] += len(chunk)
+            if budget["unpacked"] > self.max_unpacked_bytes:
+                raise UploadTooLargeError(self.max_unpacked_bytes)
+            yield chunk
+
+    @staticmethod
+    async def _iter_member(archive: zipfile.ZipFile, member: str) -> AsyncIterator[bytes]:
+        """Decompress one archive member chunk by chunk off the event loop"""
+        handle = await asyncio.to_thread(archive.open, member)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(handle.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            handle.close()
+
+    async def _ingest_zip(self, upload, limit: int, budget: Dict[str, int]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Spool a zip upload to disk and stream each sheet into the blob store"""
+        archive_path = os.path.join(self.blob_store.root, f".batch_{uuid.uuid4().hex}.zip")
+        sheets = []
+        try:
+            await save_upload(upload, archive_path, self.blob_store.max_upload_bytes)
+            members = (await asyncio.to_thread(self._zip_members, archive_path))[:limit]
+            archive = await asyncio.to_thread(zipfile.ZipFile, archive_path)
+            try:
+                for member in members:
+                    # Cheap early rejection; the streamed count below is what actually enforces it
+                    if member.file_size > self.blob_store.max_upload_bytes:
+                        raise UploadTooLargeError(self.blob_store.max_upload_bytes)
+                    name = os.path.basename(member.filename)
+                    chunks = self._limit_unpacked(self._iter_member(archive, member.filename), budget)
+                    sheets.append((name, await self.blob_store.put_chunks(chunks, name)))
+            finally:
+                archive.close()
+        finally:
+            if os.path.exists(archive_path):
+                os.remove(archive_path)
+        return sheets
+
+    async def _expand_pages(self, files: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any], Optional[int]]]:
+        """One sheet per page of multi-page PDF/TIFF files; single images keep page None"""
+        sheets = []
+        for filename, blob in files:
+            if len(sheets) >= self.max_sheets:
+                break
+            if not self.page_renderer.is_multi_page(blob["path"]):
+                sheets.append((filename, blob, None))
+                continue
+            try:
+                count = await self.page_renderer.page_count(blob["path"], blob["content_hash"])
+            except Exception as e:
+                raise ValueError(f"Cannot read pages of '{filename}': {e}")
+            sheets.extend((filename, blob, page) for page in range(1, count + 1))
+        return sheets[:self.max_sheets]
+
+    async def ingest(self, uploads: list) -> List[Tuple[str, Dict[str, Any], Optional[int]]]:
+        """
+        Store every uploaded file (zip archives are expanded) without buffering whole files
+        Returns (filename, blob metadata, page) sheets, multi-page files split into pages, capped at max_sheets
+        """
+        files = []
+        budget = {"unpacked": 0}
+        for upload in uploads:
+            remaining = self.max_sheets - len(files)
+            if remaining <= 0:
+                break
+            if upload.filename and upload.filename.lower().endswith(".zip"):
+                files.extend(await self._ingest_zip(upload, remaining, budget))
+            else:
+                files.append((upload.filename, await self.blob_store.put_upload(upload)))
+        return await self._expand_pages(files)
+
+    async def _analyze_sheet(
+        self,
+        index: int,
+        filename: str,
+        blob: Dict[str, Any],
+        page: Optional[int],
+        question: Optional[str],
+        semaphore: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        sheet = {
+            "type": "sheet",
+            "index": index,
+            "filename": filename,
+            "page": page,
+            "blueprint_id": blob["blueprint_id"],
+            "deduplicated": blob["deduplicated"]
+        }
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                # PDF/TIFF pages are rasterized on demand; the analyzer only ever sees images
+                image = await self.page_renderer.resolve(blob, page)
+                if question:
+                    analysis = await self.analyzer.analyze_blueprint(image["path"], question, image["image_hash"])
+                else:
+                    analysis = await self.analyzer.get_comprehensive_analysis(image["path"], image["image_hash"])
+            except Exception as e:
+                # e.g. a page that cannot be rendered or a blob evicted mid-batch
+                return {**sheet, "success": False, "analysis": f"Sheet failed: {str(e)}", "cached": False, "rate_limited": False, "latency_s": round(time.monotonic() - started, 3)}
+
+            return {
+                **sheet,
+                "success": analysis.get("confidence") != "error",
+                "analysis": analysis["answer"],
+                "cached": analysis.get("cached", False),
+                "rate_limited": analysis.get("rate_limited", False),
+                "latency_s": round(time.monotonic() - started, 3)
+            }
+
+    async def run(
+        self,
+        sheets: List[Tuple[str, Dict[str, Any], Optional[int]]],
+        question: Optional[str] = None,
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze every stored sheet (see ingest), yielding {"type": "start"}, one {"type": "sheet"} per
+        completed sheet (completion order) and a final {"type": "summary"}
+        """
+        job_id = uuid.uuid4().hex
+        limit = max(1, min(concurrency or self.max_concurrency, self.max_concurrency))
+        semaphore = asyncio.Semaphore(limit)
+        started = time.monotonic()
+
+        yield {"type": "start", "job_id": job_id, "sheets": len(sheets), "concurrency": limit}
+
+        tasks = [
+            asyncio.create_task(self._analyze_sheet(index, filename, blob, page, question, semaphore))
+            for index, (filename, blob, page) in enumerate(sheets)
+        ]
+
+        results = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                results.append(result)
+                yield result
+        finally:
+            # Client went away: stop the remaining work
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.monotonic() - started
+        latencies = [result["latency_s"] for result in results if result.get("latency_s") is not None]
+        succeeded = sum(1 for result in results if result["success"])
+        yield {
+            "type": "summary",
+            "job_id": job_id,
+            "sheets": len(sheets),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "cached": sum(1 for result in results if result.get("cached")),
+            "deduplicated": sum(1 for result in results if result.get("deduplicated")),
+            "rate_limited": sum(1 for result in results if result.get("rate_limited")),
+            "concurrency": limit,
+            "elapsed_s": round(elapsed, 3),
+            "sheets_per_minute": round(len(results) / elapsed * 60, 2) if elapsed > 0 else None,
+            "latency_p50_s": percentile(latencies, 50),
+            "latency_p95_s": percentile(latencies, 95),
+            "latency_max_s": max(latencies) if latencies else None
+        }
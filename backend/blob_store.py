@@ -0,0 +1,120 @@
+#backend/blob_store.py
+import os
+import uuid
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, Optional, AsyncIterator
+from blueprint_registry import BlueprintRegistry
+from upload_stream import iter_upload, save_chunks
+
+
+class BlobStore:
+    """
+    Content-addressed storage for uploaded blueprints
+    Identical uploads resolve to the same file and blueprint ID
+    """
+
+    def __init__(self, root: str, registry: Optional[BlueprintRegistry] = None):
+        self.root = root
+        # Explicit None check: an empty registry is falsy (it defines __len__)
+        self.registry = registry if registry is not None else BlueprintRegistry()
+        self.max_upload_bytes = int(os.getenv("MAX_UPLOAD_MB", 50)) * 1024 * 1024
+        self._lock = asyncio.Lock()
+
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def _extension(filename: Optional[str]) -> str:
+        # Client-supplied names never reach the path beyond a short alphanumeric extension
+        if filename and "." in filename:
+            extension = filename.rsplit(".", 1)[-1].lower()
+            if extension.isalnum() and len(extension) <= 8:
+                return extension
+        return "bin"
+
+    async def _register(
+        self,
+        blob_hash: str,
+        filename: Optional[str],
+        size: int,
+        temp_path: str
+    ) -> Dict[str, Any]:
+        """
+        Deduplicate against the registry, then move the staged blob into place
+        Must be called with self._lock held
+        """
+        meta = self.registry.get(blob_hash)
+        if meta is not None and os.path.exists(meta["path"]):
+            await asyncio.to_thread(os.remove, temp_path)
+            meta = await asyncio.to_thread(
+                self.registry.update,
+                blob_hash,
+                ref_count=meta["ref_count"] + 1,
+                last_used=datetime.now().isoformat()
+            )
+            return {**meta, "deduplicated": True}
+
+        extension = self._extension(filename)
+        path = os.path.join(self.root, f"blueprint_{blob_hash}.{extension}")
+        os.replace(temp_path, path)
+
+        meta = await asyncio.to_thread(self.registry.add, {
+            "blueprint_id": blob_hash,
+            "path": path,
+            "content_hash": blob_hash,
+            "size": size,
+            "filename": filename,
+            "ref_count": 1
+        })
+        return {**meta, "deduplicated": False}
+
+    async def put_chunks(self, chunks: AsyncIterator[bytes], filename: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store a blueprint from a stream of chunks, hashing while it is written to a temp file
+        Peak memory is one chunk regardless of file size
+        """
+        temp_path = os.path.join(self.root, f".staged_{uuid.uuid4().hex}")
+        saved = await save_chunks(chunks, temp_path)
+
+        async with self._lock:
+            return await self._register(saved["content_hash"], filename, saved["size"], temp_path)
+
+    async def put_upload(self, upload, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """Stream an UploadFile into the store (413-style limit via UploadTooLargeError)"""
+        return await self.put_chunks(iter_upload(upload, max_bytes or self.max_upload_bytes), upload.filename)
+
+    def get(self, blueprint_id: str) -> Optional[Dict[str, Any]]:
+        """Return metadata for a stored blueprint, or None"""
+        return self.registry.get(blueprint_id)
+
+    async def release(self, blueprint_id: str) -> bool:
+        """
+        Drop one reference; the blob is deleted once no references remain
+        Returns True if the file was removed
+        """
+        async with self._lock:
+            meta = self.registry.get(blueprint_id)
+            if meta is None:
+                return False
+
+            if meta["ref_count"] > 1:
+                await asyncio.to_thread(self.registry.update, blueprint_id, ref_count=meta["ref_count"] - 1)
+                return False
+
+            await asyncio.to_thread(self.registry.remove, blueprint_id)
+            if os.path.exists(meta["path"]):
+                await asyncio.to_thread(os.remove, meta["path"])
+            return True
+
+    async def evict(self, blueprint_id: str) -> bool:
+        """
+        Remove a blob regardless of its reference count (retention eviction)
+        Returns True if it was indexed
+        """
+        async with self._lock:
+            meta = await asyncio.to_thread(self.registry.remove, blueprint_id)
+            if meta is None:
+                return False
+            if os.path.exists(meta["path"]):
+                await asyncio.to_thread(os.remove, meta["path"])
+            return True
@@ -0,0 +1,171 @@
+#backend/blueprint_registry.py
+import os
+import hashlib
+import mimetypes
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from sqlite_store import open_sqlite
+
+
+class BlueprintRegistry:
+    """
+    Persistent blueprint index (SQLite) with an in-process dict for O(1) lookups
+    The dict is rebuilt from SQLite at startup; every write goes to both
+    """
+
+    FIELDS = ("blueprint_id", "path", "content_hash", "mime_type", "size", "filename", "ref_count", "created_at", "last_used")
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("BLUEPRINT_REGISTRY_PATH", os.path.join("cache", "blueprints.db"))
+
+        self._conn, self._lock = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS blueprints (
+                blueprint_id TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                mime_type TEXT,
+                size INTEGER NOT NULL,
+                filename TEXT,
+                ref_count INTEGER NOT NULL DEFAULT 1,
+                created_at TEXT NOT NULL,
+                last_used TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_blueprints_hash ON blueprints(content_hash)")
+        self._conn.commit()
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._touched: Dict[str, str] = {}
+        self._load()
+
+    def _load(self):
+        rows = self._conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM blueprints").fetchall()
+        self._entries = {row[0]: dict(zip(self.FIELDS, row)) for row in rows}
+
+    @staticmethod
+    def guess_mime_type(path: str) -> Optional[str]:
+        return mimetypes.guess_type(path)[0]
+
+    def get(self, blueprint_id: str) -> Optional[Dict[str, Any]]:
+        """Constant-time lookup by blueprint ID"""
+        return self._entries.get(blueprint_id)
+
+    def add(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or replace an entry"""
+        record = {field: entry.get(field) for field in self.FIELDS}
+        if record["mime_type"] is None:
+            record["mime_type"] = self.guess_mime_type(record["path"])
+        if record["ref_count"] is None:
+            record["ref_count"] = 1
+        now = datetime.now().isoformat()
+        record["created_at"] = record["created_at"] or now
+        record["last_used"] = record["last_used"] or now
+
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO blueprints ({', '.join(self.FIELDS)}) VALUES ({', '.join('?' for _ in self.FIELDS)})",
+                tuple(record[field] for field in self.FIELDS)
+            )
+            self._conn.commit()
+            self._entries[record["blueprint_id"]] = record
+        return record
+
+    def update(self, blueprint_id: str, **fields) -> Optional[Dict[str, Any]]:
+        """Update selected fields of an existing entry"""
+        fields = {key: value for key, value in fields.items() if key in self.FIELDS and key != "blueprint_id"}
+        with self._lock:
+            record = self._entries.get(blueprint_id)
+            if record is None:
+                return None
+            if fields:
+                assignments = ", ".join(f"{key} = ?" for key in fields)
+                self._conn.execute(
+                    f"UPDATE blueprints SET {assignments} WHERE blueprint_id = ?",
+                    (*fields.values(), blueprint_id)
+                )
+                self._conn.commit()
+                record.update(fields)
+        return record
+
+    def touch(self, blueprint_id: str):
+        """Mark an entry as used now (in memory; persisted by flush_touches)"""
+        record = self._entries.get(blueprint_id)
+        if record is not None:
+            record["last_used"] = datetime.now().isoformat()
+            self._touched[blueprint_id] = record["last_used"]
+
+    def flush_touches(self) -> int:
+        """Write pending last_used updates to SQLite in one transaction"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            if touched:
+                self._conn.executemany(
+                    "UPDATE blueprints SET last_used = ? WHERE blueprint_id = ?",
+                    [(last_used, blueprint_id) for blueprint_id, last_used in touched.items()]
+                )
+                self._conn.commit()
+        return len(touched)
+
+    def remove(self, blueprint_id: str) -> Optional[Dict[str, Any]]:
+        """Delete an entry, returning it if present"""
+        with self._lock:
+            record = self._entries.pop(blueprint_id, None)
+            if record is not None:
+                self._conn.execute("DELETE FROM blueprints WHERE blueprint_id = ?", (blueprint_id,))
+                self._conn.commit()
+        return record
+
+    def clear(self):
+        """Forget every entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM blueprints")
+            self._conn.commit()
+            self._entries = {}
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def prune_missing(self) -> int:
+        """Drop entries whose file no longer exists on disk"""
+        missing = [key for key, record in self._entries.items() if not os.path.exists(record["path"])]
+        for blueprint_id in missing:
+            self.remove(blueprint_id)
+        return len(missing)
+
+    def import_directory(self, directory: str) -> int:
+        """
+        One-time startup scan registering blueprint_* files that predate the registry
+        The ID is the part of the file name between "blueprint_" and the extension
+        """
+        known_paths = {record["path"] for record in self._entries.values()}
+        imported = 0
+        for filename in os.listdir(directory):
+            path = os.path.join(directory, filename)
+            if not filename.startswith("blueprint_") or path in known_paths or not os.path.isfile(path):
+                continue
+
+            blueprint_id = filename[len("blueprint_"):].rsplit(".", 1)[0]
+            if blueprint_id in self._entries:
+                continue
+
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+
+            created = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+            self.add({
+                "blueprint_id": blueprint_id,
+                "path": path,
+                "content_hash": digest.hexdigest(),
+                "size": os.path.getsize(path),
+                "filename": filename,
+                "created_at": created,
+                "last_used": created
+            })
+            imported += 1
+        return imported
@@ -0,0 +1,108 @@
+#backend/blueprint_structure.py
+import os
+import time
+import asyncio
+from collections import Counter
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, Any, Optional, List
+from sqlite_store import open_sqlite
+
+
+class Room(BaseModel):
+    """A single space on the plan"""
+    name: str = Field(description="Label as written on the plan, e.g. 'Bedroom 2'")
+    room_type: str = Field(description="Normalized type: bedroom, bathroom, kitchen, living, dining, utility, storage, office, circulation, outdoor or other")
+    length_ft: Optional[float] = Field(None, ge=0, description="Length in feet")
+    width_ft: Optional[float] = Field(None, ge=0, description="Width in feet")
+    area_sqft: Optional[float] = Field(None, ge=0, description="Floor area in square feet")
+    level: Optional[str] = Field(None, description="Floor/level the room is on, if shown")
+
+    @model_validator(mode="after")
+    def fill_area(self):
+        if self.area_sqft is None and self.length_ft and self.width_ft:
+            self.area_sqft = round(self.length_ft * self.width_ft, 1)
+        self.room_type = self.room_type.strip().lower()
+        return self
+
+
+class Opening(BaseModel):
+    """A door or window (or a group of identical ones)"""
+    opening_type: Optional[str] = Field(None, description="e.g. single, double, sliding, casement")
+    location: Optional[str] = Field(None, description="Room or wall the opening belongs to")
+    width_ft: Optional[float] = Field(None, ge=0, description="Width in feet")
+    count: int = Field(1, ge=1, description="Number of identical openings described by this entry")
+
+
+class BlueprintStructure(BaseModel):
+    """Machine-readable extraction of a blueprint"""
+    property_type: Optional[str] = Field(None, description="residential, commercial, office, ...")
+    floors: Optional[int] = Field(None, ge=0, description="Number of floors/levels shown")
+    overall_length_ft: Optional[float] = Field(None, ge=0)
+    overall_width_ft: Optional[float] = Field(None, ge=0)
+    total_area_sqft: Optional[float] = Field(None, ge=0, description="Total floor area if stated or computable")
+    rooms: List[Room] = Field(default_factory=list)
+    doors: List[Opening] = Field(default_factory=list)
+    windows: List[Opening] = Field(default_factory=list)
+
+    def room_counts(self) -> Dict[str, int]:
+        return dict(Counter(room.room_type for room in self.rooms))
+
+    def total_square_footage(self) -> Optional[float]:
+        """Stated total area, falling back to the sum of room areas"""
+        if self.total_area_sqft is not None:
+            return self.total_area_sqft
+        areas = [room.area_sqft for room in self.rooms if room.area_sqft is not None]
+        return round(sum(areas), 1) if areas else None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "property_type": self.property_type,
+            "floors": self.floors,
+            "total_area_sqft": self.total_square_footage(),
+            "room_count": len(self.rooms),
+            "room_counts": self.room_counts(),
+            "door_count": sum(door.count for door in self.doors),
+            "window_count": sum(window.count for window in self.windows)
+        }
+
+
+class StructureStore:
+    """
+    Persists extracted structures per image content hash (SQLite)
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("STRUCTURE_DB_PATH", os.path.join("cache", "structures.db"))
+
+        self._conn, self._lock = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS blueprint_structures (
+                content_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (content_hash, model)
+            )"""
+        )
+        self._conn.commit()
+
+    def _get(self, content_hash: str, model: str) -> Optional[BlueprintStructure]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM blueprint_structures WHERE content_hash = ? AND model = ?", (content_hash, model)
+            ).fetchone()
+        return BlueprintStructure.model_validate_json(row[0]) if row else None
+
+    def _set(self, content_hash: str, model: str, structure: BlueprintStructure):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blueprint_structures (content_hash, model, data, created_at) VALUES (?, ?, ?, ?)",
+                (content_hash, model, structure.model_dump_json(), time.time())
+            )
+            self._conn.commit()
+
+    async def get(self, content_hash: str, model: str) -> Optional[BlueprintStructure]:
+        return await asyncio.to_thread(self._get, content_hash, model)
+
+    async def set(self, content_hash: str, model: str, structure: BlueprintStructure):
+        await asyncio.to_thread(self._set, content_hash, model, structure)
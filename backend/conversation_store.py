@@ -0,0 +1,223 @@
+#backend/conversation_store.py
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Any, Optional, List, Set, Callable, Awaitable
+from sqlite_store import open_sqlite
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for English text)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+class ConversationStore:
+    """
+    Server-side conversation memory per blueprint (and optional client session)
+    Keeps structured turns, a rolling summary of older turns, and the first
+    comprehensive analysis as reusable text context
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("CONVERSATION_DB_PATH", os.path.join("cache", "conversations.db"))
+        self.token_budget = int(os.getenv("CONVERSATION_TOKEN_BUDGET", 3000))
+        self.analysis_budget = int(os.getenv("CONVERSATION_ANALYSIS_BUDGET", 2500))
+        self.keep_recent = int(os.getenv("CONVERSATION_KEEP_RECENT", 4))
+        self.ttl = int(os.getenv("CONVERSATION_TTL", 24 * 3600))
+
+        self._conn, self._lock = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS conversations (
+                session_key TEXT PRIMARY KEY,
+                blueprint_id TEXT NOT NULL,
+                summary TEXT NOT NULL DEFAULT '',
+                messages TEXT NOT NULL DEFAULT '[]',
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS blueprint_analyses (
+                blueprint_id TEXT PRIMARY KEY,
+                analysis TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def session_key(blueprint_id: str, session_id: Optional[str] = None) -> str:
+        return f"{blueprint_id}:{session_id}" if session_id else blueprint_id
+
+    # ---------- synchronous primitives (run in a worker thread) ----------
+
+    def _load(self, key: str) -> Dict[str, Any]:
+        row = self._conn.execute(
+            "SELECT blueprint_id, summary, messages, updated_at FROM conversations WHERE session_key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[3] > self.ttl:
+            return {"summary": "", "messages": []}
+        return {"blueprint_id": row[0], "summary": row[1], "messages": json.loads(row[2])}
+
+    def _save(self, key: str, blueprint_id: str, summary: str, messages: List[Dict[str, Any]]):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO conversations (session_key, blueprint_id, summary, messages, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (key, blueprint_id, summary, json.dumps(messages), time.time())
+        )
+        self._conn.commit()
+
+    def _get(self, blueprint_id: str, session_id: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            state = self._load(self.session_key(blueprint_id, session_id))
+            row = self._conn.execute(
+                "SELECT analysis FROM blueprint_analyses WHERE blueprint_id = ?", (blueprint_id,)
+            ).fetchone()
+            state["analysis"] = row[0] if row else None
+            return state
+
+    def _append(self, blueprint_id: str, session_id: Optional[str], messages: List[Dict[str, Any]]):
+        key = self.session_key(blueprint_id, session_id)
+        with self._lock:
+            state = self._load(key)
+            now = time.time()
+            state["messages"].extend({**message, "timestamp": now} for message in messages)
+            self._save(key, blueprint_id, state["summary"], state["messages"])
+
+    def _set_analysis(self, blueprint_id: str, analysis: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blueprint_analyses (blueprint_id, analysis, created_at) VALUES (?, ?, ?)",
+                (blueprint_id, analysis, time.time())
+            )
+            self._conn.commit()
+
+    def _active_blueprints(self, window: float) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT blueprint_id FROM conversations WHERE updated_at >= ?", (time.time() - window,)
+            ).fetchall()
+        # Per-page memory keys look like "<blueprint_id>#p<page>"
+        return {row[0].split("#", 1)[0] for row in rows}
+
+    def _purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM conversations WHERE updated_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def _forget(self, blueprint_ids: Set[str]) -> int:
+        removed = 0
+        with self._lock:
+            for blueprint_id in blueprint_ids:
+                # Also matches the per-page memory keys "<blueprint_id>#p<page>"
+                for table in ("conversations", "blueprint_analyses"):
+                    cursor = self._conn.execute(
+                        f"DELETE FROM {table} WHERE blueprint_id = ? OR substr(blueprint_id, 1, ?) = ?",
+                        (blueprint_id, len(blueprint_id) + 1, blueprint_id + "#")
+                    )
+                    removed += cursor.rowcount
+            self._conn.commit()
+        return removed
+
+    def _clear(self, blueprint_id: str, session_id: Optional[str]):
+        with self._lock:
+            self._conn.execute("DELETE FROM conversations WHERE session_key = ?", (self.session_key(blueprint_id, session_id),))
+            self._conn.commit()
+
+    # ---------- async API ----------
+
+    async def get(self, blueprint_id: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Return {"analysis", "summary", "messages"} for a conversation"""
+        return await asyncio.to_thread(self._get, blueprint_id, session_id)
+
+    async def append_turn(self, blueprint_id: str, question: str, answer: str, session_id: Optional[str] = None):
+        """Record a question/answer pair"""
+        await asyncio.to_thread(self._append, blueprint_id, session_id, [
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer}
+        ])
+
+    async def set_analysis(self, blueprint_id: str, analysis: str):
+        """Store the comprehensive analysis for reuse as follow-up context"""
+        await asyncio.to_thread(self._set_analysis, blueprint_id, analysis)
+
+    async def active_blueprints(self, window: float) -> Set[str]:
+        """Blueprint IDs with a conversation updated in the last `window` seconds"""
+        return await asyncio.to_thread(self._active_blueprints, window)
+
+    async def purge_expired(self) -> int:
+        """Delete conversations idle for longer than the TTL; returns rows removed"""
+        return await asyncio.to_thread(self._purge_expired)
+
+    async def forget(self, blueprint_ids: Set[str]) -> int:
+        """Delete conversations and stored analyses of the given blueprints; returns rows removed"""
+        if not blueprint_ids:
+            return 0
+        return await asyncio.to_thread(self._forget, blueprint_ids)
+
+    async def clear(self, blueprint_id: str, session_id: Optional[str] = None):
+        await asyncio.to_thread(self._clear, blueprint_id, session_id)
+
+    async def build_context(self, blueprint_id: str, session_id: Optional[str] = None) -> Optional[str]:
+        """
+        Assemble follow-up context within the token budget:
+        prior comprehensive analysis, summary of older turns, then the most recent turns
+        """
+        state = await self.get(blueprint_id, session_id)
+        sections = []
+
+        if state["analysis"]:
+            analysis = state["analysis"]
+            if estimate_tokens(analysis) > self.analysis_budget:
+                analysis = analysis[:self.analysis_budget * 4] + "\n[...analysis truncated...]"
+            sections.append(f"PRIOR COMPREHENSIVE ANALYSIS OF THIS BLUEPRINT:\n{analysis}")
+
+        if state["summary"]:
+            sections.append(f"SUMMARY OF EARLIER CONVERSATION:\n{state['summary']}")
+
+        # Newest turns first until the budget is spent, then restore chronological order
+        remaining = self.token_budget
+        recent = []
+        for message in reversed(state["messages"]):
+            line = f"{message['role']}: {message['content']}"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                break
+            recent.append(line)
+            remaining -= cost
+        if recent:
+            sections.append("RECENT CONVERSATION:\n" + "\n".join(reversed(recent)))
+
+        return "\n\n".join(sections) if sections else None
+
+    async def compact(
+        self,
+        blueprint_id: str,
+        summarizer: Callable[[str], Awaitable[str]],
+        session_id: Optional[str] = None
+    ) -> bool:
+        """
+        Fold older turns into the rolling summary once history exceeds the token budget
+        The newest keep_recent messages are always kept verbatim
+        """
+        key = self.session_key(blueprint_id, session_id)
+        state = await asyncio.to_thread(self._load, key)
+        messages = state["messages"]
+        total = sum(estimate_tokens(message["content"]) for message in messages)
+        if total <= self.token_budget or len(messages) <= self.keep_recent:
+            return False
+
+        older, recent = messages[:-self.keep_recent], messages[-self.keep_recent:]
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in older)
+        if state["summary"]:
+            transcript = f"Existing summary:\n{state['summary']}\n\nNew turns:\n{transcript}"
+        summary = await summarizer(transcript)
+
+        def save():
+            with self._lock:
+                # Keep any turns appended while the summary was being generated
+                current = self._load(key)["messages"]
+                self._save(key, blueprint_id, summary, current[len(older):] if len(current) >= len(messages) else recent)
+
+        await asyncio.to_thread(save)
+        return True
@@ -0,0 +1,262 @@
+#backend/image_preprocessor.py
+import io
+import os
+import uuid
+import json
+import math
+import asyncio
+import aiofiles
+from PIL import Image, ImageOps, UnidentifiedImageError
+from typing import Dict, Any, List, Optional
+
+
+class InvalidImageError(ValueError):
+    """Raised when an upload is not an image the model can be sent"""
+
+
+def vision_tokens(width: int, height: int) -> int:
+    """
+    Prompt tokens GPT-4o charges for one high-detail image: fit into 2048x2048,
+    scale the short side to 768, then 170 per 512px tile plus 85 base
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def image_tokens(paths: List[str]) -> int:
+    """Estimated vision tokens for a set of images (reads headers only)"""
+    total = 0
+    for path in paths:
+        try:
+            with Image.open(path) as image:
+                total += vision_tokens(*image.size)
+        except UnidentifiedImageError as e:
+            raise InvalidImageError("Unsupported or corrupt image file") from e
+    return total
+
+
+class ImagePreprocessor:
+    """
+    Shrink blueprints to what the vision model can actually use before upload
+    Grayscale, margin crop, resize, re-encode and optional tiling
+    """
+
+    PASSTHROUGH_FORMATS = {
+        "JPEG": "image/jpeg",
+        "PNG": "image/png",
+        "WEBP": "image/webp",
+        "GIF": "image/gif"
+    }
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.getenv("PREPROCESS_CACHE_DIR", os.path.join("cache", "preprocessed"))
+        self.enabled = os.getenv("PREPROCESS_ENABLED", "true").lower() == "true"
+        self.grayscale = os.getenv("PREPROCESS_GRAYSCALE", "true").lower() == "true"
+        self.output_format = os.getenv("PREPROCESS_FORMAT", "PNG").upper()
+        # GPT-4o high detail fits images into 2048x2048, then scales the short side to 768
+        self.max_side = int(os.getenv("PREPROCESS_MAX_SIDE", 2048))
+        self.min_side = int(os.getenv("PREPROCESS_MIN_SIDE", 768))
+        self.crop_threshold = int(os.getenv("PREPROCESS_CROP_THRESHOLD", 245))
+        self.tiling = os.getenv("PREPROCESS_TILING", "false").lower() == "true"
+        self.tile_threshold = int(os.getenv("PREPROCESS_TILE_THRESHOLD", 6000))
+        self.max_tiles = int(os.getenv("PREPROCESS_MAX_TILES", 4))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def mime_type(self) -> str:
+        return "image/webp" if self.output_format == "WEBP" else "image/png"
+
+    @property
+    def signature(self) -> str:
+        """Settings fingerprint so cached output is invalidated when config changes"""
+        return "_".join([
+            self.output_format.lower(),
+            "g" if self.grayscale else "c",
+            str(self.max_side),
+            str(self.min_side),
+            str(self.crop_threshold),
+            f"t{self.tile_threshold}x{self.max_tiles}" if self.tiling else "nt"
+        ])
+
+    def _auto_crop(self, image: Image.Image) -> Image.Image:
+        """Trim near-white margins around the drawing"""
+        gray = image if image.mode == "L" else image.convert("L")
+        mask = gray.point(lambda p: 255 if p < self.crop_threshold else 0)
+        bbox = mask.getbbox()
+        if not bbox:
+            return image
+
+        pad = 8
+        left, top, right, bottom = bbox
+        bbox = (max(left - pad, 0), max(top - pad, 0), min(right + pad, image.width), min(bottom + pad, image.height))
+        return image.crop(bbox)
+
+    def _resize(self, image: Image.Image) -> Image.Image:
+        """Downscale to the model's effective resolution (never upscale)"""
+        width, height = image.size
+        scale = min(1.0, self.max_side / max(width, height))
+        short_side = min(width, height) * scale
+        if short_side > self.min_side:
+            scale *= self.min_side / short_side
+        if scale >= 1.0:
+            return image
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        return image.resize(size, Image.LANCZOS)
+
+    def _encode(self, image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        if self.output_format == "WEBP":
+            image.save(buffer, format="WEBP", lossless=True, method=4)
+        else:
+            image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+    def _tiles(self, image: Image.Image) -> List[Image.Image]:
+        """Split a very large sheet into a grid of at most max_tiles regions"""
+        width, height = image.size
+        cols = max(1, math.ceil(width / self.tile_threshold))
+        rows = max(1, math.ceil(height / self.tile_threshold))
+        while cols * rows > self.max_tiles:
+            if cols >= rows and cols > 1:
+                cols -= 1
+            elif rows > 1:
+                rows -= 1
+            else:
+                break
+
+        tile_w = math.ceil(width / cols)
+        tile_h = math.ceil(height / rows)
+        tiles = []
+        for row in range(rows):
+            for col in range(cols):
+                box = (col * tile_w, row * tile_h, min((col + 1) * tile_w, width), min((row + 1) * tile_h, height))
+                tiles.append(image.crop(box))
+        return tiles
+
+    def _passthrough(self, path: str, mime_type: Optional[str], reason: str) -> Dict[str, Any]:
+        """The original file, sent as-is; reason is "disabled" or "smaller" """
+        size = os.path.getsize(path)
+        return {
+            "paths": [path],
+            "mime_type": mime_type,
+            "original_bytes": size,
+            "processed_bytes": size,
+            "tiles": 1,
+            "preprocessed": False,
+            "passthrough": reason
+        }
+
+    def process_file(self, path: str, output_base: str) -> Dict[str, Any]:
+        """
+        Run the pipeline synchronously, writing output image(s) next to output_base
+        The source is decoded straight from disk; a file that is not a readable image
+        raises InvalidImageError rather than being sent to the model
+        """
+        try:
+            image = Image.open(path)
+            source_format = image.format
+            image.seek(0)  # first frame of GIF/TIFF
+            image = ImageOps.exif_transpose(image)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise InvalidImageError("Unsupported or corrupt image file") from e
+
+        original_bytes = os.path.getsize(path)
+
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        if self.grayscale:
+            image = image.convert("L")
+
+        image = self._auto_crop(image)
+
+        parts = [image]
+        if self.tiling and max(image.size) > self.tile_threshold:
+            # Overview first, then detail tiles
+            parts = [image] + self._tiles(image)
+
+        images = [self._encode(self._resize(part)) for part in parts]
+
+        # Already-compact JPEG/PNG/WebP/GIF uploads can beat a lossless re-encode
+        if len(images) == 1 and len(images[0]) >= original_bytes and source_format in self.PASSTHROUGH_FORMATS:
+            return self._passthrough(path, self.PASSTHROUGH_FORMATS[source_format], "smaller")
+
+        paths = []
+        for index, data in enumerate(images):
+            output_path = f"{output_base}_{index}"
+            temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, output_path)
+            paths.append(output_path)
+
+        return {
+            "paths": paths,
+            "mime_type": self.mime_type,
+            "original_bytes": original_bytes,
+            "processed_bytes": sum(len(data) for data in images),
+            "tiles": len(images),
+            "preprocessed": True,
+            "passthrough": None
+        }
+
+    def _cache_paths(self, content_hash: str) -> Dict[str, str]:
+        base = os.path.join(self.cache_dir, f"{content_hash}_{self.signature}")
+        return {"base": base, "meta": f"{base}.json"}
+
+    async def load_cached(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Return previously preprocessed output for a content hash, or None"""
+        if not self.enabled:
+            return None
+        paths = self._cache_paths(content_hash)
+        if not os.path.exists(paths["meta"]):
+            return None
+        try:
+            async with aiofiles.open(paths["meta"], "r") as f:
+                meta = json.loads(await f.read())
+        except (OSError, ValueError):
+            return None
+        if not meta.get("paths") or not all(os.path.exists(path) for path in meta["paths"]):
+            return None
+        self._touch([paths["meta"], *meta["paths"]])
+        return meta
+
+    @staticmethod
+    def _touch(paths):
+        """Refresh mtimes so retention evicts least-recently-used output first"""
+        for path in paths:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    async def _store_meta(self, content_hash: str, result: Dict[str, Any]):
+        paths = self._cache_paths(content_hash)
+        # Meta is written last (atomically) so a partial write is never treated as a hit
+        temp_path = f"{paths['meta']}.{uuid.uuid4().hex}.tmp"
+        async with aiofiles.open(temp_path, "w") as f:
+            await f.write(json.dumps(result))
+        os.replace(temp_path, paths["meta"])
+
+    async def process(self, path: str, content_hash: str) -> Dict[str, Any]:
+        """
+        Preprocess an image file, reusing cached output for the same content hash
+        Returns the paths of the image(s) to send plus size stats
+        """
+        if not self.enabled:
+            return self._passthrough(path, None, "disabled")
+
+        cached = await self.load_cached(content_hash)
+        if cached is not None:
+            return cached
+
+        result = await asyncio.to_thread(self.process_file, path, self._cache_paths(content_hash)["base"])
+        # A smaller original is a settled outcome too; cache it so the pipeline is not re-run
+        if result["preprocessed"] or result["passthrough"] == "smaller":
+            await self._store_meta(content_hash, result)
+        return result
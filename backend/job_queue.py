@@ -0,0 +1,204 @@
+#backend/job_queue.py
+import os
+import json
+import time
+import uuid
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Set
+from sqlite_store import open_sqlite
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with a local asyncio worker pool
+    Submitting returns immediately; results are persisted for polling
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("JOB_DB_PATH", os.path.join("cache", "jobs.db"))
+        self.workers = int(os.getenv("JOB_WORKERS", 4))
+        self.poll_interval = float(os.getenv("JOB_POLL_INTERVAL", 1.0))
+        self.retention = int(os.getenv("JOB_RETENTION", 7 * 24 * 3600))
+
+        self.handlers: Dict[str, JobHandler] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+
+        self._conn, self._lock = open_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self._conn.commit()
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that executes jobs of a given kind"""
+        self.handlers[kind] = handler
+
+    # ---------- synchronous primitives (run in a worker thread) ----------
+
+    def _insert(self, job_id: str, kind: str, params: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, params, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(params), time.time())
+            )
+            self._conn.commit()
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, kind, params FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE job_id = ? AND status = 'queued'",
+                (time.time(), row[0])
+            ).rowcount
+            self._conn.commit()
+            if not claimed:
+                return None
+            return {"job_id": row[0], "kind": row[1], "params": json.loads(row[2])}
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+            self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (time.time() - self.retention,)
+            )
+            self._conn.commit()
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, kind, status, params, result, error, created_at, started_at, finished_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "params": json.loads(row[3]),
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "created_at": row[6],
+            "started_at": row[7],
+            "finished_at": row[8]
+        }
+
+    def _requeue_running(self) -> int:
+        """Jobs left 'running' by a crashed process go back to the queue"""
+        with self._lock:
+            count = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            ).rowcount
+            self._conn.commit()
+        return count
+
+    def _active_blueprints(self) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT params FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        return {json.loads(row[0]).get("blueprint_id") for row in rows} - {None}
+
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    # ---------- async API ----------
+
+    async def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        """Persist a job and wake a worker; returns the job ID"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._insert, job_id, kind, params)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Long-poll: return as soon as the job finishes or the timeout elapses
+        """
+        deadline = time.monotonic() + timeout
+        job = await self.get(job_id)
+        while job is not None and job["status"] in ("queued", "running"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            event = self._waiters.setdefault(job_id, asyncio.Event())
+            try:
+                # Poll as a fallback for jobs finished by another process
+                await asyncio.wait_for(event.wait(), timeout=min(remaining, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+            job = await self.get(job_id)
+        return job
+
+    async def active_blueprints(self) -> Set[str]:
+        """Blueprint IDs referenced by queued or running jobs"""
+        return await asyncio.to_thread(self._active_blueprints)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, **await asyncio.to_thread(self._counts)}
+
+    async def _worker(self):
+        while True:
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                result = await self.handlers[job["kind"]](job["params"])
+                await asyncio.to_thread(self._finish, job["job_id"], "done", result, None)
+            except asyncio.CancelledError:
+                # Shutdown mid-job: leave it to be re-queued on next start
+                raise
+            except Exception as e:
+                await asyncio.to_thread(self._finish, job["job_id"], "failed", None, str(e))
+
+            waiter = self._waiters.pop(job["job_id"], None)
+            if waiter is not None:
+                waiter.set()
+
+    async def start(self):
+        """Re-queue interrupted jobs and start the worker pool"""
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self._requeue_running)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._wakeup.set()
+
+    async def stop(self):
+        """Cancel workers; unfinished jobs are re-queued on next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -1,26 +1,77 @@
 # backend/main.py
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 import os
+import re
+import json
+import uuid
 import base64
 from dotenv import load_dotenv
-from typing import Optional
-import aiofiles
+from typing import Optional, List
 from datetime import datetime
+from contextvars import ContextVar
+from contextlib import asynccontextmanager
+from pydantic import ValidationError
 
 # Load environment variables
 load_dotenv()
 
 # Import AI modules
-from ai_processor import BlueprintAnalyzer
+from ai_processor import BlueprintAnalyzer, COMPREHENSIVE_ANALYSIS_QUESTION
 from voice_handler import VoiceHandler
+from blob_store import BlobStore
+from blueprint_registry import BlueprintRegistry
+from conversation_store import ConversationStore
+from batch_processor import BatchProcessor
+from job_queue import JobQueue
+from page_renderer import PageRenderer
+from retention_manager import RetentionManager
+from upload_stream import UploadTooLargeError, save_upload
+from model_clients import ModelClients
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the shared model connection pool and the components that use it, warm
+    models and start background workers; on shutdown stop them and close the pool
+    """
+    global model_clients, blueprint_analyzer, voice_handler, batch_processor, retention_manager
+    
+    # One shared, tuned connection pool for all model calls
+    model_clients = ModelClients()
+    blueprint_analyzer = BlueprintAnalyzer(model_clients)
+    voice_handler = VoiceHandler(model_clients)
+    
+    # Plan-set fan-out
+    batch_processor = BatchProcessor(blueprint_analyzer, blob_store, page_renderer)
+    
+    # Size/age quotas for uploads and derived caches, swept in the background
+    retention_manager = RetentionManager(blob_store, conversation_store, job_queue, {
+        "preprocessed": blueprint_analyzer.preprocessor.cache_dir,
+        "pages": page_renderer.cache_dir,
+        "speech": voice_handler.speech_cache.cache_dir
+    })
+    
+    await voice_handler.warm_up()
+    await job_queue.start()
+    await retention_manager.start()
+    try:
+        yield
+    finally:
+        await retention_manager.stop()
+        await job_queue.stop()
+        voice_handler.shutdown()
+        await model_clients.aclose()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="CBRE Blueprint Analyzer API",
     description="AI-powered blueprint analysis system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -32,14 +83,234 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize AI components
-blueprint_analyzer = BlueprintAnalyzer()
-voice_handler = VoiceHandler()
+@app.middleware("http")
+async def reject_oversized_body(request: Request, call_next):
+    """
+    Refuse an upload whose Content-Length is over the endpoint's limit before the body is
+    received; per-file limits are still enforced while the files are read
+    """
+    limit = REQUEST_BODY_LIMITS.get(request.url.path)
+    length = request.headers.get("content-length", "")
+    if request.method == "POST" and limit is not None and length.isdigit() and int(length) > limit + FORM_OVERHEAD_BYTES:
+        return JSONResponse(status_code=413, content={"detail": f"Request exceeds the {limit // (1024 * 1024)} MB limit"})
+    return await call_next(request)
+
+
+# Every request gets a collision-free ID (client-supplied X-Request-ID is kept if well-formed)
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{8,64}")
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID", "")
+    if not REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = uuid.uuid4().hex
+    request_id_var.set(request_id)
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+def current_request_id() -> str:
+    return request_id_var.get() or uuid.uuid4().hex
+
+
+# AI components and their connection pool are created in the lifespan hook
+model_clients: Optional[ModelClients] = None
+blueprint_analyzer: Optional[BlueprintAnalyzer] = None
+voice_handler: Optional[VoiceHandler] = None
+batch_processor: Optional[BatchProcessor] = None
+retention_manager: Optional[RetentionManager] = None
 
 # Create uploads directory
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Audio clips are streamed to disk; anything larger is rejected with 413
+MAX_AUDIO_BYTES = int(os.getenv("MAX_AUDIO_MB", 25)) * 1024 * 1024
+
+# Longest text read aloud in one request; longer text is rejected with 413
+MAX_TTS_CHARS = int(os.getenv("TTS_MAX_CHARS", 10000))
+
+# Persistent blueprint index; files that predate it are registered once at startup
+blueprint_registry = BlueprintRegistry()
+blueprint_registry.prune_missing()
+blueprint_registry.import_directory(UPLOAD_DIR)
+
+# Content-addressed blueprint storage
+blob_store = BlobStore(UPLOAD_DIR, blueprint_registry)
+
+# Lazy page rasterization for multi-page PDF/TIFF sets
+page_renderer = PageRenderer()
+
+# Server-side conversation memory per blueprint/session
+conversation_store = ConversationStore()
+
+# Background analysis jobs (SQLite-backed, local worker pool)
+job_queue = JobQueue()
+
+# Whole-request caps, checked against Content-Length before the body is received
+# (multipart framing and form fields fit in the overhead allowance)
+MAX_BATCH_REQUEST_BYTES = int(os.getenv("MAX_BATCH_REQUEST_MB", 1024)) * 1024 * 1024
+FORM_OVERHEAD_BYTES = 1024 * 1024
+REQUEST_BODY_LIMITS = {
+    "/api/analyze-blueprint": blob_store.max_upload_bytes + MAX_AUDIO_BYTES,
+    "/api/analyze-blueprint/stream": blob_store.max_upload_bytes + MAX_AUDIO_BYTES,
+    "/api/ask-followup": MAX_AUDIO_BYTES,
+    "/api/ask-followup/stream": MAX_AUDIO_BYTES,
+    "/api/jobs": blob_store.max_upload_bytes,
+    "/api/transcribe-audio": MAX_AUDIO_BYTES,
+    "/api/analyze-batch": MAX_BATCH_REQUEST_BYTES
+}
+
+GENERAL_ANALYSIS_QUESTION = "Please provide a comprehensive analysis of this blueprint including number of rooms, dimensions, layout type, and key features."
+
+
+def audio_upload_path(audio: UploadFile) -> str:
+    """Unique per-request path for an audio clip (keeps the upload's container extension)"""
+    extension = audio.filename.rsplit(".", 1)[-1].lower() if audio.filename and "." in audio.filename else "wav"
+    if not extension.isalnum():
+        extension = "wav"
+    return os.path.join(UPLOAD_DIR, f"audio_{uuid.uuid4().hex}.{extension}")
+
+
+async def transcribe_upload(audio: UploadFile) -> str:
+    """Save an uploaded audio clip, transcribe it and remove the temp file"""
+    audio_path = audio_upload_path(audio)
+    await save_upload(audio, audio_path, MAX_AUDIO_BYTES)
+    
+    try:
+        return await voice_handler.transcribe(audio_path)
+    finally:
+        os.remove(audio_path)  # Clean up audio file
+
+
+def find_blueprint(blueprint_id: str) -> Optional[dict]:
+    """Resolve a blueprint ID through the registry (constant time)"""
+    entry = blueprint_registry.get(blueprint_id)
+    if entry is None or not os.path.exists(entry["path"]):
+        return None
+    blueprint_registry.touch(blueprint_id)  # recency for retention
+    return entry
+
+
+async def resolve_image(blueprint: dict, page: Optional[int] = None, dpi: Optional[int] = None) -> dict:
+    """Image the analyzer should see for a stored blueprint (one rendered page of a PDF/TIFF set)"""
+    return await page_renderer.resolve(blueprint, page, dpi)
+
+
+def select_question(question: Optional[str], auto_analyze: bool):
+    """
+    Pick the prompt for an upload request
+    Returns (question sent to the model, analysis type, question reported to the client)
+    """
+    if auto_analyze and not question:
+        return COMPREHENSIVE_ANALYSIS_QUESTION, "comprehensive", "Automatic comprehensive analysis"
+    if not question:
+        return GENERAL_ANALYSIS_QUESTION, "general", GENERAL_ANALYSIS_QUESTION
+    return question, "custom", question
+
+
+def raise_for_failed_analysis(analysis: dict):
+    """
+    Turn a failed model call into an HTTP error instead of a 200 carrying an error message
+    Quota exhaustion is 503 with Retry-After, an unreadable image 415; other upstream failures are 502
+    """
+    if analysis.get("confidence") != "error":
+        return
+    if analysis.get("rate_limited"):
+        retry_after = blueprint_analyzer.scheduler.limiter.cooldown()
+        raise HTTPException(status_code=503, detail=analysis["answer"], headers={"Retry-After": str(retry_after)})
+    if analysis.get("invalid_input"):
+        raise HTTPException(status_code=415, detail=analysis["answer"])
+    raise HTTPException(status_code=502, detail=analysis["answer"])
+
+
+def sse_event(payload: dict) -> str:
+    """Format a payload as a Server-Sent Events message"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def remember_exchange(
+    blueprint_id: str,
+    question: str,
+    analysis: dict,
+    analysis_type: str,
+    session_id: Optional[str] = None
+):
+    """
+    Record an answered request in conversation memory
+    The comprehensive analysis is kept as reusable context; other answers become turns
+    """
+    if analysis.get("confidence") == "error":
+        return
+    
+    if analysis_type == "comprehensive":
+        await conversation_store.set_analysis(blueprint_id, analysis["answer"])
+        return
+    
+    await conversation_store.append_turn(blueprint_id, question, analysis["answer"], session_id)
+    try:
+        await conversation_store.compact(blueprint_id, blueprint_analyzer.summarize_conversation, session_id)
+    except Exception as e:
+        print(f"Conversation compaction error: {e}")
+
+
+async def stream_analysis(
+    blueprint_path: str,
+    question: str,
+    meta: dict,
+    image_hash: Optional[str] = None,
+    context: Optional[str] = None,
+    session_id: Optional[str] = None
+):
+    """Relay analyzer stream events as SSE messages, then update conversation memory"""
+    yield sse_event({"type": "meta", **meta})
+    final = None
+    if meta["analysis_type"] == "comprehensive":
+        events = blueprint_analyzer.stream_comprehensive_analysis(blueprint_path, image_hash)
+    else:
+        events = blueprint_analyzer.stream_blueprint(blueprint_path, question, image_hash, context)
+    async for event in events:
+        if event["type"] == "done":
+            final = event
+        yield sse_event(event)
+    
+    if final is not None:
+        await remember_exchange(meta["memory_id"], meta["question"], final, meta["analysis_type"], session_id)
+
+
+async def run_analysis_job(params: dict) -> dict:
+    """Job handler: comprehensive analysis, or a question when one is given"""
+    blueprint = find_blueprint(params["blueprint_id"])
+    if not blueprint:
+        raise ValueError("Blueprint not found")
+    image = await resolve_image(blueprint, params.get("page"))
+    
+    question, analysis_type, question_used = select_question(params.get("question"), True)
+    if analysis_type == "comprehensive":
+        analysis = await blueprint_analyzer.get_comprehensive_analysis(image["path"], image["image_hash"])
+    else:
+        context = await conversation_store.build_context(image["memory_id"], params.get("session_id"))
+        analysis = await blueprint_analyzer.analyze_blueprint(image["path"], question, image["image_hash"], context)
+    
+    if analysis.get("confidence") == "error":
+        raise RuntimeError(analysis["answer"])
+    
+    await remember_exchange(image["memory_id"], question_used, analysis, analysis_type, params.get("session_id"))
+    return {
+        "page": image["page"],
+        "question": question_used,
+        "analysis": analysis["answer"],
+        "analysis_type": analysis_type,
+        "route": analysis.get("route", "vision"),
+        "preprocessing": analysis.get("preprocessing")
+    }
+
+
+job_queue.register("analysis", run_analysis_job)
+
 
 @app.get("/")
 async def root():
@@ -53,149 +324,557 @@ async def root():
 
 @app.post("/api/analyze-blueprint")
 async def analyze_blueprint(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     question: Optional[str] = Form(None),
     audio: Optional[UploadFile] = File(None),
-    auto_analyze: bool = Form(True)
+    auto_analyze: bool = Form(True),
+    session_id: Optional[str] = Form(None),
+    page: Optional[int] = Form(None)
 ):
     """
     Analyze blueprint with text or voice question
     If auto_analyze is True and no question provided, gives comprehensive analysis
+    For multi-page PDF/TIFF uploads, `page` (1-based) selects the sheet
     """
     try:
-        # Save uploaded blueprint
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = file.filename.split(".")[-1]
-        blueprint_path = os.path.join(UPLOAD_DIR, f"blueprint_{timestamp}.{file_extension}")
-        
-        async with aiofiles.open(blueprint_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+        # Save uploaded blueprint (identical content is stored once)
+        timestamp = datetime.now().isoformat()
+        blob = await blob_store.put_upload(file)
+        image = await resolve_image(blob, page)
         
         # Process voice input if provided
         if audio:
-            audio_path = os.path.join(UPLOAD_DIR, f"audio_{timestamp}.wav")
-            async with aiofiles.open(audio_path, 'wb') as f:
-                audio_content = await audio.read()
-                await f.write(audio_content)
-            
-            question = voice_handler.transcribe_audio(audio_path)
-            os.remove(audio_path)  # Clean up audio file
+            question = await transcribe_upload(audio)
         
         # Automatic comprehensive analysis on first upload
-        if auto_analyze and not question:
-            analysis = await blueprint_analyzer.get_comprehensive_analysis(blueprint_path)
-            analysis_type = "comprehensive"
-            question_used = "Automatic comprehensive analysis"
-        elif not question:
-            question = "Please provide a comprehensive analysis of this blueprint including number of rooms, dimensions, layout type, and key features."
-            analysis = await blueprint_analyzer.analyze_blueprint(blueprint_path, question)
-            analysis_type = "general"
-            question_used = question
+        question, analysis_type, question_used = select_question(question, auto_analyze)
+        if analysis_type == "comprehensive":
+            analysis = await blueprint_analyzer.get_comprehensive_analysis(image["path"], image["image_hash"])
         else:
-            analysis = await blueprint_analyzer.analyze_blueprint(blueprint_path, question)
-            analysis_type = "custom"
-            question_used = question
+            analysis = await blueprint_analyzer.analyze_blueprint(image["path"], question, image["image_hash"])
+        raise_for_failed_analysis(analysis)
+        
+        background_tasks.add_task(
+            remember_exchange, image["memory_id"], question_used, analysis, analysis_type, session_id
+        )
         
         return JSONResponse(content={
             "success": True,
             "question": question_used,
             "analysis": analysis["answer"],
             "confidence": analysis.get("confidence", "high"),
+            "preprocessing": analysis.get("preprocessing"),
+            "route": analysis.get("route", "vision"),
             "timestamp": timestamp,
+            "request_id": current_request_id(),
+            "blueprint_id": blob["blueprint_id"],
+            "deduplicated": blob["deduplicated"],
+            "page": image["page"],
+            "page_count": image["page_count"],
             "analysis_type": analysis_type
         })
     
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
 @app.post("/api/ask-followup")
 async def ask_followup(
+    background_tasks: BackgroundTasks,
     blueprint_id: str = Form(...),
     question: Optional[str] = Form(None),
-    audio: Optional[UploadFile] = File(None)
+    audio: Optional[UploadFile] = File(None),
+    session_id: Optional[str] = Form(None),
+    page: Optional[int] = Form(None)
 ):
     """
     Ask follow-up questions about previously analyzed blueprint
+    Conversation history is kept server-side per blueprint (and optional session_id)
     """
     try:
         # Find the blueprint file
-        blueprint_files = [f for f in os.listdir(UPLOAD_DIR) if f.startswith(f"blueprint_{blueprint_id}")]
+        blueprint = find_blueprint(blueprint_id)
         
-        if not blueprint_files:
+        if not blueprint:
             raise HTTPException(status_code=404, detail="Blueprint not found")
         
-        blueprint_path = os.path.join(UPLOAD_DIR, blueprint_files[0])
-        
         # Process voice input if provided
         if audio:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            audio_path = os.path.join(UPLOAD_DIR, f"audio_{timestamp}.wav")
-            async with aiofiles.open(audio_path, 'wb') as f:
-                audio_content = await audio.read()
-                await f.write(audio_content)
-            
-            question = voice_handler.transcribe_audio(audio_path)
-            os.remove(audio_path)
+            question = await transcribe_upload(audio)
         
         if not question:
             raise HTTPException(status_code=400, detail="Question is required")
         
-        # Analyze with follow-up context
-        analysis = await blueprint_analyzer.analyze_blueprint(blueprint_path, question)
+        # Analyze with follow-up context (stored image and preprocessed output are reused)
+        image = await resolve_image(blueprint, page)
+        context = await conversation_store.build_context(image["memory_id"], session_id)
+        analysis = await blueprint_analyzer.analyze_blueprint(
+            image["path"], question, image["image_hash"], context
+        )
+        raise_for_failed_analysis(analysis)
+        
+        background_tasks.add_task(remember_exchange, image["memory_id"], question, analysis, "followup", session_id)
         
         return JSONResponse(content={
             "success": True,
             "question": question,
             "analysis": analysis["answer"],
-            "confidence": analysis.get("confidence", "high")
+            "confidence": analysis.get("confidence", "high"),
+            "preprocessing": analysis.get("preprocessing"),
+            "route": analysis.get("route", "vision"),
+            "page": image["page"]
         })
     
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Follow-up analysis failed: {str(e)}")
+
+
+@app.post("/api/analyze-blueprint/stream")
+async def analyze_blueprint_stream(
+    file: UploadFile = File(...),
+    question: Optional[str] = Form(None),
+    audio: Optional[UploadFile] = File(None),
+    auto_analyze: bool = Form(True),
+    session_id: Optional[str] = Form(None),
+    page: Optional[int] = Form(None)
+):
+    """
+    Streaming variant of /api/analyze-blueprint
+    Emits Server-Sent Events: meta, token..., then done (or error)
+    """
+    try:
+        timestamp = datetime.now().isoformat()
+        blob = await blob_store.put_upload(file)
+        image = await resolve_image(blob, page)
+        
+        if audio:
+            question = await transcribe_upload(audio)
+        
+        question, analysis_type, question_used = select_question(question, auto_analyze)
+        meta = {
+            "question": question_used,
+            "analysis_type": analysis_type,
+            "timestamp": timestamp,
+            "request_id": current_request_id(),
+            "blueprint_id": blob["blueprint_id"],
+            "deduplicated": blob["deduplicated"],
+            "memory_id": image["memory_id"],
+            "page": image["page"],
+            "page_count": image["page_count"]
+        }
+        
+        return StreamingResponse(
+            stream_analysis(image["path"], question, meta, image["image_hash"], session_id=session_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@app.post("/api/ask-followup/stream")
+async def ask_followup_stream(
+    blueprint_id: str = Form(...),
+    question: Optional[str] = Form(None),
+    audio: Optional[UploadFile] = File(None),
+    session_id: Optional[str] = Form(None),
+    page: Optional[int] = Form(None)
+):
+    """
+    Streaming variant of /api/ask-followup
+    """
+    try:
+        blueprint = find_blueprint(blueprint_id)
+        
+        if not blueprint:
+            raise HTTPException(status_code=404, detail="Blueprint not found")
+        
+        if audio:
+            question = await transcribe_upload(audio)
+        
+        if not question:
+            raise HTTPException(status_code=400, detail="Question is required")
+        
+        image = await resolve_image(blueprint, page)
+        context = await conversation_store.build_context(image["memory_id"], session_id)
+        meta = {
+            "question": question,
+            "blueprint_id": blueprint_id,
+            "analysis_type": "followup",
+            "memory_id": image["memory_id"],
+            "page": image["page"]
+        }
+        
+        return StreamingResponse(
+            stream_analysis(image["path"], question, meta, image["image_hash"], context, session_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Follow-up analysis failed: {str(e)}")
 
 
+@app.post("/api/analyze-batch")
+async def analyze_batch(
+    files: List[UploadFile] = File(...),
+    question: Optional[str] = Form(None),
+    concurrency: Optional[int] = Form(None)
+):
+    """
+    Analyze a plan set (many sheets and/or zip archives) in parallel
+    Streams Server-Sent Events: start, one sheet event per completed sheet, then summary
+    Without a question each sheet gets the comprehensive analysis
+    """
+    try:
+        sheets = await batch_processor.ingest(files)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
+    
+    async def events():
+        async for event in batch_processor.run(sheets, question, concurrency):
+            yield sse_event(event)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(
+    file: Optional[UploadFile] = File(None),
+    blueprint_id: Optional[str] = Form(None),
+    question: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None),
+    page: Optional[int] = Form(None)
+):
+    """
+    Queue an analysis and return a job ID immediately
+    Send either a blueprint file or the blueprint_id of a stored one
+    """
+    try:
+        if file is not None:
+            blob = await blob_store.put_upload(file)
+            blueprint_id = blob["blueprint_id"]
+        elif not blueprint_id or not find_blueprint(blueprint_id):
+            raise HTTPException(status_code=404, detail="Blueprint not found")
+        
+        job_id = await job_queue.submit("analysis", {
+            "blueprint_id": blueprint_id,
+            "question": question,
+            "session_id": session_id,
+            "page": page
+        })
+        
+        return JSONResponse(status_code=202, content={
+            "success": True,
+            "job_id": job_id,
+            "blueprint_id": blueprint_id,
+            "status": "queued"
+        })
+    
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job submission failed: {str(e)}")
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """
+    Job status and result; pass wait=<seconds> (max 60) to long-poll until it finishes
+    """
+    job = await job_queue.wait(job_id, min(max(wait, 0), 60)) if wait else await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return JSONResponse(content={"success": True, **job})
+
+
 @app.post("/api/transcribe-audio")
 async def transcribe_audio(audio: UploadFile = File(...)):
     """
     Transcribe audio to text
     """
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        audio_path = os.path.join(UPLOAD_DIR, f"audio_{timestamp}.wav")
+        audio_path = audio_upload_path(audio)
+        await save_upload(audio, audio_path, MAX_AUDIO_BYTES)
         
-        async with aiofiles.open(audio_path, 'wb') as f:
-            content = await audio.read()
-            await f.write(content)
-        
-        transcription = voice_handler.transcribe_audio(audio_path)
-        os.remove(audio_path)
+        try:
+            transcription = await voice_handler.transcribe(audio_path)
+        finally:
+            os.remove(audio_path)
         
         return JSONResponse(content={
             "success": True,
             "transcription": transcription
         })
     
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
 
+@app.post("/api/text-to-speech")
+async def text_to_speech(
+    text: Optional[str] = Form(None),
+    blueprint_id: Optional[str] = Form(None),
+    page: Optional[int] = Form(None),
+    voice: str = Form("com"),
+    lang: str = Form("en")
+):
+    """
+    Speak an analysis as MP3
+    Send `text`, or a `blueprint_id` to read back its stored comprehensive analysis
+    Audio streams sentence by sentence; clips already synthesized are served from the cache
+    """
+    if lang not in voice_handler.tts_languages:
+        raise HTTPException(status_code=400, detail=f"Unsupported language '{lang}'")
+    if not re.fullmatch(r"[a-z]{2,3}(\.[a-z]{2,3})?", voice):
+        raise HTTPException(status_code=400, detail=f"Invalid voice '{voice}'")
+    
+    if not text and blueprint_id:
+        blueprint = find_blueprint(blueprint_id)
+        if not blueprint:
+            raise HTTPException(status_code=404, detail="Blueprint not found")
+        try:
+            image = await resolve_image(blueprint, page)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        text = (await conversation_store.get(image["memory_id"]))["analysis"]
+        if not text:
+            raise HTTPException(status_code=404, detail="No analysis stored for this blueprint yet")
+    
+    if not text:
+        raise HTTPException(status_code=400, detail="Text or blueprint_id is required")
+    if len(text) > MAX_TTS_CHARS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Text is {len(text)} characters; the limit is {MAX_TTS_CHARS}"
+        )
+    
+    cached_path = voice_handler.cached_speech(text, voice, lang)
+    if cached_path is not None:
+        return FileResponse(cached_path, media_type="audio/mpeg", headers={"X-Speech-Cache": "hit"})
+    
+    return StreamingResponse(
+        voice_handler.stream_speech(text, voice, lang),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Speech-Cache": "miss"}
+    )
+
+
+async def resolve_page_or_400(blueprint: dict, page: Optional[int]) -> dict:
+    try:
+        return await resolve_image(blueprint, page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def extract_structure_or_raise(image: dict):
+    """
+    Structured extraction with failures mapped like raise_for_failed_analysis:
+    a reply that does not match the schema is an upstream failure (502), not the client's
+    """
+    try:
+        return await blueprint_analyzer.extract_structure(image["path"], image["image_hash"])
+    except ValidationError as e:
+        raise HTTPException(status_code=502, detail=f"Model returned an invalid structure ({e.error_count()} validation errors)")
+    except Exception as e:
+        raise_for_failed_analysis(blueprint_analyzer.error_result(e))
+
+
+@app.get("/api/blueprints/{blueprint_id}/structure")
+async def blueprint_structure(blueprint_id: str, page: Optional[int] = None):
+    """
+    Structured extraction (rooms, dimensions, areas, doors, windows)
+    The model is called only the first time; later requests read the stored result
+    """
+    blueprint = find_blueprint(blueprint_id)
+    if not blueprint:
+        raise HTTPException(status_code=404, detail="Blueprint not found")
+    
+    image = await resolve_page_or_400(blueprint, page)
+    structure = await extract_structure_or_raise(image)
+    return JSONResponse(content={
+        "success": True,
+        "blueprint_id": blueprint_id,
+        "structure": structure.model_dump(),
+        "summary": structure.summary()
+    })
+
+
+@app.get("/api/blueprints/{blueprint_id}/summary")
+async def blueprint_summary(blueprint_id: str, room_type: Optional[str] = None, page: Optional[int] = None):
+    """
+    Fast queries over the stored structure: room counts, total square footage,
+    door and window counts. Optionally filter rooms by type.
+    """
+    blueprint = find_blueprint(blueprint_id)
+    if not blueprint:
+        raise HTTPException(status_code=404, detail="Blueprint not found")
+    
+    image = await resolve_page_or_400(blueprint, page)
+    structure = await extract_structure_or_raise(image)
+    content = {
+        "success": True,
+        "blueprint_id": blueprint_id,
+        **structure.summary()
+    }
+    if room_type:
+        rooms = [room.model_dump() for room in structure.rooms if room.room_type == room_type.lower()]
+        content["rooms"] = rooms
+    
+    return JSONResponse(content=content)
+
+
+@app.get("/api/blueprints/{blueprint_id}/pages")
+async def blueprint_pages(blueprint_id: str):
+    """
+    Page count of a stored blueprint (nothing is rendered)
+    """
+    blueprint = find_blueprint(blueprint_id)
+    if not blueprint:
+        raise HTTPException(status_code=404, detail="Blueprint not found")
+    
+    try:
+        page_count = 1
+        if page_renderer.is_multi_page(blueprint["path"]):
+            page_count = await page_renderer.page_count(blueprint["path"], blueprint["content_hash"])
+        
+        return JSONResponse(content={
+            "success": True,
+            "blueprint_id": blueprint_id,
+            "page_count": page_count
+        })
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Page inspection failed: {str(e)}")
+
+
+@app.get("/api/blueprints/{blueprint_id}/pages/{page}")
+async def blueprint_page_image(blueprint_id: str, page: int, dpi: Optional[int] = None):
+    """
+    PNG rendering of a single page, rendered on first request and cached
+    """
+    blueprint = find_blueprint(blueprint_id)
+    if not blueprint:
+        raise HTTPException(status_code=404, detail="Blueprint not found")
+    
+    try:
+        if not page_renderer.is_multi_page(blueprint["path"]):
+            page_renderer.check_page(page, 1)
+            return FileResponse(blueprint["path"], media_type=blueprint.get("mime_type"))
+        
+        path = await page_renderer.render_page(blueprint["path"], blueprint["content_hash"], page, dpi)
+        return FileResponse(path, media_type="image/png")
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Page rendering failed: {str(e)}")
+
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    """
+    Analysis and transcription cache hit/miss counters
+    """
+    return JSONResponse(content={
+        "success": True,
+        "cache": blueprint_analyzer.cache.get_stats(),
+        "transcription_cache": voice_handler.cache_stats(),
+        "speech_cache": voice_handler.speech_cache.stats
+    })
+
+
+@app.get("/api/model-stats")
+async def model_stats():
+    """
+    Model call scheduling: rate-limit budget and queue depth, retries, hedges, latency
+    """
+    return JSONResponse(content={
+        "success": True,
+        "provider": blueprint_analyzer.provider.settings(),
+        "scheduler": blueprint_analyzer.scheduler.get_stats(),
+        "http": model_clients.settings()
+    })
+
+
+@app.delete("/api/blueprints/{blueprint_id}")
+async def release_blueprint(blueprint_id: str):
+    """
+    Release one reference to a stored blueprint
+    """
+    if find_blueprint(blueprint_id) is None:
+        raise HTTPException(status_code=404, detail="Blueprint not found")
+    
+    removed = await blob_store.release(blueprint_id)
+    return JSONResponse(content={
+        "success": True,
+        "blueprint_id": blueprint_id,
+        "deleted": removed
+    })
+
+
+@app.get("/api/storage-stats")
+async def storage_stats():
+    """
+    Disk usage per storage area, quotas and retention counters
+    """
+    return JSONResponse(content={
+        "success": True,
+        "retention": await retention_manager.stats()
+    })
+
+
 @app.delete("/api/cleanup")
 async def cleanup_uploads():
     """
-    Clean up old upload files
+    Run a retention sweep now
+    Only expired or over-quota files are removed; blueprints in active sessions
+    or pending jobs are kept
     """
     try:
-        count = 0
-        for filename in os.listdir(UPLOAD_DIR):
-            file_path = os.path.join(UPLOAD_DIR, filename)
-            os.remove(file_path)
-            count += 1
+        report = await retention_manager.sweep()
         
         return JSONResponse(content={
             "success": True,
-            "files_deleted": count
+            "files_deleted": report["blobs_evicted"] + report["cache_files_evicted"] + report["temp_files_removed"],
+            **report
         })
     
     except Exception as e:
@@ -0,0 +1,94 @@
+#backend/model_clients.py
+import os
+import importlib.util
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from langchain_openai import ChatOpenAI
+from typing import Dict, Any, Optional
+
+
+class ModelClients:
+    """
+    One shared, tuned HTTP connection pool for every model API call
+    The chat model (LangChain), the async and sync OpenAI SDK clients all reuse it,
+    so keep-alive connections and TLS sessions survive across requests
+    """
+
+    def __init__(self):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.base_url = os.getenv("OPENAI_BASE_URL") or None
+
+        self.timeout = httpx.Timeout(
+            float(os.getenv("OPENAI_TIMEOUT", 120)),
+            connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", 10)),
+            pool=float(os.getenv("OPENAI_POOL_TIMEOUT", 30))
+        )
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", 20)),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+        )
+        # HTTP/2 multiplexes concurrent calls over one connection; needs the h2 package
+        self.http2 = os.getenv("HTTP2_ENABLED", "true").lower() == "true" and importlib.util.find_spec("h2") is not None
+        # SDK-level retries; off by default because the call scheduler retries with
+        # jittered backoff and rate-limit awareness (rate_limiter.CallScheduler)
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", 0))
+
+        self.http_async = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=self.http2)
+        self.http_sync = httpx.Client(timeout=self.timeout, limits=self.limits, http2=self.http2)
+
+        # SDK clients are built on first use, so offline model providers need no API key
+        self._openai_async: Optional[AsyncOpenAI] = None
+        self._openai_sync: Optional[OpenAI] = None
+        self._closed = False
+
+    @property
+    def openai_async(self) -> AsyncOpenAI:
+        if self._openai_async is None:
+            self._openai_async = AsyncOpenAI(
+                api_key=self.api_key, base_url=self.base_url, http_client=self.http_async, max_retries=self.max_retries
+            )
+        return self._openai_async
+
+    @property
+    def openai_sync(self) -> OpenAI:
+        if self._openai_sync is None:
+            self._openai_sync = OpenAI(
+                api_key=self.api_key, base_url=self.base_url, http_client=self.http_sync, max_retries=self.max_retries
+            )
+        return self._openai_sync
+
+    def chat_model(self, **kwargs) -> ChatOpenAI:
+        """A ChatOpenAI bound to the shared pool (kwargs: model, temperature, max_tokens, ...)"""
+        return ChatOpenAI(
+            openai_api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=self.http_sync,
+            http_async_client=self.http_async,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            # Usage on the last streamed chunk lets the rate limiter correct its token estimate
+            stream_usage=True,
+            **kwargs
+        )
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "timeout_s": self.timeout.read,
+            "connect_timeout_s": self.timeout.connect,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry_s": self.limits.keepalive_expiry,
+            "max_retries": self.max_retries,
+            "closed": self._closed
+        }
+
+    async def aclose(self):
+        """Close pooled connections (called once at application shutdown)"""
+        if self._closed:
+            return
+        self._closed = True
+        await self.http_async.aclose()
+        self.http_sync.close()
+
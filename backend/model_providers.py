@@ -0,0 +1,239 @@
+#backend/model_providers.py
+import os
+import json
+import random
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import httpx
+import openai
+from langchain_core.messages import AIMessage, AIMessageChunk
+from typing import Dict, Any, AsyncIterator, List, Optional, Type
+from model_clients import ModelClients
+from conversation_store import estimate_tokens
+
+
+class ModelProvider(ABC):
+    """
+    Interface for a chat-model backend
+    chat_model() returns an object with the LangChain calls the analyzer uses:
+    ainvoke(messages), astream(messages) and bind(**kwargs)
+    """
+    name = "base"
+
+    @abstractmethod
+    def chat_model(self, **kwargs):
+        """Build the chat model for the given LangChain settings (model, temperature, max_tokens)"""
+
+    def model_id(self, model: str) -> str:
+        """Model name reported in results and used in cache keys"""
+        return model
+
+    def settings(self) -> Dict[str, Any]:
+        return {"provider": self.name}
+
+
+class OpenAIProvider(ModelProvider):
+    """OpenAI chat completions via LangChain, on the shared connection pool"""
+    name = "openai"
+
+    def __init__(self, clients: ModelClients):
+        self.clients = clients
+
+    def chat_model(self, **kwargs):
+        return self.clients.chat_model(**kwargs)
+
+
+class FakeModelSettings:
+    """
+    Behaviour of the local stand-in model
+    Time to first token is log-normal around a median; output then streams at a fixed rate
+    """
+
+    def __init__(self):
+        self.seed = os.getenv("FAKE_MODEL_SEED", "0")
+        self.latency_median = float(os.getenv("FAKE_MODEL_LATENCY_MS", 800)) / 1000
+        self.latency_sigma = float(os.getenv("FAKE_MODEL_LATENCY_SIGMA", 0.5))
+        self.tokens_per_second = float(os.getenv("FAKE_MODEL_TOKENS_PER_SECOND", 60))
+        self.output_tokens = int(os.getenv("FAKE_MODEL_OUTPUT_TOKENS", 300))
+        # Fraction of calls that fail before producing output
+        self.rate_limit_rate = float(os.getenv("FAKE_MODEL_RATE_LIMIT_RATE", 0))
+        self.error_rate = float(os.getenv("FAKE_MODEL_ERROR_RATE", 0))
+        self.timeout_rate = float(os.getenv("FAKE_MODEL_TIMEOUT_RATE", 0))
+        self.retry_after = float(os.getenv("FAKE_MODEL_RETRY_AFTER", 1))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+FAKE_VOCABULARY = (
+    "bedroom bathroom kitchen living dining corridor closet stair wall door window "
+    "feet square area level plan north south east west layout egress column beam "
+    "the a with and of to on near adjacent approximately measures shows includes"
+).split()
+
+FAKE_STRUCTURE = {
+    "property_type": "residential",
+    "floors": 1,
+    "overall_length_ft": 48.0,
+    "overall_width_ft": 32.0,
+    "total_area_sqft": 1536.0,
+    "rooms": [
+        {"name": "Bedroom 1", "room_type": "bedroom", "length_ft": 14.0, "width_ft": 12.0},
+        {"name": "Bedroom 2", "room_type": "bedroom", "length_ft": 12.0, "width_ft": 11.0},
+        {"name": "Bath", "room_type": "bathroom", "length_ft": 9.0, "width_ft": 7.0},
+        {"name": "Kitchen", "room_type": "kitchen", "length_ft": 14.0, "width_ft": 10.0},
+        {"name": "Living Room", "room_type": "living", "length_ft": 20.0, "width_ft": 16.0}
+    ],
+    "doors": [{"opening_type": "single", "location": "Bedroom 1", "width_ft": 3.0, "count": 6}],
+    "windows": [{"opening_type": "casement", "location": "Living Room", "width_ft": 4.0, "count": 8}]
+}
+
+# Prompt tokens charged per image part (a 1024x1024 high-detail image)
+FAKE_IMAGE_TOKENS = 765
+
+
+def _fake_response(request: httpx.Request, status: int, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    return httpx.Response(status, request=request, headers=headers or {})
+
+
+class FakeChatModel:
+    """
+    Deterministic local stand-in for ChatOpenAI
+    Latency, output and injected failures are drawn from a RNG seeded with the
+    request content and attempt number, so a run is reproducible and a retried
+    request can succeed where the first attempt failed
+    """
+
+    def __init__(self, settings: FakeModelSettings, model: str, max_tokens: Optional[int] = None, **kwargs):
+        self.settings = settings
+        self.model = model
+        self.max_tokens = max_tokens
+        self.kwargs = kwargs
+        self._attempts: Dict[str, int] = {}
+
+    def bind(self, **kwargs) -> "FakeChatModel":
+        bound = FakeChatModel(self.settings, self.model, self.max_tokens, **{**self.kwargs, **kwargs})
+        bound._attempts = self._attempts
+        return bound
+
+    @staticmethod
+    def _prompt(messages: List[Any]):
+        """(prompt text, number of image parts)"""
+        text, images = [], 0
+        for message in messages:
+            if isinstance(message.content, str):
+                text.append(message.content)
+                continue
+            for part in message.content:
+                if part.get("type") == "text":
+                    text.append(part["text"])
+                elif part.get("type") == "image_url":
+                    images += 1
+        return "\n".join(text), images
+
+    def _plan(self, messages: List[Any]) -> Dict[str, Any]:
+        """Decide latency, failure and output for one call"""
+        prompt, images = self._prompt(messages)
+        digest = hashlib.sha256(f"{prompt}\n{images}\n{self.kwargs}".encode("utf-8")).hexdigest()
+        attempt = self._attempts.get(digest, 0)
+        self._attempts[digest] = attempt + 1
+        if len(self._attempts) > 10000:
+            self._attempts.clear()
+        rng = random.Random(f"{self.settings.seed}:{digest}:{attempt}")
+
+        failure = None
+        roll = rng.random()
+        for kind, rate in (
+            ("rate_limit", self.settings.rate_limit_rate),
+            ("server", self.settings.error_rate),
+            ("timeout", self.settings.timeout_rate)
+        ):
+            if roll < rate:
+                failure = kind
+                break
+            roll -= rate
+
+        if self.kwargs.get("response_format", {}).get("type") == "json_object":
+            words = json.dumps(FAKE_STRUCTURE).split(" ")
+            words = [word + " " for word in words[:-1]] + words[-1:]
+        else:
+            count = max(1, int(rng.gauss(self.settings.output_tokens, self.settings.output_tokens * 0.2)))
+            if self.max_tokens:
+                count = min(count, self.max_tokens)
+            words = [rng.choice(FAKE_VOCABULARY) + " " for _ in range(count)]
+
+        return {
+            "first_token_s": rng.lognormvariate(0, self.settings.latency_sigma) * self.settings.latency_median,
+            "token_s": 1 / self.settings.tokens_per_second if self.settings.tokens_per_second > 0 else 0,
+            "failure": failure,
+            "tokens": words,
+            "usage": {
+                "input_tokens": estimate_tokens(prompt) + images * FAKE_IMAGE_TOKENS,
+                "output_tokens": len(words)
+            }
+        }
+
+    def _raise(self, failure: str):
+        request = httpx.Request("POST", "http://fake-model.local/v1/chat/completions")
+        if failure == "rate_limit":
+            response = _fake_response(request, 429, {"retry-after": str(self.settings.retry_after)})
+            raise openai.RateLimitError("Rate limit reached (injected by fake model)", response=response, body=None)
+        if failure == "server":
+            raise openai.InternalServerError("Server error (injected by fake model)", response=_fake_response(request, 500), body=None)
+        raise openai.APITimeoutError(request=request)
+
+    def _usage(self, plan: Dict[str, Any]) -> Dict[str, int]:
+        usage = plan["usage"]
+        return {**usage, "total_tokens": usage["input_tokens"] + usage["output_tokens"]}
+
+    async def ainvoke(self, messages: List[Any], **kwargs) -> AIMessage:
+        plan = self._plan(messages)
+        await asyncio.sleep(plan["first_token_s"])
+        if plan["failure"]:
+            self._raise(plan["failure"])
+        await asyncio.sleep(plan["token_s"] * len(plan["tokens"]))
+        return AIMessage(content="".join(plan["tokens"]), usage_metadata=self._usage(plan))
+
+    async def astream(self, messages: List[Any], **kwargs) -> AsyncIterator[AIMessageChunk]:
+        plan = self._plan(messages)
+        await asyncio.sleep(plan["first_token_s"])
+        if plan["failure"]:
+            self._raise(plan["failure"])
+        for index, token in enumerate(plan["tokens"]):
+            if index:
+                await asyncio.sleep(plan["token_s"])
+            yield AIMessageChunk(content=token)
+        yield AIMessageChunk(content="", usage_metadata=self._usage(plan))
+
+
+class FakeProvider(ModelProvider):
+    """Offline stand-in for load testing: no network, no API key, no cost"""
+    name = "fake"
+
+    def __init__(self):
+        self.behaviour = FakeModelSettings()
+
+    def chat_model(self, **kwargs):
+        return FakeChatModel(self.behaviour, **kwargs)
+
+    def model_id(self, model: str) -> str:
+        # Keeps fake answers out of the cache entries of the real model
+        return f"fake:{model}"
+
+    def settings(self) -> Dict[str, Any]:
+        return {"provider": self.name, **self.behaviour.as_dict()}
+
+
+MODEL_PROVIDERS: Dict[str, Type[ModelProvider]] = {
+    OpenAIProvider.name: OpenAIProvider,
+    FakeProvider.name: FakeProvider
+}
+
+
+def create_provider(name: str, clients: ModelClients) -> ModelProvider:
+    if name not in MODEL_PROVIDERS:
+        raise ValueError(f"Unknown model provider '{name}' (choose from {', '.join(MODEL_PROVIDERS)})")
+    if name == "openai":
+        return OpenAIProvider(clients)
+    return MODEL_PROVIDERS[name]()
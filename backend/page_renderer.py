@@ -0,0 +1,145 @@
+#backend/page_renderer.py
+import os
+import uuid
+import asyncio
+import fitz  # PyMuPDF
+from PIL import Image
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+MULTI_PAGE_EXTENSIONS = {"pdf", "tif", "tiff"}
+
+
+class PageRenderer:
+    """
+    Lazily rasterize individual pages of multi-page PDF/TIFF blueprints
+    Only the requested page is rendered; output is cached by (hash, page, dpi)
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.getenv("PAGE_CACHE_DIR", os.path.join("cache", "pages"))
+        self.default_dpi = int(os.getenv("PAGE_RENDER_DPI", 150))
+        self.max_dpi = int(os.getenv("PAGE_RENDER_MAX_DPI", 300))
+        self.page_count_cache_size = int(os.getenv("PAGE_COUNT_CACHE_SIZE", 1024))
+
+        # Bounded LRU of page counts by content hash
+        self._page_counts: "OrderedDict[str, int]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def is_multi_page(path: str) -> bool:
+        return path.rsplit(".", 1)[-1].lower() in MULTI_PAGE_EXTENSIONS
+
+    @staticmethod
+    def _is_pdf(path: str) -> bool:
+        return path.lower().endswith(".pdf")
+
+    def _count_pages(self, path: str) -> int:
+        if self._is_pdf(path):
+            with fitz.open(path) as document:
+                return document.page_count
+        with Image.open(path) as image:
+            return getattr(image, "n_frames", 1)
+
+    async def page_count(self, path: str, content_hash: str) -> int:
+        """Number of pages, without rendering any of them"""
+        if content_hash in self._page_counts:
+            self._page_counts.move_to_end(content_hash)
+            return self._page_counts[content_hash]
+        count = await asyncio.to_thread(self._count_pages, path)
+        self._page_counts[content_hash] = count
+        while len(self._page_counts) > self.page_count_cache_size:
+            self._page_counts.popitem(last=False)
+        return count
+
+    @staticmethod
+    def check_page(page: int, count: int):
+        if page < 1 or page > count:
+            raise ValueError(f"Page {page} out of range (document has {count} pages)")
+
+    def clamp_dpi(self, dpi: Optional[int]) -> int:
+        return max(36, min(dpi or self.default_dpi, self.max_dpi))
+
+    @staticmethod
+    def page_hash(content_hash: str, page: int, dpi: int) -> str:
+        """
+        Stable key for a rendered page (used as the analyzer's cache key)
+        Prefixed with the document's content hash, like the page files themselves, so
+        retention finds preprocessed page output when the document is evicted
+        """
+        return f"{content_hash}_p{page}_{dpi}"
+
+    def _render(self, path: str, page: int, dpi: int, output_path: str):
+        temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        if self._is_pdf(path):
+            with fitz.open(path) as document:
+                pixmap = document.load_page(page - 1).get_pixmap(dpi=dpi)
+                pixmap.save(temp_path, output="png")
+        else:
+            with Image.open(path) as image:
+                image.seek(page - 1)
+                frame = image.copy()
+                # TIFF pages carry their own resolution; rescale to the target DPI
+                source_dpi = image.info.get("dpi", (dpi, dpi))[0] or dpi
+                if source_dpi and abs(source_dpi - dpi) > 1:
+                    scale = dpi / float(source_dpi)
+                    frame = frame.resize((max(int(frame.width * scale), 1), max(int(frame.height * scale), 1)), Image.LANCZOS)
+                if frame.mode not in ("L", "RGB"):
+                    frame = frame.convert("RGB")
+                frame.save(temp_path, format="PNG")
+        os.replace(temp_path, output_path)
+
+    async def render_page(self, path: str, content_hash: str, page: int, dpi: Optional[int] = None) -> str:
+        """
+        Return the path of a PNG rendering of one page (1-based), rendering it on first use
+        """
+        dpi = self.clamp_dpi(dpi)
+        self.check_page(page, await self.page_count(path, content_hash))
+
+        output_path = os.path.join(self.cache_dir, f"{content_hash}_p{page}_{dpi}.png")
+        if os.path.exists(output_path):
+            try:
+                os.utime(output_path)  # recency for retention
+            except OSError:
+                pass
+            return output_path
+
+        lock = self._locks.setdefault(output_path, asyncio.Lock())
+        async with lock:
+            if not os.path.exists(output_path):
+                await asyncio.to_thread(self._render, path, page, dpi, output_path)
+        self._locks.pop(output_path, None)
+        return output_path
+
+    async def resolve(self, blueprint: Dict[str, Any], page: Optional[int] = None, dpi: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Pick the image the analyzer should see for a stored blueprint
+        Multi-page PDF/TIFF files render only the requested page (default 1); a page
+        outside the document, including 0 or any page but 1 of a single image, is a ValueError
+        Returns path, image hash, conversation memory key, page and page count
+        """
+        if not self.is_multi_page(blueprint["path"]):
+            if page is not None:
+                self.check_page(page, 1)
+            return {
+                "path": blueprint["path"],
+                "image_hash": blueprint["content_hash"],
+                "memory_id": blueprint["blueprint_id"],
+                "page": None,
+                "page_count": 1
+            }
+
+        page = 1 if page is None else page
+        dpi = self.clamp_dpi(dpi)
+        path = await self.render_page(blueprint["path"], blueprint["content_hash"], page, dpi)
+        page_count = await self.page_count(blueprint["path"], blueprint["content_hash"])
+        return {
+            "path": path,
+            "image_hash": self.page_hash(blueprint["content_hash"], page, dpi),
+            # Each sheet of a set keeps its own analysis and conversation
+            "memory_id": f"{blueprint['blueprint_id']}#p{page}" if page_count > 1 else blueprint["blueprint_id"],
+            "page": page,
+            "page_count": page_count
+        }
@@ -0,0 +1,286 @@
+#backend/rate_limiter.py
+import os
+import math
+import time
+import random
+import asyncio
+import openai
+from collections import deque
+from typing import Dict, Any, AsyncIterator, Optional
+
+# Errors worth retrying: quota, timeouts, dropped connections and 5xx
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError
+)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return isinstance(error, openai.RateLimitError)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Server-suggested wait (Retry-After header) for a failed call, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token buckets for requests-per-minute and tokens-per-minute
+    Callers are admitted in FIFO order as soon as both budgets allow; a 429
+    drains the buckets so every waiter backs off together
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.waiting = 0
+        self.stats = {
+            "admitted": 0,
+            "throttled": 0,
+            "wait_s_total": 0.0,
+            "max_queue_depth": 0,
+            "tokens_estimated": 0,
+            "tokens_actual": 0
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _delay(self, tokens: int) -> float:
+        """Seconds until both buckets can cover one request of `tokens`"""
+        delay = max(0.0, self._paused_until - time.monotonic())
+        if self.rpm and self._requests < 1:
+            delay = max(delay, (1 - self._requests) * 60 / self.rpm)
+        if self.tpm and self._tokens < tokens:
+            delay = max(delay, (tokens - self._tokens) * 60 / self.tpm)
+        return delay
+
+    async def acquire(self, tokens: int):
+        """Wait for budget for one request of (estimated) `tokens`"""
+        if self.tpm:
+            tokens = min(tokens, self.tpm)  # a single oversized request must still be admissible
+        self.waiting += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.waiting)
+        started = time.monotonic()
+        try:
+            # Holding the lock while sleeping keeps admission first-come, first-served
+            async with self._lock:
+                while True:
+                    self._refill()
+                    delay = self._delay(tokens)
+                    if delay <= 0:
+                        break
+                    self.stats["throttled"] += 1
+                    await asyncio.sleep(delay)
+                self._requests -= 1
+                self._tokens -= tokens
+        finally:
+            self.waiting -= 1
+        self.stats["admitted"] += 1
+        self.stats["tokens_estimated"] += tokens
+        self.stats["wait_s_total"] += time.monotonic() - started
+
+    def reconcile(self, estimated: int, actual: Optional[int]):
+        """Charge the difference between estimated and reported token usage"""
+        if actual is None:
+            return
+        self.stats["tokens_actual"] += actual
+        if self.tpm:
+            self._tokens -= actual - min(estimated, self.tpm)
+
+    def penalize(self, delay: float):
+        """Back every caller off after a 429"""
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._requests = min(self._requests, 0.0)
+
+    def cooldown(self) -> int:
+        """Whole seconds until new requests would be admitted (a Retry-After hint for clients)"""
+        self._refill()
+        return max(1, math.ceil(self._delay(1)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            **self.stats,
+            "wait_s_total": round(self.stats["wait_s_total"], 3),
+            "queue_depth": self.waiting,
+            "rpm_limit": self.rpm,
+            "tpm_limit": self.tpm,
+            "requests_available": round(self._requests, 2),
+            "tokens_available": round(self._tokens)
+        }
+
+
+class CallScheduler:
+    """
+    Admission, retries and hedging for model calls
+    Every call goes through the rate limiter and the concurrency semaphore; failures
+    that are worth retrying back off exponentially with full jitter, and slow
+    non-streaming calls can be hedged with a duplicate request
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.limiter = RateLimiter(
+            rpm=int(os.getenv("OPENAI_RPM_LIMIT", 500)),
+            tpm=int(os.getenv("OPENAI_TPM_LIMIT", 300000))
+        )
+        self.max_retries = int(os.getenv("OPENAI_RETRIES", 4))
+        self.backoff_base = float(os.getenv("OPENAI_BACKOFF_BASE", 1.0))
+        self.backoff_max = float(os.getenv("OPENAI_BACKOFF_MAX", 30.0))
+        # Seconds before a slow call gets a duplicate request; 0 disables hedging
+        self.hedge_delay = float(os.getenv("OPENAI_HEDGE_DELAY", 0))
+
+        self.in_flight = 0
+        self._latencies = deque(maxlen=200)
+        self.stats = {
+            "calls": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "hedges": 0,
+            "hedge_wins": 0
+        }
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        suggested = retry_after(error)
+        if suggested is not None:
+            return min(suggested, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _handle_failure(self, attempt: int, error: BaseException):
+        """Sleep before the next attempt, or re-raise when out of attempts / not retryable"""
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt >= self.max_retries:
+            self.stats["failures"] += 1
+            if is_rate_limit_error(error):
+                self.stats["rate_limited"] += 1
+            raise error
+        delay = self._backoff(attempt, error)
+        if is_rate_limit_error(error):
+            self.stats["rate_limited"] += 1
+            self.limiter.penalize(delay)
+        self.stats["retries"] += 1
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _usage(response) -> Optional[int]:
+        usage = getattr(response, "usage_metadata", None)
+        return usage.get("total_tokens") if usage else None
+
+    async def _attempt(self, llm, messages, tokens: int):
+        await self.limiter.acquire(tokens)
+        async with self.semaphore:
+            self.in_flight += 1
+            started = time.monotonic()
+            try:
+                response = await llm.ainvoke(messages)
+            finally:
+                self.in_flight -= 1
+        self._latencies.append(time.monotonic() - started)
+        self.limiter.reconcile(tokens, self._usage(response))
+        return response
+
+    async def _hedged(self, llm, messages, tokens: int):
+        """Race a duplicate request against a slow primary; the first success wins"""
+        if not self.hedge_delay:
+            return await self._attempt(llm, messages, tokens)
+        primary = asyncio.create_task(self._attempt(llm, messages, tokens))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay)
+        if done:
+            return primary.result()
+
+        self.stats["hedges"] += 1
+        hedge = asyncio.create_task(self._attempt(llm, messages, tokens))
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def invoke(self, llm, messages, tokens: int):
+        """ainvoke with admission control, retries and optional hedging"""
+        self.stats["calls"] += 1
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(llm, messages, tokens)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._handle_failure(attempt, e)
+                attempt += 1
+
+    async def stream(self, llm, messages, tokens: int) -> AsyncIterator[Any]:
+        """
+        astream with admission control; failures before the first chunk are retried,
+        failures mid-stream are raised (the client has already seen partial output)
+        Usage reported on the final chunk corrects the token estimate
+        """
+        self.stats["calls"] += 1
+        attempt = 0
+        while True:
+            started_output = False
+            usage = None
+            try:
+                await self.limiter.acquire(tokens)
+                async with self.semaphore:
+                    self.in_flight += 1
+                    try:
+                        async for chunk in llm.astream(messages):
+                            started_output = True
+                            usage = self._usage(chunk) or usage
+                            yield chunk
+                    finally:
+                        self.in_flight -= 1
+                self.limiter.reconcile(tokens, usage)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if started_output:
+                    self.stats["failures"] += 1
+                    raise
+                await self._handle_failure(attempt, e)
+                attempt += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "latency_p50_s": round(latencies[len(latencies) // 2], 3) if latencies else None,
+            "latency_p95_s": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None,
+            "limiter": self.limiter.get_stats()
+        }
@@ -0,0 +1,235 @@
+#backend/retention_manager.py
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Set
+
+
+def scan_directory(directory: str) -> List[Dict[str, Any]]:
+    """Files directly inside a directory with size and modification time"""
+    files = []
+    if not os.path.isdir(directory):
+        return files
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files.append({"name": entry.name, "path": entry.path, "size": stat.st_size, "mtime": stat.st_mtime})
+            except FileNotFoundError:
+                continue
+    return files
+
+
+def remove_files(paths: List[str]) -> int:
+    """Delete files, ignoring ones that are already gone; returns bytes freed"""
+    freed = 0
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            freed += size
+        except FileNotFoundError:
+            continue
+    return freed
+
+
+class RetentionManager:
+    """
+    Background retention for uploads and derived caches
+    Blobs are evicted by age, then least-recently-used first until under quota,
+    never while a session or queued job still refers to them; derived cache
+    files (preprocessed images, page renders, speech clips) are swept the same way;
+    expired conversations and the memory of evicted blueprints are purged
+    """
+
+    # Staging/temp files written by the upload paths; anything this old is orphaned
+    TEMP_PREFIXES = (".staged_", ".upload_", ".batch_", "audio_")
+
+    def __init__(self, blob_store, conversation_store, job_queue, cache_dirs: Dict[str, str]):
+        self.blob_store = blob_store
+        self.conversation_store = conversation_store
+        self.job_queue = job_queue
+        self.cache_dirs = cache_dirs
+
+        self.max_upload_bytes = int(float(os.getenv("RETENTION_MAX_UPLOAD_MB", 2048)) * 1024 * 1024)
+        self.max_cache_bytes = int(float(os.getenv("RETENTION_MAX_CACHE_MB", 1024)) * 1024 * 1024)
+        self.max_age = float(os.getenv("RETENTION_MAX_AGE_DAYS", 30)) * 24 * 3600
+        self.min_age = float(os.getenv("RETENTION_MIN_AGE", 3600))
+        self.session_window = float(os.getenv("RETENTION_SESSION_WINDOW", 2 * 3600))
+        self.temp_max_age = float(os.getenv("RETENTION_TEMP_MAX_AGE", 3600))
+        self.interval = float(os.getenv("RETENTION_INTERVAL", 600))
+        self.batch_size = int(os.getenv("RETENTION_BATCH", 200))
+
+        self._sweep_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, Any] = {
+            "sweeps": 0,
+            "blobs_evicted": 0,
+            "cache_files_evicted": 0,
+            "temp_files_removed": 0,
+            "conversations_purged": 0,
+            "bytes_freed": 0,
+            "last_sweep_at": None,
+            "last_sweep_s": None,
+            "last_error": None,
+            "disk": {}
+        }
+
+    @staticmethod
+    def _timestamp(value: Optional[str]) -> float:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return 0.0
+
+    async def _protected(self) -> Set[str]:
+        """Blueprints an active conversation or a pending job still needs"""
+        sessions = await self.conversation_store.active_blueprints(self.session_window)
+        jobs = await self.job_queue.active_blueprints()
+        return sessions | jobs
+
+    async def _remove_in_batches(self, paths: List[str]) -> int:
+        freed = 0
+        for start in range(0, len(paths), self.batch_size):
+            freed += await asyncio.to_thread(remove_files, paths[start:start + self.batch_size])
+        return freed
+
+    async def _derived_files(self, content_hashes: Set[str]) -> List[str]:
+        """Cache files derived from the given blobs (named with the content hash as prefix)"""
+        paths = []
+        for directory in self.cache_dirs.values():
+            files = await asyncio.to_thread(scan_directory, directory)
+            paths.extend(item["path"] for item in files if item["name"].split("_", 1)[0] in content_hashes)
+        return paths
+
+    async def _sweep_blobs(self, now: float, report: Dict[str, Any]):
+        await asyncio.to_thread(self.blob_store.registry.flush_touches)
+        protected = await self._protected()
+
+        entries = sorted(self.blob_store.registry.all(), key=lambda entry: self._timestamp(entry["last_used"]))
+        total = sum(entry["size"] or 0 for entry in entries)
+        evicted_hashes = set()
+        evicted_ids = set()
+
+        for entry in entries:
+            last_used = self._timestamp(entry["last_used"])
+            if entry["blueprint_id"] in protected or now - last_used < self.min_age:
+                continue
+            expired = now - last_used > self.max_age
+            if not expired and total <= self.max_upload_bytes:
+                # Oldest first: once under quota, every remaining entry is newer and unexpired
+                break
+
+            if await self.blob_store.evict(entry["blueprint_id"]):
+                total -= entry["size"] or 0
+                report["blobs_evicted"] += 1
+                report["bytes_freed"] += entry["size"] or 0
+                evicted_hashes.add(entry["content_hash"])
+                evicted_ids.add(entry["blueprint_id"])
+                if report["blobs_evicted"] % self.batch_size == 0:
+                    await asyncio.sleep(0)
+
+        # Preprocessed images and page renders of evicted blobs are dead weight
+        if evicted_hashes:
+            derived = await self._derived_files(evicted_hashes)
+            report["cache_files_evicted"] += len(derived)
+            report["bytes_freed"] += await self._remove_in_batches(derived)
+
+        # Conversations and stored analyses of evicted blobs can never be used again
+        report["conversations_purged"] += await self.conversation_store.forget(evicted_ids)
+
+    async def _sweep_conversations(self, report: Dict[str, Any]):
+        report["conversations_purged"] += await self.conversation_store.purge_expired()
+
+    async def _sweep_temp_files(self, now: float, report: Dict[str, Any]):
+        files = await asyncio.to_thread(scan_directory, self.blob_store.root)
+        stale = [
+            item["path"] for item in files
+            if item["name"].startswith(self.TEMP_PREFIXES) and now - item["mtime"] > self.temp_max_age
+        ]
+        report["temp_files_removed"] += len(stale)
+        report["bytes_freed"] += await self._remove_in_batches(stale)
+
+    async def _sweep_caches(self, now: float, report: Dict[str, Any]):
+        files = []
+        for directory in self.cache_dirs.values():
+            files.extend(await asyncio.to_thread(scan_directory, directory))
+        files.sort(key=lambda item: item["mtime"])
+
+        total = sum(item["size"] for item in files)
+        doomed = []
+        for item in files:
+            if now - item["mtime"] <= self.max_age and total <= self.max_cache_bytes:
+                break
+            doomed.append(item["path"])
+            total -= item["size"]
+
+        report["cache_files_evicted"] += len(doomed)
+        report["bytes_freed"] += await self._remove_in_batches(doomed)
+
+    async def _measure(self) -> Dict[str, Any]:
+        disk = {}
+        for name, directory in {"uploads": self.blob_store.root, **self.cache_dirs}.items():
+            files = await asyncio.to_thread(scan_directory, directory)
+            disk[name] = {"files": len(files), "bytes": sum(item["size"] for item in files)}
+        disk["uploads"]["blueprints"] = len(self.blob_store.registry)
+        disk["uploads"]["quota_bytes"] = self.max_upload_bytes
+        disk["cache_quota_bytes"] = self.max_cache_bytes
+        return disk
+
+    async def sweep(self) -> Dict[str, Any]:
+        """
+        Run one retention pass; deletions happen in small batches off the event loop
+        Returns what was removed
+        """
+        async with self._sweep_lock:
+            started = time.monotonic()
+            now = time.time()
+            report = {
+                "blobs_evicted": 0,
+                "cache_files_evicted": 0,
+                "temp_files_removed": 0,
+                "conversations_purged": 0,
+                "bytes_freed": 0
+            }
+
+            await self._sweep_blobs(now, report)
+            await self._sweep_temp_files(now, report)
+            await self._sweep_caches(now, report)
+            await self._sweep_conversations(report)
+
+            for key, value in report.items():
+                self.metrics[key] += value
+            self.metrics["sweeps"] += 1
+            self.metrics["last_sweep_at"] = datetime.now().isoformat()
+            self.metrics["last_sweep_s"] = round(time.monotonic() - started, 3)
+            self.metrics["disk"] = await self._measure()
+            return report
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+                self.metrics["last_error"] = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics["last_error"] = str(e)
+                print(f"Retention sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def stats(self) -> Dict[str, Any]:
+        if not self.metrics["disk"]:
+            self.metrics["disk"] = await self._measure()
+        return dict(self.metrics)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
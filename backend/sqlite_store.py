@@ -0,0 +1,19 @@
+#backend/sqlite_store.py
+import os
+import sqlite3
+import threading
+from typing import Tuple
+
+
+def open_sqlite(db_path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+    """
+    Open a WAL-mode SQLite database shared by worker threads, creating its directory
+    Returns the connection and the lock that serializes access to it
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn, threading.Lock()
@@ -0,0 +1,20 @@
+#backend/tests/conftest.py
+import os
+import sys
+import pytest
+
+# Backend modules import each other as top-level modules (the server runs from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """Run every test offline, with its SQLite stores and caches in a fresh directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MODEL_PROVIDER", "fake")
+    monkeypatch.setenv("FAKE_MODEL_LATENCY_MS", "1")
+    monkeypatch.setenv("FAKE_MODEL_TOKENS_PER_SECOND", "0")
+    monkeypatch.setenv("FAKE_MODEL_OUTPUT_TOKENS", "20")
+    monkeypatch.setenv("FAKE_MODEL_RETRY_AFTER", "0.01")
+    monkeypatch.setenv("OPENAI_BACKOFF_BASE", "0.01")
+    return tmp_path
@@ -0,0 +1,74 @@
+#backend/tests/test_analysis_cache.py
+import asyncio
+import pytest
+import analysis_cache
+from analysis_cache import AnalysisCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 0.001  # every call strictly later, so LRU order is well defined
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache.time, "time", clock)
+    return clock
+
+
+def make_cache(monkeypatch, memory_size=256, disk_size=10000, ttl=3600) -> AnalysisCache:
+    monkeypatch.setenv("ANALYSIS_CACHE_MEMORY_SIZE", str(memory_size))
+    monkeypatch.setenv("ANALYSIS_CACHE_DISK_SIZE", str(disk_size))
+    monkeypatch.setenv("ANALYSIS_CACHE_TTL", str(ttl))
+    return AnalysisCache("analysis_cache.db")
+
+
+def test_key_ignores_case_and_whitespace(monkeypatch):
+    cache = make_cache(monkeypatch)
+    assert cache.make_key("abc", "How many  rooms?", "gpt-4o", 0.3) == cache.make_key("abc", " how many rooms? ", "gpt-4o", 0.3)
+    assert cache.make_key("abc", "How many rooms?", "gpt-4o", 0.3) != cache.make_key("abc", "How many rooms?", "gpt-4o", 0.5)
+
+
+def test_expired_entries_miss_in_both_tiers(monkeypatch, clock):
+    cache = make_cache(monkeypatch, ttl=60)
+    asyncio.run(cache.set("key", {"answer": "three bedrooms"}))
+    assert asyncio.run(cache.get("key")) == {"answer": "three bedrooms"}
+
+    clock.now += 61
+    assert asyncio.run(cache.get("key")) is None
+    stats = cache.get_stats()
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["disk_entries"] == 0
+
+
+def test_memory_tier_evicts_least_recently_used(monkeypatch, clock):
+    cache = make_cache(monkeypatch, memory_size=2)
+    asyncio.run(cache.set("a", {"answer": "a"}))
+    asyncio.run(cache.set("b", {"answer": "b"}))
+    asyncio.run(cache.get("a"))
+    asyncio.run(cache.set("c", {"answer": "c"}))
+
+    # "b" left memory but is still served from disk
+    assert asyncio.run(cache.get("b")) == {"answer": "b"}
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["disk_hits"] == 1
+
+
+def test_disk_tier_trims_least_recently_used(monkeypatch, clock):
+    cache = make_cache(monkeypatch, memory_size=0, disk_size=2)
+    asyncio.run(cache.set("a", {"answer": "a"}))
+    asyncio.run(cache.set("b", {"answer": "b"}))
+    asyncio.run(cache.get("a"))
+    asyncio.run(cache.set("c", {"answer": "c"}))
+
+    assert asyncio.run(cache.get("b")) is None
+    assert asyncio.run(cache.get("a")) == {"answer": "a"}
+    assert asyncio.run(cache.get("c")) == {"answer": "c"}
+    assert cache.get_stats()["disk_entries"] == 2
@@ -0,0 +1,90 @@
+#backend/tests/test_blob_store.py
+import os
+import asyncio
+import hashlib
+import pytest
+from blob_store import BlobStore
+from blueprint_registry import BlueprintRegistry
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+@pytest.fixture
+def store() -> BlobStore:
+    return BlobStore("uploads", BlueprintRegistry("blueprints.db"))
+
+
+def put(store: BlobStore, data: bytes, filename: str = "plan.png", split: int = 3) -> dict:
+    size = max(1, len(data) // split)
+    parts = [data[index:index + size] for index in range(0, len(data), size)]
+    return asyncio.run(store.put_chunks(chunks(*parts), filename))
+
+
+def test_identical_uploads_share_one_blob(store):
+    first = put(store, b"floor plan bytes", "a.png")
+    second = put(store, b"floor plan bytes", "copy of a.PNG", split=1)
+
+    assert first["blueprint_id"] == second["blueprint_id"] == hashlib.sha256(b"floor plan bytes").hexdigest()
+    assert first["deduplicated"] is False
+    assert second["deduplicated"] is True
+    assert second["ref_count"] == 2
+    assert first["path"].endswith(".png")
+    assert os.listdir("uploads") == [os.path.basename(first["path"])]
+
+
+def test_different_content_gets_its_own_blob(store):
+    first = put(store, b"ground floor")
+    second = put(store, b"first floor")
+    assert first["blueprint_id"] != second["blueprint_id"]
+    assert len(store.registry) == 2
+
+
+def test_unsafe_extensions_are_not_used_in_paths(store):
+    meta = put(store, b"data", "../../etc/passwd")
+    assert meta["path"] == os.path.join("uploads", f"blueprint_{meta['blueprint_id']}.bin")
+
+
+def test_release_deletes_only_the_last_reference(store):
+    meta = put(store, b"plan")
+    put(store, b"plan")
+
+    assert asyncio.run(store.release(meta["blueprint_id"])) is False
+    assert store.get(meta["blueprint_id"])["ref_count"] == 1
+    assert os.path.exists(meta["path"])
+
+    assert asyncio.run(store.release(meta["blueprint_id"])) is True
+    assert store.get(meta["blueprint_id"]) is None
+    assert not os.path.exists(meta["path"])
+    assert asyncio.run(store.release(meta["blueprint_id"])) is False
+
+
+def test_evict_ignores_references(store):
+    meta = put(store, b"plan")
+    put(store, b"plan")
+
+    assert asyncio.run(store.evict(meta["blueprint_id"])) is True
+    assert store.get(meta["blueprint_id"]) is None
+    assert not os.path.exists(meta["path"])
+
+
+def test_missing_file_is_stored_again(store):
+    meta = put(store, b"plan")
+    os.remove(meta["path"])
+
+    again = put(store, b"plan")
+    assert again["deduplicated"] is False
+    assert again["ref_count"] == 1
+    assert os.path.exists(again["path"])
+
+
+def test_concurrent_identical_uploads_deduplicate(store):
+    async def upload_many():
+        return await asyncio.gather(*(store.put_chunks(chunks(b"same", b" plan"), "p.png") for _ in range(5)))
+
+    results = asyncio.run(upload_many())
+    assert sorted(result["deduplicated"] for result in results) == [False] + [True] * 4
+    assert store.get(results[0]["blueprint_id"])["ref_count"] == 5
+    assert len(os.listdir("uploads")) == 1
@@ -0,0 +1,82 @@
+#backend/tests/test_blueprint_registry.py
+import os
+import hashlib
+from blueprint_registry import BlueprintRegistry
+
+
+def entry(blueprint_id: str, path: str = "uploads/plan.png", **fields) -> dict:
+    return {"blueprint_id": blueprint_id, "path": path, "content_hash": blueprint_id, "size": 10, **fields}
+
+
+def test_add_fills_defaults():
+    record = BlueprintRegistry("blueprints.db").add(entry("bp"))
+    assert record["mime_type"] == "image/png"
+    assert record["ref_count"] == 1
+    assert record["created_at"] == record["last_used"]
+
+
+def test_entries_survive_a_restart():
+    registry = BlueprintRegistry("blueprints.db")
+    registry.add(entry("bp", filename="plan.png"))
+    registry.update("bp", ref_count=3, unknown="ignored")
+
+    reopened = BlueprintRegistry("blueprints.db")
+    assert len(reopened) == 1
+    assert reopened.get("bp")["ref_count"] == 3
+    assert reopened.get("bp")["filename"] == "plan.png"
+
+
+def test_update_and_remove_missing_entries():
+    registry = BlueprintRegistry("blueprints.db")
+    assert registry.update("missing", ref_count=2) is None
+    assert registry.remove("missing") is None
+
+
+def test_touches_persist_only_when_flushed():
+    registry = BlueprintRegistry("blueprints.db")
+    registry.add(entry("bp", last_used="2020-01-01T00:00:00"))
+    registry.touch("bp")
+    registry.touch("missing")
+    touched = registry.get("bp")["last_used"]
+    assert touched > "2020-01-01T00:00:00"
+    assert BlueprintRegistry("blueprints.db").get("bp")["last_used"] == "2020-01-01T00:00:00"
+
+    assert registry.flush_touches() == 1
+    assert registry.flush_touches() == 0
+    assert BlueprintRegistry("blueprints.db").get("bp")["last_used"] == touched
+
+
+def test_prune_missing_drops_entries_without_files():
+    os.makedirs("uploads")
+    with open("uploads/kept.png", "wb") as f:
+        f.write(b"plan")
+    registry = BlueprintRegistry("blueprints.db")
+    registry.add(entry("kept", "uploads/kept.png"))
+    registry.add(entry("gone", "uploads/gone.png"))
+
+    assert registry.prune_missing() == 1
+    assert registry.get("gone") is None
+    assert registry.get("kept") is not None
+
+
+def test_import_directory_registers_legacy_files_once():
+    os.makedirs("uploads")
+    for name in ("blueprint_legacy.jpg", "notes.txt"):
+        with open(os.path.join("uploads", name), "wb") as f:
+            f.write(b"legacy plan")
+    registry = BlueprintRegistry("blueprints.db")
+
+    assert registry.import_directory("uploads") == 1
+    assert registry.import_directory("uploads") == 0
+    record = registry.get("legacy")
+    assert record["content_hash"] == hashlib.sha256(b"legacy plan").hexdigest()
+    assert record["mime_type"] == "image/jpeg"
+    assert record["size"] == len(b"legacy plan")
+
+
+def test_clear():
+    registry = BlueprintRegistry("blueprints.db")
+    registry.add(entry("bp"))
+    registry.clear()
+    assert len(registry) == 0
+    assert len(BlueprintRegistry("blueprints.db")) == 0
@@ -0,0 +1,100 @@
+#backend/tests/test_conversation_store.py
+import asyncio
+import pytest
+from conversation_store import ConversationStore, estimate_tokens
+
+
+@pytest.fixture
+def store(monkeypatch) -> ConversationStore:
+    monkeypatch.setenv("CONVERSATION_TOKEN_BUDGET", "100")
+    monkeypatch.setenv("CONVERSATION_ANALYSIS_BUDGET", "50")
+    monkeypatch.setenv("CONVERSATION_KEEP_RECENT", "2")
+    return ConversationStore("conversations.db")
+
+
+def add_turns(store: ConversationStore, blueprint_id: str, count: int, length: int = 40, session_id=None):
+    for index in range(count):
+        question = f"q{index} " + "x" * length
+        answer = f"a{index} " + "y" * length
+        asyncio.run(store.append_turn(blueprint_id, question, answer, session_id))
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abc") == 1
+    assert estimate_tokens("x" * 400) == 100
+
+
+def test_build_context_is_empty_without_history(store):
+    assert asyncio.run(store.build_context("bp")) is None
+
+
+def test_build_context_orders_sections_and_truncates_analysis(store):
+    asyncio.run(store.set_analysis("bp", "A" * 1000))
+    add_turns(store, "bp", 1, length=10)
+
+    context = asyncio.run(store.build_context("bp"))
+    analysis, recent = context.split("\n\n")
+    assert analysis.startswith("PRIOR COMPREHENSIVE ANALYSIS OF THIS BLUEPRINT:")
+    assert analysis.endswith("[...analysis truncated...]")
+    assert "A" * 200 in analysis and "A" * 201 not in analysis
+    assert recent.splitlines()[1].startswith("user: q0")
+    assert recent.splitlines()[2].startswith("assistant: a0")
+
+
+def test_build_context_keeps_newest_turns_within_budget(store):
+    add_turns(store, "bp", 5)
+    context = asyncio.run(store.build_context("bp"))
+
+    assert "a4" in context and "q4" in context
+    assert "q0" not in context
+    lines = context.splitlines()[1:]
+    assert sum(estimate_tokens(line) for line in lines) <= store.token_budget
+    assert lines[-1].startswith("assistant: a4")
+
+
+def test_sessions_are_separate(store):
+    add_turns(store, "bp", 1, session_id="alice")
+    assert asyncio.run(store.build_context("bp", "bob")) is None
+    assert "q0" in asyncio.run(store.build_context("bp", "alice"))
+
+
+def test_compact_folds_older_turns_into_summary(store):
+    add_turns(store, "bp", 4, length=80)
+    transcripts = []
+
+    async def summarizer(transcript: str) -> str:
+        transcripts.append(transcript)
+        return "Earlier: bedrooms discussed"
+
+    assert asyncio.run(store.compact("bp", summarizer)) is True
+    state = asyncio.run(store.get("bp"))
+    assert state["summary"] == "Earlier: bedrooms discussed"
+    assert [message["content"][:2] for message in state["messages"]] == ["q3", "a3"]
+    assert "q0" in transcripts[0] and "q3" not in transcripts[0]
+
+    context = asyncio.run(store.build_context("bp"))
+    assert "SUMMARY OF EARLIER CONVERSATION:\nEarlier: bedrooms discussed" in context
+
+
+def test_compact_skips_short_history(store):
+    add_turns(store, "bp", 1, length=10)
+
+    async def summarizer(transcript: str) -> str:
+        raise AssertionError("should not summarize")
+
+    assert asyncio.run(store.compact("bp", summarizer)) is False
+
+
+def test_forget_and_purge_expired(store):
+    add_turns(store, "bp", 1)
+    add_turns(store, "bp#p2", 1)
+    add_turns(store, "other", 1)
+    asyncio.run(store.set_analysis("bp", "analysis"))
+
+    assert asyncio.run(store.forget({"bp"})) == 3
+    assert asyncio.run(store.get("bp"))["analysis"] is None
+    assert asyncio.run(store.build_context("bp#p2")) is None
+
+    store.ttl = -1
+    assert asyncio.run(store.purge_expired()) == 1
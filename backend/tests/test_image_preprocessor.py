@@ -0,0 +1,111 @@
+#backend/tests/test_image_preprocessor.py
+import os
+import random
+import asyncio
+import pytest
+from PIL import Image, ImageDraw
+from image_preprocessor import ImagePreprocessor, InvalidImageError, image_tokens, vision_tokens
+
+
+def drawing(path: str, size=(4000, 3000), margin: int = 400) -> str:
+    """A line drawing on a white sheet with blank margins"""
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    draw.rectangle((margin, margin, width - margin, height - margin), outline="black", width=8)
+    draw.line((margin, margin, width - margin, height - margin), fill="black", width=8)
+    image.save(path)
+    return path
+
+
+def noisy_jpeg(path: str) -> str:
+    """A compact JPEG that a lossless re-encode cannot beat"""
+    rng = random.Random(0)
+    image = Image.new("L", (300, 300))
+    image.putdata([rng.randrange(256) for _ in range(300 * 300)])
+    image.save(path, format="JPEG", quality=20)
+    return path
+
+
+def test_vision_tokens():
+    assert vision_tokens(512, 512) == 85 + 170
+    assert vision_tokens(1024, 1024) == 85 + 170 * 4
+    assert vision_tokens(2048, 4096) == 85 + 170 * 6
+
+
+def test_drawing_is_cropped_grayscaled_and_resized():
+    result = ImagePreprocessor().process_file(drawing("plan.png"), "out")
+
+    assert result["preprocessed"] is True
+    assert result["passthrough"] is None
+    assert result["paths"] == ["out_0"]
+    assert result["processed_bytes"] < result["original_bytes"]
+    with Image.open("out_0") as image:
+        assert image.mode == "L"
+        assert min(image.size) == 768
+        assert image.size[0] > image.size[1]
+
+
+def test_compact_original_passes_through():
+    result = ImagePreprocessor().process_file(noisy_jpeg("scan.jpg"), "out")
+    assert result["passthrough"] == "smaller"
+    assert result["paths"] == ["scan.jpg"]
+    assert result["mime_type"] == "image/jpeg"
+    assert not os.path.exists("out_0")
+
+
+def test_disabled_preprocessing_passes_through(monkeypatch):
+    monkeypatch.setenv("PREPROCESS_ENABLED", "false")
+    result = asyncio.run(ImagePreprocessor().process(drawing("plan.png"), "hash"))
+    assert result["passthrough"] == "disabled"
+    assert result["paths"] == ["plan.png"]
+    assert result["mime_type"] is None
+
+
+def test_unreadable_files_raise():
+    with open("junk.png", "wb") as f:
+        f.write(b"not an image")
+    with pytest.raises(InvalidImageError):
+        ImagePreprocessor().process_file("junk.png", "out")
+    with pytest.raises(InvalidImageError):
+        image_tokens(["junk.png"])
+    with pytest.raises(FileNotFoundError):
+        ImagePreprocessor().process_file("missing.png", "out")
+
+
+def test_large_sheet_is_tiled(monkeypatch):
+    monkeypatch.setenv("PREPROCESS_TILING", "true")
+    monkeypatch.setenv("PREPROCESS_TILE_THRESHOLD", "1000")
+    monkeypatch.setenv("PREPROCESS_MAX_TILES", "4")
+    result = ImagePreprocessor().process_file(drawing("plan.png", size=(3000, 1500), margin=0), "out")
+
+    # Overview plus a 2x2 grid (3x2 would exceed max_tiles)
+    assert result["tiles"] == 5
+    assert result["paths"] == [f"out_{index}" for index in range(5)]
+
+
+def test_tiles_cover_the_sheet(monkeypatch):
+    monkeypatch.setenv("PREPROCESS_TILE_THRESHOLD", "1000")
+    monkeypatch.setenv("PREPROCESS_MAX_TILES", "4")
+    tiles = ImagePreprocessor()._tiles(Image.new("L", (3000, 1500)))
+    assert [tile.size for tile in tiles] == [(1500, 750)] * 4
+
+
+def test_output_is_cached_per_content_hash_and_settings(monkeypatch):
+    path = drawing("plan.png")
+    first = asyncio.run(ImagePreprocessor().process(path, "hash"))
+    assert asyncio.run(ImagePreprocessor().process(path, "hash")) == first
+
+    monkeypatch.setenv("PREPROCESS_MAX_SIDE", "1024")
+    monkeypatch.setenv("PREPROCESS_MIN_SIDE", "512")
+    resized = asyncio.run(ImagePreprocessor().process(path, "hash"))
+    assert resized["paths"] != first["paths"]
+    with Image.open(resized["paths"][0]) as image:
+        assert min(image.size) == 512
+
+
+def test_smaller_original_is_cached_too():
+    preprocessor = ImagePreprocessor()
+    path = noisy_jpeg("scan.jpg")
+    asyncio.run(preprocessor.process(path, "hash"))
+    assert asyncio.run(preprocessor.load_cached("hash"))["passthrough"] == "smaller"
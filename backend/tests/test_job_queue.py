@@ -0,0 +1,147 @@
+#backend/tests/test_job_queue.py
+import time
+import asyncio
+import pytest
+from job_queue import JobQueue
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setenv("JOB_WORKERS", "2")
+    monkeypatch.setenv("JOB_POLL_INTERVAL", "0.05")
+
+
+async def echo(params: dict) -> dict:
+    return {"answer": params["question"].upper()}
+
+
+async def fail(params: dict) -> dict:
+    raise RuntimeError("model unavailable")
+
+
+def make_queue() -> JobQueue:
+    queue = JobQueue("jobs.db")
+    queue.register("echo", echo)
+    queue.register("fail", fail)
+    return queue
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(make_queue().submit("analysis", {}))
+
+
+def test_jobs_run_and_persist_results():
+    async def scenario():
+        queue = make_queue()
+        await queue.start()
+        try:
+            done = await queue.submit("echo", {"question": "rooms?"})
+            failed = await queue.submit("fail", {})
+            return await queue.wait(done, 5), await queue.wait(failed, 5)
+        finally:
+            await queue.stop()
+
+    done, failed = asyncio.run(scenario())
+    assert done["status"] == "done"
+    assert done["result"] == {"answer": "ROOMS?"}
+    assert done["finished_at"] >= done["started_at"] >= done["created_at"]
+    assert failed["status"] == "failed"
+    assert failed["error"] == "model unavailable"
+    assert asyncio.run(make_queue().get(done["job_id"]))["result"] == {"answer": "ROOMS?"}
+
+
+def test_long_poll_returns_when_the_job_finishes():
+    release = None
+
+    async def slow(params: dict) -> dict:
+        await release.wait()
+        return {"ok": True}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        queue = make_queue()
+        queue.register("slow", slow)
+        # Far longer than the test: only the completion signal can end the wait early
+        queue.poll_interval = 10
+        await queue.start()
+        try:
+            job_id = await queue.submit("slow", {})
+            asyncio.get_running_loop().call_later(0.2, release.set)
+            started = time.monotonic()
+            job = await queue.wait(job_id, 30)
+            return job, time.monotonic() - started
+        finally:
+            await queue.stop()
+
+    job, elapsed = asyncio.run(scenario())
+    assert job["status"] == "done"
+    assert 0.15 < elapsed < 5
+
+
+def test_long_poll_times_out_with_the_current_status():
+    async def scenario():
+        queue = make_queue()  # no workers started
+        job_id = await queue.submit("echo", {"question": "rooms?"})
+        started = time.monotonic()
+        job = await queue.wait(job_id, 0.2)
+        return job, time.monotonic() - started
+
+    job, elapsed = asyncio.run(scenario())
+    assert job["status"] == "queued"
+    assert 0.2 <= elapsed < 2
+    assert asyncio.run(make_queue().wait("missing", 1)) is None
+
+
+def test_interrupted_jobs_are_requeued_on_start():
+    async def hang(params: dict) -> dict:
+        await asyncio.Event().wait()
+
+    async def interrupted():
+        queue = make_queue()
+        queue.register("echo", hang)
+        await queue.start()
+        job_id = await queue.submit("echo", {"question": "rooms?", "blueprint_id": "bp"})
+        while (await queue.get(job_id))["status"] != "running":
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return job_id, await queue.active_blueprints()
+
+    job_id, active = asyncio.run(interrupted())
+    assert asyncio.run(make_queue().get(job_id))["status"] == "running"
+    assert active == {"bp"}
+
+    async def restarted():
+        queue = make_queue()
+        await queue.start()
+        try:
+            return await queue.wait(job_id, 5), await queue.active_blueprints()
+        finally:
+            await queue.stop()
+
+    job, active = asyncio.run(restarted())
+    assert job["status"] == "done"
+    assert job["result"] == {"answer": "ROOMS?"}
+    assert active == set()
+
+
+def test_finished_jobs_expire_after_retention():
+    async def scenario():
+        queue = make_queue()
+        queue.retention = 0.5
+        await queue.start()
+        try:
+            old = await queue.submit("echo", {"question": "old"})
+            await queue.wait(old, 5)
+            await asyncio.sleep(0.6)
+            new = await queue.submit("echo", {"question": "new"})
+            await queue.wait(new, 5)
+            return await queue.get(old), await queue.get(new), await queue.stats()
+        finally:
+            await queue.stop()
+
+    old, new, stats = asyncio.run(scenario())
+    assert old is None
+    assert new["status"] == "done"
+    assert stats == {"workers": 2, "done": 1}
@@ -0,0 +1,108 @@
+#backend/tests/test_page_renderer.py
+import os
+import asyncio
+import pytest
+import fitz  # PyMuPDF
+from PIL import Image
+from page_renderer import PageRenderer
+
+
+def make_pdf(path: str, pages: int) -> str:
+    document = fitz.open()
+    for index in range(pages):
+        document.new_page(width=200, height=100).insert_text((20, 50), f"Sheet A-{index + 1}")
+    document.save(path)
+    document.close()
+    return path
+
+
+def make_tiff(path: str, pages: int) -> str:
+    frames = [Image.new("L", (100, 50), 255 - index * 40) for index in range(pages)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], dpi=(150, 150))
+    return path
+
+
+def blueprint(path: str, content_hash: str = "hash") -> dict:
+    return {"blueprint_id": content_hash, "path": path, "content_hash": content_hash}
+
+
+def test_multi_page_pdf_resolves_each_page_separately():
+    renderer = PageRenderer()
+    plan = blueprint(make_pdf("set.pdf", 3))
+
+    first = asyncio.run(renderer.resolve(plan))
+    second = asyncio.run(renderer.resolve(plan, page=2, dpi=72))
+    assert first["page"] == 1 and first["page_count"] == 3
+    assert first["memory_id"] == "hash#p1"
+    assert second["memory_id"] == "hash#p2"
+    assert second["image_hash"] == "hash_p2_72"
+    with Image.open(second["path"]) as image:
+        assert image.size == (200, 100)
+
+
+def test_single_page_document_keeps_the_blueprint_memory():
+    resolved = asyncio.run(PageRenderer().resolve(blueprint(make_pdf("sheet.pdf", 1))))
+    assert resolved["memory_id"] == "hash"
+    assert resolved["page_count"] == 1
+
+
+@pytest.mark.parametrize("page", [0, -1, 4])
+def test_pages_outside_the_document_are_rejected(page):
+    with pytest.raises(ValueError):
+        asyncio.run(PageRenderer().resolve(blueprint(make_pdf("set.pdf", 3)), page=page))
+
+
+def test_single_images_only_have_page_one():
+    Image.new("RGB", (10, 10)).save("plan.png")
+    renderer = PageRenderer()
+    plan = blueprint("plan.png")
+
+    assert asyncio.run(renderer.resolve(plan))["path"] == "plan.png"
+    assert asyncio.run(renderer.resolve(plan, page=1))["page"] is None
+    for page in (0, 2):
+        with pytest.raises(ValueError):
+            asyncio.run(renderer.resolve(plan, page=page))
+
+
+def test_tiff_frames_render_by_page():
+    renderer = PageRenderer()
+    resolved = asyncio.run(renderer.resolve(blueprint(make_tiff("set.tiff", 3)), page=3))
+    assert resolved["page_count"] == 3
+    with Image.open(resolved["path"]) as image:
+        assert image.getpixel((0, 0)) == 255 - 2 * 40
+
+
+def test_rendered_pages_are_reused(monkeypatch):
+    renderer = PageRenderer()
+    path = make_pdf("set.pdf", 2)
+    first = asyncio.run(renderer.render_page(path, "hash", 1))
+
+    def fail(*args):
+        raise AssertionError("page rendered twice")
+
+    monkeypatch.setattr(renderer, "_render", fail)
+    assert asyncio.run(renderer.render_page(path, "hash", 1)) == first
+
+
+def test_dpi_is_clamped(monkeypatch):
+    monkeypatch.setenv("PAGE_RENDER_MAX_DPI", "200")
+    renderer = PageRenderer()
+    assert renderer.clamp_dpi(None) == 150
+    assert renderer.clamp_dpi(10) == 36
+    assert renderer.clamp_dpi(600) == 200
+
+
+def test_page_count_cache_is_bounded(monkeypatch):
+    monkeypatch.setenv("PAGE_COUNT_CACHE_SIZE", "2")
+    renderer = PageRenderer()
+    paths = {name: make_pdf(f"{name}.pdf", 1) for name in ("a", "b", "c")}
+
+    asyncio.run(renderer.page_count(paths["a"], "a"))
+    asyncio.run(renderer.page_count(paths["b"], "b"))
+    asyncio.run(renderer.page_count(paths["a"], "a"))
+    asyncio.run(renderer.page_count(paths["c"], "c"))
+    assert list(renderer._page_counts) == ["a", "c"]
+
+    # Served from the cache while cached, even if the file is gone
+    os.remove(paths["a"])
+    assert asyncio.run(renderer.page_count(paths["a"], "a")) == 1
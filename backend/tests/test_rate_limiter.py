@@ -0,0 +1,155 @@
+#backend/tests/test_rate_limiter.py
+import time
+import asyncio
+import httpx
+import openai
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from rate_limiter import CallScheduler, RateLimiter
+from model_providers import FakeChatModel, FakeModelSettings
+
+MESSAGES = [HumanMessage(content="How many bedrooms does the plan show?")]
+
+
+def rate_limit_error(retry_after: str = "0.01") -> openai.RateLimitError:
+    request = httpx.Request("POST", "http://test.local/v1/chat/completions")
+    response = httpx.Response(429, request=request, headers={"retry-after": retry_after})
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+class ScriptedModel:
+    """Chat model double: each call raises or answers (after a delay) as scripted"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        delay, content = outcome
+        await asyncio.sleep(delay)
+        return AIMessage(content=content)
+
+
+def test_limiter_admits_within_budget():
+    limiter = RateLimiter(rpm=10, tpm=0)
+
+    async def admit_all():
+        for _ in range(10):
+            await limiter.acquire(100)
+
+    asyncio.run(admit_all())
+    stats = limiter.get_stats()
+    assert stats["admitted"] == 10
+    assert stats["throttled"] == 0
+
+
+def test_limiter_waits_for_token_budget():
+    limiter = RateLimiter(rpm=0, tpm=60000)  # refills 1000 tokens per second
+
+    async def admit_two():
+        await limiter.acquire(60000)
+        started = time.monotonic()
+        await limiter.acquire(100)
+        return time.monotonic() - started
+
+    assert asyncio.run(admit_two()) >= 0.08
+    assert limiter.stats["throttled"] >= 1
+
+
+def test_limiter_admits_oversized_request():
+    limiter = RateLimiter(rpm=0, tpm=1000)
+    asyncio.run(asyncio.wait_for(limiter.acquire(5000), timeout=1))
+    assert limiter.stats["tokens_estimated"] == 1000
+
+
+def test_limiter_reconcile_charges_the_difference():
+    limiter = RateLimiter(rpm=0, tpm=60000)
+    asyncio.run(limiter.acquire(1000))
+    limiter.reconcile(1000, 3000)
+    assert limiter.stats["tokens_actual"] == 3000
+    assert limiter.get_stats()["tokens_available"] < 58000  # 59000 had the estimate stood
+
+
+def test_penalize_holds_back_every_caller():
+    limiter = RateLimiter(rpm=600, tpm=0)
+    limiter.penalize(0.1)
+    assert limiter.cooldown() == 1
+
+    async def admit():
+        started = time.monotonic()
+        await limiter.acquire(1)
+        return time.monotonic() - started
+
+    assert asyncio.run(admit()) >= 0.09
+
+
+def test_invoke_retries_rate_limit_then_succeeds():
+    scheduler = CallScheduler(max_concurrency=4)
+    model = ScriptedModel([rate_limit_error(), (0, "three bedrooms")])
+
+    response = asyncio.run(scheduler.invoke(model, MESSAGES, 100))
+    assert response.content == "three bedrooms"
+    assert model.calls == 2
+    assert scheduler.stats["retries"] == 1
+    assert scheduler.stats["rate_limited"] == 1
+    assert scheduler.stats["failures"] == 0
+
+
+def test_invoke_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setenv("FAKE_MODEL_RATE_LIMIT_RATE", "1")
+    monkeypatch.setenv("OPENAI_RETRIES", "2")
+    scheduler = CallScheduler(max_concurrency=4)
+    model = FakeChatModel(FakeModelSettings(), "gpt-4o")
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(scheduler.invoke(model, MESSAGES, 100))
+    assert scheduler.stats["retries"] == 2
+    assert scheduler.stats["rate_limited"] == 3
+    assert scheduler.stats["failures"] == 1
+
+
+def test_invoke_does_not_retry_other_errors():
+    scheduler = CallScheduler(max_concurrency=4)
+    model = ScriptedModel([ValueError("bad request"), (0, "unused")])
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.invoke(model, MESSAGES, 100))
+    assert model.calls == 1
+    assert scheduler.stats["retries"] == 0
+
+
+def test_hedge_wins_over_slow_primary(monkeypatch):
+    monkeypatch.setenv("OPENAI_HEDGE_DELAY", "0.05")
+    scheduler = CallScheduler(max_concurrency=4)
+    model = ScriptedModel([(5, "slow"), (0, "fast")])
+
+    response = asyncio.run(asyncio.wait_for(scheduler.invoke(model, MESSAGES, 100), timeout=2))
+    assert response.content == "fast"
+    assert scheduler.stats["hedges"] == 1
+    assert scheduler.stats["hedge_wins"] == 1
+
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    monkeypatch.setenv("OPENAI_HEDGE_DELAY", "0.5")
+    scheduler = CallScheduler(max_concurrency=4)
+    model = ScriptedModel([(0, "fast")])
+
+    assert asyncio.run(scheduler.invoke(model, MESSAGES, 100)).content == "fast"
+    assert model.calls == 1
+    assert scheduler.stats["hedges"] == 0
+
+
+def test_stream_reconciles_reported_usage():
+    scheduler = CallScheduler(max_concurrency=4)
+    model = FakeChatModel(FakeModelSettings(), "gpt-4o")
+
+    async def consume():
+        return [chunk.content async for chunk in scheduler.stream(model, MESSAGES, 5000)]
+
+    text = "".join(asyncio.run(consume()))
+    assert text
+    assert 0 < scheduler.limiter.stats["tokens_actual"] < 5000
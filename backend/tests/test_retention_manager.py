@@ -0,0 +1,144 @@
+#backend/tests/test_retention_manager.py
+import os
+import time
+import asyncio
+import pytest
+from datetime import datetime
+from blob_store import BlobStore
+from blueprint_registry import BlueprintRegistry
+from conversation_store import ConversationStore
+from job_queue import JobQueue
+from page_renderer import PageRenderer
+from retention_manager import RetentionManager
+
+DAY = 24 * 3600
+CACHE_DIRS = {"preprocessed": "cache/preprocessed", "pages": "cache/pages", "speech": "cache/speech"}
+
+
+async def noop(params: dict) -> dict:
+    return {}
+
+
+@pytest.fixture
+def retention(monkeypatch) -> RetentionManager:
+    monkeypatch.setenv("RETENTION_MAX_AGE_DAYS", "30")
+    monkeypatch.setenv("RETENTION_MIN_AGE", "3600")
+    for directory in CACHE_DIRS.values():
+        os.makedirs(directory)
+    queue = JobQueue("jobs.db")
+    queue.register("analysis", noop)
+    return RetentionManager(
+        BlobStore("uploads", BlueprintRegistry("blueprints.db")),
+        ConversationStore("conversations.db"),
+        queue,
+        CACHE_DIRS
+    )
+
+
+async def chunks(data: bytes):
+    yield data
+
+
+def add_blob(retention: RetentionManager, data: bytes, age_days: float) -> dict:
+    meta = asyncio.run(retention.blob_store.put_chunks(chunks(data), "plan.pdf"))
+    last_used = datetime.fromtimestamp(time.time() - age_days * DAY).isoformat()
+    return retention.blob_store.registry.update(meta["blueprint_id"], last_used=last_used)
+
+
+def write(path: str, size: int = 10, age_days: float = 0) -> str:
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_expired_blob_is_evicted_with_its_derived_files(retention):
+    blob = add_blob(retention, b"old plan", age_days=40)
+    content_hash = blob["content_hash"]
+    page_hash = PageRenderer.page_hash(content_hash, 2, 150)
+    derived = [
+        write(f"cache/preprocessed/{content_hash}_png_g_2048_768_245_nt_0"),
+        write(f"cache/pages/{content_hash}_p2_150.png"),
+        # Preprocessed output of a rendered page is keyed by the page hash
+        write(f"cache/preprocessed/{page_hash}_png_g_2048_768_245_nt_0"),
+        write(f"cache/preprocessed/{page_hash}_png_g_2048_768_245_nt.json")
+    ]
+    unrelated = write("cache/pages/otherhash_p1_150.png")
+
+    report = asyncio.run(retention.sweep())
+
+    assert report["blobs_evicted"] == 1
+    assert report["cache_files_evicted"] == len(derived)
+    assert retention.blob_store.get(blob["blueprint_id"]) is None
+    assert not os.path.exists(blob["path"])
+    assert not any(os.path.exists(path) for path in derived)
+    assert os.path.exists(unrelated)
+
+
+def test_active_conversations_and_jobs_protect_blobs(retention):
+    talked = add_blob(retention, b"discussed plan", age_days=40)
+    queued = add_blob(retention, b"queued plan", age_days=40)
+    idle = add_blob(retention, b"idle plan", age_days=40)
+    asyncio.run(retention.conversation_store.append_turn(f"{talked['blueprint_id']}#p2", "Rooms?", "Three."))
+    asyncio.run(retention.job_queue.submit("analysis", {"blueprint_id": queued["blueprint_id"]}))
+
+    report = asyncio.run(retention.sweep())
+
+    assert report["blobs_evicted"] == 1
+    assert retention.blob_store.get(talked["blueprint_id"]) is not None
+    assert retention.blob_store.get(queued["blueprint_id"]) is not None
+    assert retention.blob_store.get(idle["blueprint_id"]) is None
+
+
+def test_least_recently_used_blobs_go_first_when_over_quota(retention):
+    add_blob(retention, b"a" * 100, age_days=3)
+    add_blob(retention, b"b" * 100, age_days=2)
+    newer = add_blob(retention, b"c" * 100, age_days=1)
+    recent = add_blob(retention, b"d" * 100, age_days=0)
+    retention.max_upload_bytes = 250
+
+    assert asyncio.run(retention.sweep())["blobs_evicted"] == 2
+    remaining = {entry["blueprint_id"] for entry in retention.blob_store.registry.all()}
+    assert remaining == {newer["blueprint_id"], recent["blueprint_id"]}
+
+    # Blobs used within the minimum age are kept even while over quota
+    retention.max_upload_bytes = 0
+    assert asyncio.run(retention.sweep())["blobs_evicted"] == 1
+    assert retention.blob_store.get(recent["blueprint_id"]) is not None
+
+
+def test_evicted_blueprints_lose_their_conversations(retention):
+    blob = add_blob(retention, b"old plan", age_days=40)
+    store = retention.conversation_store
+    asyncio.run(store.set_analysis(blob["blueprint_id"], "Three bedrooms"))
+    # Outside the session window, so it does not protect the blob
+    retention.session_window = -1
+
+    report = asyncio.run(retention.sweep())
+
+    assert report["conversations_purged"] == 1
+    assert asyncio.run(store.get(blob["blueprint_id"]))["analysis"] is None
+
+
+def test_stale_temp_files_and_cache_overflow_are_removed(retention):
+    stale = write("uploads/.staged_abc", age_days=1)
+    fresh = write("uploads/.upload_def.tmp")
+    kept_upload = write("uploads/notes.txt", age_days=1)
+    expired_cache = write("cache/speech/old.mp3", age_days=40)
+    old_cache = write("cache/speech/older.mp3", size=100, age_days=2)
+    new_cache = write("cache/speech/newer.mp3", size=100, age_days=1)
+    retention.max_cache_bytes = 150
+
+    report = asyncio.run(retention.sweep())
+
+    assert report["temp_files_removed"] == 1
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh) and os.path.exists(kept_upload)
+    assert report["cache_files_evicted"] == 2
+    assert not os.path.exists(expired_cache) and not os.path.exists(old_cache)
+    assert os.path.exists(new_cache)
+
+    stats = asyncio.run(retention.stats())
+    assert stats["sweeps"] == 1
+    assert stats["disk"]["speech"] == {"files": 1, "bytes": 100}
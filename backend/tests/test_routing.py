@@ -0,0 +1,46 @@
+#backend/tests/test_routing.py
+import pytest
+from ai_processor import BlueprintAnalyzer
+from model_clients import ModelClients
+
+CONTEXT = """PRIOR COMPREHENSIVE ANALYSIS OF THIS BLUEPRINT:
+The kitchen measures 14 ft x 10 ft and opens onto the living room.
+Bedroom 1 is 14 ft x 12 ft; bedroom 2 is 12 ft x 11 ft. Total area is 1,536 sq ft."""
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    # The chat model is built but never called
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+
+@pytest.fixture
+def analyzer() -> BlueprintAnalyzer:
+    return BlueprintAnalyzer(ModelClients())
+
+
+def test_covered_question_goes_to_text(analyzer):
+    assert analyzer.route_question("How large is the kitchen?", CONTEXT) == "text"
+    assert analyzer.route_question("What are the bedroom dimensions?", CONTEXT) == "text"
+
+
+def test_question_without_context_goes_to_vision(analyzer):
+    assert analyzer.route_question("How large is the kitchen?", None) == "vision"
+
+
+def test_vision_cues_go_to_vision(analyzer):
+    assert analyzer.route_question("Can you zoom in on the kitchen?", CONTEXT) == "vision"
+    assert analyzer.route_question("Please recount the bedrooms", CONTEXT) == "vision"
+
+
+def test_uncovered_topic_goes_to_vision(analyzer):
+    assert analyzer.route_question("Is there a garage or basement staircase?", CONTEXT) == "vision"
+
+
+def test_stopword_only_question_goes_to_vision(analyzer):
+    assert analyzer.route_question("Tell me more about that", CONTEXT) == "vision"
+
+
+def test_routing_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("TEXT_ROUTING_ENABLED", "false")
+    assert BlueprintAnalyzer(ModelClients()).route_question("How large is the kitchen?", CONTEXT) == "vision"
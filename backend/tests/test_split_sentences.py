@@ -0,0 +1,30 @@
+#backend/tests/test_split_sentences.py
+import pytest
+
+# voice_handler imports the speech engines at module level
+for module in ("speech_recognition", "pydub", "gtts"):
+    pytest.importorskip(module)
+
+from voice_handler import split_sentences
+
+
+def test_splits_on_sentence_punctuation():
+    assert split_sentences("Three bedrooms. Two baths! Is there a garage? No.") == [
+        "Three bedrooms.", "Two baths!", "Is there a garage?", "No."
+    ]
+
+
+def test_drops_markdown_and_list_markers():
+    text = "## **1. PROPERTY OVERVIEW**\n- Type: residential\n2. Area: 1,536 sq ft\n\n---\n| |"
+    assert split_sentences(text) == ["PROPERTY OVERVIEW", "Type: residential", "Area: 1,536 sq ft"]
+
+
+def test_keeps_decimal_dimensions_together():
+    assert split_sentences("The kitchen is 14.5 ft wide. It has two windows.") == [
+        "The kitchen is 14.5 ft wide.", "It has two windows."
+    ]
+
+
+def test_empty_text():
+    assert split_sentences("") == []
+    assert split_sentences("** --- **") == []
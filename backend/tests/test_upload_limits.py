@@ -0,0 +1,104 @@
+#backend/tests/test_upload_limits.py
+import io
+import os
+import asyncio
+import zipfile
+import pytest
+from fastapi import UploadFile
+from blob_store import BlobStore
+from blueprint_registry import BlueprintRegistry
+from batch_processor import BatchProcessor
+from page_renderer import PageRenderer
+from upload_stream import UploadTooLargeError, save_upload
+
+KB = 1024
+
+
+def upload(data: bytes, filename: str = "plan.png") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+def zipped(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def store() -> BlobStore:
+    store = BlobStore("uploads", BlueprintRegistry("blueprints.db"))
+    store.max_upload_bytes = 64 * KB
+    return store
+
+
+@pytest.fixture
+def batch(store) -> BatchProcessor:
+    batch = BatchProcessor(None, store, PageRenderer())
+    batch.max_unpacked_bytes = 100 * KB
+    return batch
+
+
+def test_save_upload_stops_at_the_limit_and_cleans_up():
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save_upload(upload(b"x" * (10 * KB + 1)), "clip.wav", 10 * KB))
+    assert os.listdir(".") == []
+
+    assert asyncio.run(save_upload(upload(b"x" * 10 * KB), "clip.wav", 10 * KB))["size"] == 10 * KB
+
+
+def test_oversized_upload_is_not_stored(store):
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(store.put_upload(upload(b"x" * (64 * KB + 1))))
+    assert len(store.registry) == 0
+    assert os.listdir("uploads") == []
+
+
+def test_zip_sheets_are_stored_individually(batch):
+    archive = zipped({"A-1.png": b"first", "sub/A-2.jpg": b"second", "notes.txt": b"skip", "__MACOSX/.A-1.png": b"skip"})
+    sheets = asyncio.run(batch.ingest([upload(archive, "set.zip")]))
+
+    assert [(name, page) for name, _, page in sheets] == [("A-1.png", None), ("A-2.jpg", None)]
+    # The spooled archive is removed once its sheets are stored
+    assert all(name.startswith("blueprint_") for name in os.listdir("uploads"))
+
+
+def test_zip_bomb_member_is_rejected(batch):
+    # Compresses to a few hundred bytes but inflates past the per-file limit
+    archive = zipped({"bomb.png": b"\0" * (10 * 64 * KB)})
+    assert len(archive) < 64 * KB
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(batch.ingest([upload(archive, "set.zip")]))
+    assert os.listdir("uploads") == []
+
+
+def test_unpacked_total_is_limited_across_archives(batch):
+    first = zipped({"A-1.png": b"1" * 60 * KB})
+    second = zipped({"A-2.png": b"2" * 60 * KB})
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(batch.ingest([upload(first, "one.zip"), upload(second, "two.zip")]))
+    # Nothing but the first archive's sheet is left behind
+    assert len(os.listdir("uploads")) == 1
+
+
+def test_sheet_count_is_capped(batch):
+    batch.max_sheets = 2
+    archive = zipped({f"A-{index}.png": f"sheet {index}".encode() for index in range(5)})
+    sheets = asyncio.run(batch.ingest([upload(archive, "set.zip"), upload(b"extra", "extra.png")]))
+    assert [name for name, _, _ in sheets] == ["A-0.png", "A-1.png"]
+
+
+def test_content_length_over_the_limit_is_refused_before_the_body():
+    for module in ("speech_recognition", "pydub", "gtts"):
+        pytest.importorskip(module)
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    limit = main.REQUEST_BODY_LIMITS["/api/transcribe-audio"] + main.FORM_OVERHEAD_BYTES
+    response = client.post("/api/transcribe-audio", content=b"", headers={"content-length": str(limit + 1)})
+    assert response.status_code == 413
+    assert "X-Request-ID" in response.headers
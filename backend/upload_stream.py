@@ -0,0 +1,102 @@
+#backend/upload_stream.py
+import os
+import uuid
+import base64
+import hashlib
+import aiofiles
+from typing import Dict, Any, AsyncIterator, Optional
+
+# Read/write granularity for uploads; a multiple of 3 so base64 chunks concatenate cleanly
+CHUNK_SIZE = 768 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds its configured size limit"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the {limit // (1024 * 1024)} MB limit")
+        self.limit = limit
+
+
+async def limit_chunks(chunks: AsyncIterator[bytes], max_bytes: Optional[int]) -> AsyncIterator[bytes]:
+    """
+    Pass chunks through, raising UploadTooLargeError as soon as more than max_bytes have gone by
+    """
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if max_bytes is not None and total > max_bytes:
+            raise UploadTooLargeError(max_bytes)
+        yield chunk
+
+
+async def _read_upload(upload, chunk_size: int) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def iter_upload(upload, max_bytes: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Yield an UploadFile's content chunk by chunk, enforcing max_bytes as it goes
+    """
+    return limit_chunks(_read_upload(upload, chunk_size), max_bytes)
+
+
+async def save_chunks(chunks: AsyncIterator[bytes], path: str) -> Dict[str, Any]:
+    """
+    Write chunks to path via a temp file and atomic rename, hashing as they arrive
+    Returns {"path", "size", "content_hash"}; nothing is left behind on failure
+    """
+    digest = hashlib.sha256()
+    size = 0
+    temp_path = os.path.join(os.path.dirname(path) or ".", f".upload_{uuid.uuid4().hex}.tmp")
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            async for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                await f.write(chunk)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return {"path": path, "size": size, "content_hash": digest.hexdigest()}
+
+
+async def save_upload(upload, path: str, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """Stream an UploadFile to disk without holding it in memory"""
+    return await save_chunks(iter_upload(upload, max_bytes), path)
+
+
+def hash_file(path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def base64_file(path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Base64-encode a file in chunks into a single preallocated buffer
+    The raw file is never held whole: peak memory is the encoded buffer plus the returned
+    string (about 2.7x the file size, versus about 3x for b64encode(read()).decode())
+    """
+    size = os.path.getsize(path)
+    encoded = bytearray(4 * ((size + 2) // 3))
+    offset = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            piece = base64.b64encode(chunk)
+            encoded[offset:offset + len(piece)] = piece
+            offset += len(piece)
+    if offset == len(encoded):
+        return encoded.decode("ascii")
+    # File shrank while being read: decode the written part without copying it first
+    with memoryview(encoded)[:offset] as written:
+        return str(written, "ascii")
@@ -1,49 +1,406 @@
 #backend/voice_handler.py
 import os
+import json
+import time
+import re
+import io
+import uuid
+import hashlib
+import asyncio
+import threading
+from abc import ABC, abstractmethod
 import speech_recognition as sr
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from gtts import gTTS
-from openai import OpenAI
+from gtts.lang import tts_langs
+from pydub import AudioSegment, effects
+from pydub.silence import detect_leading_silence
 from dotenv import load_dotenv
+from typing import Dict, Any, AsyncIterator, List, Optional, Type
+from upload_stream import hash_file
+from model_clients import ModelClients
 
 load_dotenv()
 
 
+class SpeechToTextBackend(ABC):
+    """
+    Interface for a transcription engine
+    Implementations are synchronous; VoiceHandler runs them on its worker pool
+    """
+    name = "base"
+    local = False
+
+    def load(self):
+        """Load models ahead of the first request (no-op for remote engines)"""
+
+    @abstractmethod
+    def transcribe(self, audio_path: str) -> str:
+        """Return the text spoken in the audio file"""
+
+
+class OpenAIWhisperBackend(SpeechToTextBackend):
+    """Remote Whisper via the OpenAI API"""
+    name = "openai"
+
+    def __init__(self, clients: ModelClients):
+        # Resolved per call: the shared pool is reopened on each application start
+        self.clients = clients
+        self.model = os.getenv("OPENAI_STT_MODEL", "whisper-1")
+        self.language = os.getenv("STT_LANGUAGE", "en")
+
+    def transcribe(self, audio_path: str) -> str:
+        with open(audio_path, "rb") as audio_file:
+            transcript = self.clients.openai_sync.audio.transcriptions.create(
+                model=self.model,
+                file=audio_file,
+                language=self.language
+            )
+        return transcript.text
+
+
+class GoogleSpeechBackend(SpeechToTextBackend):
+    """Google Speech Recognition (free web API) via SpeechRecognition"""
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio_path: str) -> str:
+        with sr.AudioFile(audio_path) as source:
+            audio = self.recognizer.record(source)
+        return self.recognizer.recognize_google(audio)
+
+
+class FasterWhisperBackend(SpeechToTextBackend):
+    """
+    Local CPU Whisper (CTranslate2, int8) - no network access needed
+    The model is loaded once and shared by all worker threads
+    """
+    name = "faster-whisper"
+    local = True
+
+    def __init__(self, workers: int = 1):
+        self.model_size = os.getenv("STT_LOCAL_MODEL", "base.en")
+        self.compute_type = os.getenv("STT_COMPUTE_TYPE", "int8")
+        self.cpu_threads = int(os.getenv("STT_CPU_THREADS", 0))
+        self.beam_size = int(os.getenv("STT_BEAM_SIZE", 1))
+        self.language = os.getenv("STT_LANGUAGE", "en")
+        self.workers = workers
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel  # optional: only needed when selected
+                self._model = WhisperModel(
+                    self.model_size,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.workers
+                )
+        return self._model
+
+    def transcribe(self, audio_path: str) -> str:
+        segments, _ = self.load().transcribe(audio_path, language=self.language, beam_size=self.beam_size)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+class VoskBackend(SpeechToTextBackend):
+    """
+    Local Kaldi-based recognizer (small footprint, fully offline)
+    Requires a model directory from https://alphacephei.com/vosk/models
+    """
+    name = "vosk"
+    local = True
+
+    def __init__(self, sample_rate: int = 16000):
+        self.model_path = os.getenv("STT_VOSK_MODEL_PATH", os.path.join("models", "vosk-model-small-en-us-0.15"))
+        self.sample_rate = sample_rate
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._model is None:
+                import vosk  # optional: only needed when selected
+                vosk.SetLogLevel(-1)
+                self._model = vosk.Model(self.model_path)
+        return self._model
+
+    def transcribe(self, audio_path: str) -> str:
+        import vosk
+        audio = AudioSegment.from_file(audio_path).set_channels(1).set_frame_rate(self.sample_rate).set_sample_width(2)
+        recognizer = vosk.KaldiRecognizer(self.load(), self.sample_rate)
+        pcm = audio.raw_data
+        step = self.sample_rate * 2  # one second of 16-bit audio
+        for offset in range(0, len(pcm), step):
+            recognizer.AcceptWaveform(pcm[offset:offset + step])
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+class FakeSpeechBackend(SpeechToTextBackend):
+    """
+    Offline stand-in for load testing: holds a worker for a fixed time and returns a fixed question
+    """
+    name = "fake"
+    local = True
+
+    def __init__(self):
+        self.latency = float(os.getenv("FAKE_STT_LATENCY_MS", 300)) / 1000
+        self.transcript = os.getenv("FAKE_STT_TRANSCRIPT", "How many bedrooms are shown on this plan?")
+
+    def transcribe(self, audio_path: str) -> str:
+        time.sleep(self.latency)
+        return self.transcript
+
+
+STT_BACKENDS: Dict[str, Type[SpeechToTextBackend]] = {
+    backend.name: backend
+    for backend in (OpenAIWhisperBackend, GoogleSpeechBackend, FasterWhisperBackend, VoskBackend, FakeSpeechBackend)
+}
+
+
+class TranscriptionCache:
+    """
+    Bounded in-memory LRU of transcripts keyed by audio fingerprint
+    Repeated spoken quick questions skip the STT engine entirely
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size if max_size is not None else int(os.getenv("VOICE_CACHE_SIZE", 512))
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return text
+
+    def set(self, key: str, text: str):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            self.stats["writes"] += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+            }
+
+
+class SpeechCache:
+    """
+    Synthesized MP3 clips on disk, keyed by (text hash, voice, lang)
+    Sentences are cached individually and whole texts once fully synthesized
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.getenv("TTS_CACHE_DIR", os.path.join("cache", "tts"))
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, voice: str, lang: str) -> str:
+        text_hash = hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{text_hash}:{voice}:{lang}".encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        if os.path.exists(path):
+            self.stats["hits"] += 1
+            try:
+                os.utime(path)  # recency for retention
+            except OSError:
+                pass
+            return path
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, data: bytes) -> str:
+        path = self.path(key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        self.stats["writes"] += 1
+        return path
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Break (markdown) analysis text into speakable sentences
+    Formatting marks are dropped; list items and headings become their own sentences
+    """
+    text = re.sub(r"[*_`#>|]+", " ", text)
+    sentences = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:[-•]|\d+\.)\s+", "", line).strip()
+        if not re.search(r"\w", line):
+            continue
+        sentences.extend(part.strip() for part in re.split(r"(?<=[.!?])\s+", line) if re.search(r"\w", part))
+    return sentences
+
+
 class VoiceHandler:
     """
     Handle voice input/output for blueprint analysis
     """
     
-    def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, clients: ModelClients):
+        self.clients = clients
         self.recognizer = sr.Recognizer()
+        
+        # Blocking STT calls run here so they never stall the event loop
+        self.max_workers = int(os.getenv("VOICE_MAX_WORKERS", 4))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stt")
+        
+        # Normalization: mono, 16 kHz, trimmed silence, FLAC (accepted by Whisper and Google)
+        self.normalize = os.getenv("VOICE_NORMALIZE", "true").lower() == "true"
+        self.sample_rate = int(os.getenv("VOICE_SAMPLE_RATE", 16000))
+        self.silence_threshold = float(os.getenv("VOICE_SILENCE_THRESHOLD", -40.0))
+        
+        # Pluggable engines: remote Whisper by default, local CPU models for offline rooms
+        self.backend = self.create_backend(os.getenv("STT_BACKEND", "openai"))
+        fallback = os.getenv("STT_FALLBACK", "google" if self.backend.name == "openai" else "none")
+        self.fallback = self.create_backend(fallback) if fallback != "none" else None
+        
+        # Transcripts keyed by a hash of the normalized samples
+        self.cache = TranscriptionCache()
+        
+        # Spoken analyses: synthesized a sentence at a time, a few sentences ahead of playback
+        self.speech_cache = SpeechCache()
+        self.tts_prefetch = int(os.getenv("TTS_PREFETCH", 2))
+        self.tts_languages = tts_langs()
+        # Synthesis has its own pool so TTS streams can never starve transcription
+        self.tts_workers = int(os.getenv("TTS_MAX_WORKERS", 2))
+        self._tts_executor = ThreadPoolExecutor(max_workers=self.tts_workers, thread_name_prefix="tts")
+    
+    def create_backend(self, name: str) -> SpeechToTextBackend:
+        if name not in STT_BACKENDS:
+            raise ValueError(f"Unknown STT backend '{name}' (choose from {', '.join(STT_BACKENDS)})")
+        if name == "faster-whisper":
+            return FasterWhisperBackend(workers=self.max_workers)
+        if name == "vosk":
+            return VoskBackend(sample_rate=self.sample_rate)
+        if name == "openai":
+            return OpenAIWhisperBackend(self.clients)
+        return STT_BACKENDS[name]()
+    
+    async def warm_up(self):
+        """Load local models once at startup so the first request does not pay for it"""
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        await loop.run_in_executor(self._executor, self.backend.load)
+        if self.backend.local:
+            print(f"STT backend '{self.backend.name}' loaded in {time.monotonic() - started:.1f}s")
+    
+    def normalized_segment(self, audio_path: str) -> AudioSegment:
+        """Downmix, resample, trim leading/trailing silence and normalize loudness"""
+        audio = AudioSegment.from_file(audio_path)
+        audio = audio.set_channels(1).set_frame_rate(self.sample_rate).set_sample_width(2)
+        
+        start = detect_leading_silence(audio, silence_threshold=self.silence_threshold)
+        end = len(audio) - detect_leading_silence(audio.reverse(), silence_threshold=self.silence_threshold)
+        if end - start > 200:  # keep the clip if it is (almost) all silence
+            audio = audio[start:end]
+        return effects.normalize(audio)
+    
+    @staticmethod
+    def export_normalized(audio_path: str, audio: AudioSegment) -> str:
+        """Write a normalized segment next to its source as FLAC and return the new path"""
+        output_path = f"{os.path.splitext(audio_path)[0]}.norm.flac"
+        audio.export(output_path, format="flac")
+        return output_path
+    
+    def _normalize_and_transcribe(self, audio_path: str) -> str:
+        audio = None
+        if self.normalize:
+            try:
+                audio = self.normalized_segment(audio_path)
+            except Exception as e:
+                print(f"Audio normalization skipped: {e}")
+        
+        # Fingerprint the normalized samples so container/encoder differences and
+        # leading/trailing silence do not defeat the cache
+        if audio is not None:
+            fingerprint = hashlib.sha256(audio.raw_data).hexdigest()
+        else:
+            fingerprint = hash_file(audio_path)
+        cache_key = f"{self.backend.name}:{fingerprint}"
+        
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        normalized_path = audio_path
+        try:
+            if audio is not None:
+                normalized_path = self.export_normalized(audio_path, audio)
+            text = self.transcribe_audio(normalized_path)
+        finally:
+            if normalized_path != audio_path and os.path.exists(normalized_path):
+                os.remove(normalized_path)
+        
+        self.cache.set(cache_key, text)
+        return text
+    
+    async def transcribe(self, audio_path: str) -> str:
+        """
+        Normalize and transcribe on the worker pool (at most max_workers at once)
+        Clips whose normalized audio was seen before are answered from the cache
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._normalize_and_transcribe, audio_path)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend.name, **self.cache.get_stats()}
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._tts_executor.shutdown(wait=False, cancel_futures=True)
     
     def transcribe_audio(self, audio_path: str) -> str:
         """
-        Transcribe audio file to text using OpenAI Whisper
+        Transcribe audio file to text with the configured backend (and fallback)
         """
         try:
-            with open(audio_path, "rb") as audio_file:
-                transcript = self.openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="en"
-                )
-            return transcript.text
+            return self.backend.transcribe(audio_path)
         
         except Exception as e:
-            print(f"OpenAI Whisper error: {e}")
-            # Fallback to Google Speech Recognition
-            return self.transcribe_with_google(audio_path)
-    
-    def transcribe_with_google(self, audio_path: str) -> str:
-        """
-        Fallback transcription using Google Speech Recognition
-        """
+            if self.fallback is None:
+                raise Exception(f"Transcription failed: {str(e)}")
+            print(f"{self.backend.name} transcription error: {e}")
+        
         try:
-            with sr.AudioFile(audio_path) as source:
-                audio = self.recognizer.record(source)
-                text = self.recognizer.recognize_google(audio)
-                return text
+            return self.fallback.transcribe(audio_path)
         
         except Exception as e:
             raise Exception(f"Transcription failed: {str(e)}")
@@ -60,6 +417,54 @@ class VoiceHandler:
         except Exception as e:
             raise Exception(f"Text-to-speech failed: {str(e)}")
     
+    def synthesize(self, text: str, voice: str = "com", lang: str = "en") -> bytes:
+        """
+        MP3 bytes for one sentence, from the cache when this (text, voice, lang) was spoken before
+        voice is the gTTS accent (Google domain), e.g. com, co.uk, com.au
+        """
+        key = self.speech_cache.make_key(text, voice, lang)
+        path = self.speech_cache.get(key)
+        if path is not None:
+            with open(path, "rb") as f:
+                return f.read()
+        
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=lang, tld=voice, slow=False).write_to_fp(buffer)
+        data = buffer.getvalue()
+        self.speech_cache.put(key, data)
+        return data
+    
+    def cached_speech(self, text: str, voice: str = "com", lang: str = "en") -> Optional[str]:
+        """Path of the complete clip for text if it has been synthesized before"""
+        return self.speech_cache.get(self.speech_cache.make_key(text, voice, lang))
+    
+    async def stream_speech(self, text: str, voice: str = "com", lang: str = "en") -> AsyncIterator[bytes]:
+        """
+        Yield MP3 audio sentence by sentence as it is synthesized
+        Up to tts_prefetch sentences are synthesized ahead on the TTS pool;
+        the complete clip is cached once every sentence has been produced
+        """
+        loop = asyncio.get_running_loop()
+        sentences = split_sentences(text)
+        pending: List[asyncio.Future] = []
+        produced = []
+        next_index = 0
+        try:
+            while next_index < len(sentences) or pending:
+                while next_index < len(sentences) and len(pending) <= self.tts_prefetch:
+                    pending.append(loop.run_in_executor(self._tts_executor, self.synthesize, sentences[next_index], voice, lang))
+                    next_index += 1
+                chunk = await pending.pop(0)
+                produced.append(chunk)
+                yield chunk
+        finally:
+            for future in pending:
+                future.cancel()
+        
+        if produced:
+            key = self.speech_cache.make_key(text, voice, lang)
+            await loop.run_in_executor(self._tts_executor, self.speech_cache.put, key, b"".join(produced))
+    
     def record_audio_from_microphone(self, duration: int = 10) -> str:
         """
         Record audio from microphone (for future use if needed)
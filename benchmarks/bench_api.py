@@ -0,0 +1,416 @@
+# benchmarks/bench_api.py
+"""
+End-to-end API load benchmark against the offline model stand-in
+
+    python benchmarks/bench_api.py --concurrency 4 16 --requests 64 --json api.json
+    python benchmarks/bench_api.py --json api.json --baseline previous.json
+
+The backend is started in a child process with MODEL_PROVIDER=fake and STT_BACKEND=fake
+(no network, no API key) in a scratch working directory, then /api/analyze-blueprint,
+/api/ask-followup and /api/transcribe-audio are driven by concurrent clients over HTTP.
+Blueprints come from backend/uploads; audio clips are synthesized (one unique clip per request).
+
+Per endpoint and concurrency level: p50/p95/p99 latency, throughput and errors, plus the
+server's event-loop lag and peak RSS. With --baseline, exits non-zero when p95 latency or
+throughput regressed by more than --tolerance.
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import wave
+import array
+import shutil
+import random
+import signal
+import socket
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, "..", "backend")
+SAMPLES_DIR = os.path.join(BACKEND_DIR, "uploads")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".pdf", ".tif", ".tiff")
+
+# Child-process defaults; anything set in the environment or via --env wins
+SERVER_ENV = {
+    "MODEL_PROVIDER": "fake",
+    "STT_BACKEND": "fake",
+    "STT_FALLBACK": "none",
+    "RETENTION_INTERVAL": "86400"
+}
+
+ENDPOINTS = ("analyze", "followup", "transcribe")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# ---------------------------------------------------------------------------
+# Server side (runs in the child process)
+# ---------------------------------------------------------------------------
+
+def memory_mb():
+    """(current RSS, peak RSS) of this process in MB"""
+    current = peak = None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return current, peak
+
+
+def reset_peak_memory():
+    """Reset the kernel's peak-RSS counter (Linux); elsewhere peak RSS is process-lifetime"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires, i.e. how long the event loop was blocked"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+
+    async def run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def report(self, reset: bool):
+        samples = self.samples
+        if reset:
+            self.samples = []
+        if not samples:
+            return {"samples": 0}
+        return {
+            "samples": len(samples),
+            "lag_p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "lag_p99_ms": round(percentile(samples, 99) * 1000, 2),
+            "lag_max_ms": round(max(samples) * 1000, 2)
+        }
+
+
+def serve(port: int):
+    sys.path.insert(0, BACKEND_DIR)
+    import uvicorn
+    from main import app
+
+    monitor = LoopLagMonitor()
+
+    async def bench_metrics(reset: bool = False):
+        lag = monitor.report(reset)
+        current, peak = memory_mb()
+        if reset:
+            reset_peak_memory()
+        return {
+            **lag,
+            "rss_mb": round(current, 1) if current is not None else None,
+            "peak_rss_mb": round(peak, 1) if peak is not None else None
+        }
+
+    app.add_api_route("/__bench/metrics", bench_metrics, methods=["GET"])
+
+    async def run():
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        lag_task = asyncio.create_task(monitor.run())
+        try:
+            await server.serve()
+        finally:
+            lag_task.cancel()
+
+    asyncio.run(run())
+
+
+# ---------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def synth_clip(seed: int, seconds: float = 1.5, sample_rate: int = 16000) -> bytes:
+    """A short WAV tone with noise; the seed makes every clip distinct (no transcription cache hits)"""
+    rng = random.Random(seed)
+    frequency = 200 + rng.random() * 600
+    samples = array.array("h", (
+        int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate) + rng.gauss(0, 300))
+        for i in range(int(seconds * sample_rate))
+    ))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(sample_rate)
+        clip.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def load_samples(directory: str):
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(directory, name), "rb") as f:
+                samples.append((name, f.read()))
+    return samples
+
+
+def server_settings(overrides: dict) -> dict:
+    return {**{key: os.environ.get(key, value) for key, value in SERVER_ENV.items()}, **overrides}
+
+
+def start_server(port: int, workdir: str, settings: dict) -> subprocess.Popen:
+    # Server output goes to a log file; a pipe nobody drains would eventually block the server
+    log = open(os.path.join(workdir, "server.log"), "wb")
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port)],
+        cwd=workdir, env={**os.environ, **settings}, stdout=log, stderr=subprocess.STDOUT
+    )
+    server.log_path = log.name
+    log.close()
+    return server
+
+
+async def wait_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            with open(server.log_path, errors="replace") as f:
+                raise RuntimeError(f"Server exited during startup:\n{f.read()}")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("Server did not become ready in time")
+
+
+class Workload:
+    """Builds one request per index for each endpoint"""
+
+    def __init__(self, samples, blueprint_ids, question: str, unique: bool):
+        self.samples = samples
+        self.blueprint_ids = blueprint_ids
+        self.question = question
+        self.unique = unique
+
+    def _question(self, index: int) -> str:
+        # Unique questions defeat the analysis cache so every request reaches the model
+        return f"{self.question} (request {index})" if self.unique else self.question
+
+    async def send(self, client: httpx.AsyncClient, endpoint: str, index: int, worker: int) -> httpx.Response:
+        if endpoint == "analyze":
+            name, content = self.samples[index % len(self.samples)]
+            return await client.post(
+                "/api/analyze-blueprint",
+                files={"file": (name, content)},
+                data={"question": self._question(index), "auto_analyze": "false"}
+            )
+        if endpoint == "followup":
+            return await client.post("/api/ask-followup", data={
+                "blueprint_id": self.blueprint_ids[index % len(self.blueprint_ids)],
+                "question": self._question(index),
+                "session_id": f"bench-{worker}"
+            })
+        clip = synth_clip(index if self.unique else 0)
+        return await client.post("/api/transcribe-audio", files={"audio": (f"clip_{index}.wav", clip, "audio/wav")})
+
+
+async def run_scenario(client, workload: Workload, endpoint: str, concurrency: int, requests: int, offset: int):
+    latencies, statuses = [], {}
+    counter = iter(range(requests))
+
+    async def worker(worker_id: int):
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                status = (await workload.send(client, endpoint, offset + index, worker_id)).status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+
+    await client.get("/__bench/metrics", params={"reset": True})
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    server = (await client.get("/__bench/metrics", params={"reset": True})).json()
+
+    row = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": requests - len(latencies),
+        "status_codes": statuses,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0,
+        "latency_p50_s": None,
+        "latency_p95_s": None,
+        "latency_p99_s": None,
+        "latency_mean_s": None,
+        "event_loop_lag_p99_ms": server.get("lag_p99_ms"),
+        "event_loop_lag_max_ms": server.get("lag_max_ms"),
+        "peak_rss_mb": server.get("peak_rss_mb")
+    }
+    if latencies:
+        row.update({
+            "latency_p50_s": round(percentile(latencies, 50), 3),
+            "latency_p95_s": round(percentile(latencies, 95), 3),
+            "latency_p99_s": round(percentile(latencies, 99), 3),
+            "latency_mean_s": round(statistics.mean(latencies), 3)
+        })
+    return row
+
+
+def compare(results, baseline_path: str, tolerance: float):
+    """Rows whose p95 latency rose or throughput fell by more than `tolerance` versus the baseline"""
+    with open(baseline_path) as f:
+        baseline = {(row["endpoint"], row["concurrency"]): row for row in json.load(f)["results"]}
+    regressions = []
+    for row in results:
+        previous = baseline.get((row["endpoint"], row["concurrency"]))
+        if not previous or not row["latency_p95_s"] or not previous["latency_p95_s"]:
+            continue
+        if row["latency_p95_s"] > previous["latency_p95_s"] * (1 + tolerance):
+            regressions.append(f"{row['endpoint']} x{row['concurrency']}: p95 {previous['latency_p95_s']} -> {row['latency_p95_s']} s")
+        if row["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{row['endpoint']} x{row['concurrency']}: throughput {previous['throughput_rps']} -> {row['throughput_rps']} req/s")
+    return regressions
+
+
+async def benchmark(args, port: int):
+    samples = load_samples(args.samples)
+    if not samples:
+        raise SystemExit(f"No blueprint samples found in {args.samples}")
+
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout, limits=limits) as client:
+        await wait_ready(client, args.server)
+
+        # Upload every sample once: stores the blueprints and gives follow-ups something to refer to
+        blueprint_ids = []
+        for name, content in samples:
+            response = await client.post(
+                "/api/analyze-blueprint",
+                files={"file": (name, content)},
+                data={"question": args.question, "auto_analyze": "false"}
+            )
+            response.raise_for_status()
+            blueprint_ids.append(response.json()["blueprint_id"])
+
+        workload = Workload(samples, blueprint_ids, args.question, not args.allow_cache)
+        results, offset = [], 0
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                row = await run_scenario(client, workload, endpoint, concurrency, args.requests, offset)
+                offset += args.requests
+                results.append(row)
+                latency = (
+                    f"p50 {row['latency_p50_s']:>6.3f} s | p95 {row['latency_p95_s']:>6.3f} s | p99 {row['latency_p99_s']:>6.3f} s"
+                    if row["ok"] else "no successful requests"
+                )
+                print(
+                    f"{endpoint:>10} x{concurrency:<3} | {latency} | {row['throughput_rps']:>7.2f} req/s"
+                    f" | lag p99 {row['event_loop_lag_p99_ms']} ms | peak RSS {row['peak_rss_mb']} MB"
+                    f" | errors {row['errors']} {row['status_codes'] if row['errors'] else ''}"
+                )
+
+        model_stats = (await client.get("/api/model-stats")).json()
+    return results, model_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[4, 16])
+    parser.add_argument("--requests", type=int, default=64, help="requests per endpoint and concurrency level")
+    parser.add_argument("--samples", default=SAMPLES_DIR, help="directory of blueprint images")
+    parser.add_argument("--question", default="How many bedrooms and bathrooms are there?")
+    parser.add_argument("--allow-cache", action="store_true", help="repeat identical requests (measures cache hits)")
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="server settings, e.g. FAKE_MODEL_LATENCY_MS=200")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--json", help="write machine-readable results to this path")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    parser.add_argument("--keep", action="store_true", help="keep the server's scratch directory")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    settings = server_settings(dict(item.split("=", 1) for item in args.env))
+    workdir = tempfile.mkdtemp(prefix="bench_api_")
+    port = free_port()
+    args.server = start_server(port, workdir, settings)
+    try:
+        results, model_stats = asyncio.run(benchmark(args, port))
+    finally:
+        args.server.send_signal(signal.SIGINT)
+        try:
+            args.server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            args.server.kill()
+        if args.keep:
+            print(f"Server working directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = compare(results, args.baseline, args.tolerance) if args.baseline else []
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "benchmark": "api",
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": {
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "samples": len(load_samples(args.samples)),
+                    "unique_requests": not args.allow_cache,
+                    "server_env": settings
+                },
+                "results": results,
+                "model_stats": model_stats,
+                "regressions": regressions
+            }, f, indent=2)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
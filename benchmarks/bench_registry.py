@@ -0,0 +1,113 @@
+# benchmarks/bench_registry.py
+"""
+Blueprint lookup benchmark: registry dict lookup vs. the old os.listdir prefix scan
+
+    python benchmarks/bench_registry.py --sizes 1000 10000 100000 --json results.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from blueprint_registry import BlueprintRegistry
+
+
+def populate(registry: BlueprintRegistry, upload_dir: str, count: int):
+    """Register `count` synthetic blueprints (and create empty files for the listdir scan)"""
+    with registry._lock:
+        rows = []
+        for index in range(len(registry), count):
+            blueprint_id = f"{index:064x}"
+            path = os.path.join(upload_dir, f"blueprint_{blueprint_id}.png")
+            open(path, "wb").close()
+            record = {
+                "blueprint_id": blueprint_id,
+                "path": path,
+                "content_hash": blueprint_id,
+                "mime_type": "image/png",
+                "size": 0,
+                "filename": "bench.png",
+                "ref_count": 1,
+                "created_at": "2024-01-01T00:00:00",
+                "last_used": "2024-01-01T00:00:00"
+            }
+            rows.append(tuple(record[field] for field in registry.FIELDS))
+            registry._entries[blueprint_id] = record
+        registry._conn.executemany(
+            f"INSERT INTO blueprints ({', '.join(registry.FIELDS)}) VALUES ({', '.join('?' for _ in registry.FIELDS)})",
+            rows
+        )
+        registry._conn.commit()
+
+
+def time_per_call(fn, ids) -> float:
+    start = time.perf_counter()
+    for blueprint_id in ids:
+        fn(blueprint_id)
+    return (time.perf_counter() - start) / len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--scan-lookups", type=int, default=20, help="listdir scans per size (they are slow)")
+    parser.add_argument("--json", help="write machine-readable results to this path")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        upload_dir = os.path.join(workdir, "uploads")
+        os.makedirs(upload_dir)
+        db_path = os.path.join(workdir, "blueprints.db")
+        registry = BlueprintRegistry(db_path)
+
+        for size in sorted(args.sizes):
+            populate(registry, upload_dir, size)
+            ids = [f"{random.randrange(size):064x}" for _ in range(args.lookups)]
+
+            dict_lookup = time_per_call(registry.get, ids)
+
+            def sqlite_lookup(blueprint_id):
+                return registry._conn.execute(
+                    "SELECT path FROM blueprints WHERE blueprint_id = ?", (blueprint_id,)
+                ).fetchone()
+
+            sqlite_time = time_per_call(sqlite_lookup, ids)
+
+            def listdir_scan(blueprint_id):
+                return [f for f in os.listdir(upload_dir) if f.startswith(f"blueprint_{blueprint_id}")]
+
+            scan_time = time_per_call(listdir_scan, ids[:args.scan_lookups])
+
+            start = time.perf_counter()
+            BlueprintRegistry(db_path)
+            startup_time = time.perf_counter() - start
+
+            row = {
+                "entries": size,
+                "registry_lookup_us": round(dict_lookup * 1e6, 3),
+                "sqlite_lookup_us": round(sqlite_time * 1e6, 3),
+                "listdir_scan_us": round(scan_time * 1e6, 3),
+                "registry_startup_s": round(startup_time, 4)
+            }
+            results.append(row)
+            print(
+                f"{size:>8} entries | registry {row['registry_lookup_us']:>8.3f} us"
+                f" | sqlite {row['sqlite_lookup_us']:>8.3f} us"
+                f" | listdir {row['listdir_scan_us']:>12.1f} us"
+                f" | startup {row['registry_startup_s']:.3f} s"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "blueprint_registry", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
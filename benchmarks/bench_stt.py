@@ -0,0 +1,116 @@
+# benchmarks/bench_stt.py
+"""
+Speech-to-text latency benchmark: remote Whisper API vs. local CPU engines
+
+    python benchmarks/bench_stt.py --audio question.wav --backends openai faster-whisper vosk --runs 5 --json stt.json
+
+Each clip is normalized once (as in production), then transcribed --runs times per backend.
+Model load time is reported separately from per-request latency.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from pydub import AudioSegment
+from voice_handler import VoiceHandler, STT_BACKENDS
+from model_clients import ModelClients
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", nargs="+", required=True, help="audio clips to transcribe")
+    parser.add_argument("--backends", nargs="+", default=["openai", "faster-whisper"], choices=list(STT_BACKENDS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-normalize", action="store_true", help="send the clips as-is")
+    parser.add_argument("--json", help="write machine-readable results to this path")
+    args = parser.parse_args()
+
+    # Only construct the engines being measured (no API key needed for local-only runs)
+    os.environ["STT_BACKEND"] = args.backends[0]
+    os.environ["STT_FALLBACK"] = "none"
+    handler = VoiceHandler(ModelClients())
+    clips = []
+    for path in args.audio:
+        normalized = path if args.no_normalize else handler.export_normalized(path, handler.normalized_segment(path))
+        clips.append({
+            "path": path,
+            "normalized": normalized,
+            "duration_s": len(AudioSegment.from_file(normalized)) / 1000,
+            "bytes": os.path.getsize(path),
+            "normalized_bytes": os.path.getsize(normalized)
+        })
+
+    results = []
+    try:
+        for name in args.backends:
+            backend = handler.create_backend(name)
+
+            start = time.perf_counter()
+            try:
+                backend.load()
+            except Exception as e:
+                print(f"{name:>15} | unavailable: {e}")
+                continue
+            load_time = time.perf_counter() - start
+
+            latencies, factors, transcripts = [], [], []
+            errors = 0
+            for clip in clips:
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    try:
+                        text = backend.transcribe(clip["normalized"])
+                    except Exception as e:
+                        errors += 1
+                        text = f"<error: {e}>"
+                    elapsed = time.perf_counter() - start
+                    latencies.append(elapsed)
+                    factors.append(elapsed / clip["duration_s"] if clip["duration_s"] else 0)
+                transcripts.append(text)
+
+            row = {
+                "backend": name,
+                "local": backend.local,
+                "load_s": round(load_time, 3),
+                "requests": len(latencies),
+                "errors": errors,
+                "latency_p50_s": round(percentile(latencies, 50), 3),
+                "latency_p95_s": round(percentile(latencies, 95), 3),
+                "latency_mean_s": round(statistics.mean(latencies), 3),
+                "real_time_factor": round(statistics.mean(factors), 3),
+                "transcripts": transcripts
+            }
+            results.append(row)
+            print(
+                f"{name:>15} | load {row['load_s']:>6.2f} s"
+                f" | p50 {row['latency_p50_s']:>6.3f} s | p95 {row['latency_p95_s']:>6.3f} s"
+                f" | RTF {row['real_time_factor']:.3f} | errors {errors}"
+            )
+    finally:
+        for clip in clips:
+            if clip["normalized"] != clip["path"] and os.path.exists(clip["normalized"]):
+                os.remove(clip["normalized"])
+        handler.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "benchmark": "speech_to_text",
+                "clips": [{key: clip[key] for key in ("path", "duration_s", "bytes", "normalized_bytes")} for clip in clips],
+                "results": results
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
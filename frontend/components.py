@@ -1,8 +1,7 @@
 # frontend/components.py
 import streamlit as st
 from PIL import Image
-from datetime import datetime
-from utils import process_question, reset_application
+from utils import API_URL, process_question, reset_application
 
 
 def render_header():
@@ -49,7 +48,7 @@ def render_welcome_screen():
         if uploaded_file:
             st.session_state.uploaded_file = uploaded_file
             st.session_state.blueprint_uploaded = True
-            st.session_state.blueprint_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+            st.session_state.blueprint_id = None  # Assigned by the server on first analysis
             st.session_state.show_welcome = False
             st.session_state.auto_analyzed = False
             st.rerun()
@@ -71,7 +70,11 @@ def render_blueprint_panel():
             image = Image.open(st.session_state.uploaded_file)
             st.image(image, width='stretch', output_format="PNG")
         except:
-            st.error("Could not display image")
+            # PDFs (and other formats PIL can't open) are rendered page by page by the backend
+            if st.session_state.blueprint_id:
+                st.image(f"{API_URL}/api/blueprints/{st.session_state.blueprint_id}/pages/1", width='stretch')
+            else:
+                st.error("Could not display image")
     
     st.markdown("</div>", unsafe_allow_html=True)
     
@@ -1,9 +1,10 @@
 # frontend/utils.py
 import streamlit as st
 import requests
+import json
 import re
 import os
-from datetime import datetime
+import uuid
 
 API_URL = os.getenv("API_URL", "http://localhost:8000")
 
@@ -16,6 +17,8 @@ def initialize_session_state():
         st.session_state.blueprint_uploaded = False
     if 'blueprint_id' not in st.session_state:
         st.session_state.blueprint_id = None
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
     if 'uploaded_file' not in st.session_state:
         st.session_state.uploaded_file = None
     if 'show_welcome' not in st.session_state:
@@ -26,24 +29,66 @@ def initialize_session_state():
         st.session_state.analyzing = False
 
 
-def analyze_blueprint_api(file_bytes, filename, question=None, auto_analyze=True):
-    """Call API for blueprint analysis"""
+def stream_events(endpoint, data, files=None):
+    """POST to a streaming endpoint, yielding parsed Server-Sent Events"""
     try:
-        files = {"file": (filename, file_bytes, "image/jpeg")}
-        data = {"auto_analyze": str(auto_analyze).lower()}
-        if question:
-            data["question"] = question
-        
-        response = requests.post(
-            f"{API_URL}/api/analyze-blueprint",
+        with requests.post(
+            f"{API_URL}{endpoint}",
             files=files,
             data=data,
-            timeout=120
-        )
-        
-        return response.json() if response.status_code == 200 else {"success": False, "error": response.text}
+            stream=True,
+            timeout=(10, 120)
+        ) as response:
+            if response.status_code != 200:
+                yield {"type": "error", "answer": response.text, "status_code": response.status_code}
+                return
+            
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data: "):
+                    yield json.loads(line[len("data: "):])
     except Exception as e:
-        return {"success": False, "error": str(e)}
+        yield {"type": "error", "answer": str(e)}
+
+
+def stream_blueprint_api(file_bytes, filename, question=None, auto_analyze=True, session_id=None):
+    """Upload a blueprint to the streaming analysis API"""
+    files = {"file": (filename, file_bytes, "image/jpeg")}
+    data = {"auto_analyze": str(auto_analyze).lower()}
+    if session_id:
+        data["session_id"] = session_id
+    if question:
+        data["question"] = question
+    
+    return stream_events("/api/analyze-blueprint/stream", data, files=files)
+
+
+def stream_followup_api(blueprint_id, question, session_id=None):
+    """Ask a follow-up about an already-uploaded blueprint by ID (no file upload)"""
+    data = {"blueprint_id": blueprint_id, "question": question}
+    if session_id:
+        data["session_id"] = session_id
+    return stream_events("/api/ask-followup/stream", data)
+
+
+def render_stream(events):
+    """
+    Render streamed tokens into a placeholder as they arrive
+    Returns (success, full answer text, final event)
+    """
+    placeholder = st.empty()
+    answer = ""
+    final = {}
+    
+    for event in events:
+        if event.get("type") == "token":
+            answer += event["text"]
+            placeholder.markdown(clean_response(answer) + " ▌")
+        elif event.get("type") in ("done", "error", "meta"):
+            final = {**final, **event}
+    
+    placeholder.empty()
+    success = final.get("type") == "done" and final.get("confidence") != "error"
+    return success, final.get("answer", answer), final
 
 
 def clean_response(response):
@@ -65,17 +110,17 @@ def perform_auto_analysis():
         st.session_state.uploaded_file.seek(0)
         file_bytes = st.session_state.uploaded_file.read()
         
-        with st.spinner("🔍 Analyzing blueprint comprehensively..."):
-            result = analyze_blueprint_api(
-                file_bytes,
-                st.session_state.uploaded_file.name,
-                question=None,
-                auto_analyze=True
-            )
+        success, raw_response, result = render_stream(stream_blueprint_api(
+            file_bytes,
+            st.session_state.uploaded_file.name,
+            question=None,
+            auto_analyze=True,
+            session_id=st.session_state.session_id
+        ))
         
-        if result.get('success'):
-            raw_response = result.get('analysis', 'Analysis completed')
-            response = clean_response(raw_response)
+        if success:
+            response = clean_response(raw_response or 'Analysis completed')
+            st.session_state.blueprint_id = result.get('blueprint_id')
             
             st.session_state.messages.append({
                 "role": "assistant",
@@ -84,7 +129,7 @@ def perform_auto_analysis():
         else:
             st.session_state.messages.append({
                 "role": "assistant",
-                "content": f"❌ Error analyzing blueprint: {result.get('error', 'Unknown error')}"
+                "content": f"❌ Error analyzing blueprint: {raw_response or 'Unknown error'}"
             })
         
         st.session_state.auto_analyzed = True
@@ -107,27 +152,27 @@ def process_question(question):
     st.session_state.messages.append({"role": "user", "content": question})
     
     with st.spinner("🤔 Analyzing..."):
-        st.session_state.uploaded_file.seek(0)
-        file_bytes = st.session_state.uploaded_file.read()
-        
-        # Build context from previous messages
-        if len(st.session_state.messages) > 2:
-            context = "Previous conversation:\n"
-            for msg in st.session_state.messages[:-1]:
-                context += f"{msg['role']}: {msg['content'][:150]}...\n"
-            full_question = f"{context}\nNew question: {question}"
-        else:
-            full_question = question
+        # Conversation history is kept server-side, so only the new question is sent
+        # Follow-ups reference the stored blueprint; re-upload only if the server no longer has it
+        success, raw_response, result = False, None, {"status_code": 404}
+        if st.session_state.blueprint_id:
+            success, raw_response, result = render_stream(
+                stream_followup_api(st.session_state.blueprint_id, question, st.session_state.session_id)
+            )
         
-        result = analyze_blueprint_api(
-            file_bytes,
-            st.session_state.uploaded_file.name,
-            question=full_question,
-            auto_analyze=False
-        )
+        if result.get('status_code') == 404:
+            st.session_state.uploaded_file.seek(0)
+            success, raw_response, result = render_stream(stream_blueprint_api(
+                st.session_state.uploaded_file.read(),
+                st.session_state.uploaded_file.name,
+                question=question,
+                auto_analyze=False,
+                session_id=st.session_state.session_id
+            ))
+            if result.get('blueprint_id'):
+                st.session_state.blueprint_id = result['blueprint_id']
         
-        raw_response = result.get('analysis', result.get('error', 'Error occurred')) if result.get('success') else f"Error: {result.get('error', 'Unknown error')}"
-        response = clean_response(raw_response)
+        response = clean_response(raw_response if success else f"Error: {raw_response or 'Unknown error'}")
         
         st.session_state.messages.append({"role": "assistant", "content": response})
     
@@ -139,6 +184,8 @@ def reset_application():
     st.session_state.messages = []
     st.session_state.blueprint_uploaded = False
     st.session_state.uploaded_file = None
+    st.session_state.blueprint_id = None
+    st.session_state.session_id = uuid.uuid4().hex
     st.session_state.show_welcome = True
     st.session_state.auto_analyzed = False
     st.session_state.analyzing = False